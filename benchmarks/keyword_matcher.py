@@ -0,0 +1,83 @@
+"""
+Compares the compiled keyword automaton with the substring scan it replaced,
+for matches() (any keyword) and find() (every matched keyword).
+
+    python benchmarks/keyword_matcher.py [--keywords 10 100 1000 5000] [--texts 2000]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.keywords import KeywordMatcher  # noqa: E402
+
+
+def substring_scan(text, keywords):
+    low = text.lower()
+    return any(kw.lower() in low for kw in keywords)
+
+
+def substring_find(text, keywords):
+    low = text.lower()
+    return [kw for kw in keywords if kw.lower() in low]
+
+
+def _word(rng):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+
+
+def _time(fn, texts):
+    started = time.perf_counter()
+    hits = sum(1 for text in texts if fn(text))
+    return time.perf_counter() - started, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--keywords", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = [_word(rng) for _ in range(20_000)]
+    texts = [
+        " ".join(rng.choices(vocabulary, k=rng.randint(3, 25)))
+        for _ in range(args.texts)
+    ]
+
+    print(
+        f"{'keywords':>9} {'op':>8} {'scan ms':>10} {'automaton ms':>13} "
+        f"{'compile ms':>11} {'speedup':>8}"
+    )
+    for count in args.keywords:
+        keywords = rng.sample(vocabulary, count)
+
+        started = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        compile_seconds = time.perf_counter() - started
+
+        for op, scan, automaton in (
+            ("matches", substring_scan, matcher.matches),
+            ("find", substring_find, matcher.find),
+        ):
+            scan_seconds, scan_hits = _time(lambda t: scan(t, keywords), texts)
+            automaton_seconds, automaton_hits = _time(automaton, texts)
+            assert scan_hits == automaton_hits, "matchers disagree"
+
+            print(
+                f"{count:>9} {op:>8} {scan_seconds * 1000:>10.1f} "
+                f"{automaton_seconds * 1000:>13.1f} {compile_seconds * 1000:>11.1f} "
+                f"{scan_seconds / automaton_seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Offline performance suite: step execution, terminal rule evaluation, run
+serialization and end-to-end runs in eager Celery mode.
+
+    python benchmarks/suite.py [--output results.json] [--baseline benchmarks/baseline.json]
+                               [--threshold 0.15] [--threshold-for e2e.=0.3]
+                               [--only step.] [--scale 0.2] [--update-baseline]
+
+Runs against a throwaway test database created from the configured one, so no
+existing data is read or written, and without an OpenRouter key, so nothing
+leaves the machine. Results are written as JSON; when a baseline file exists,
+every benchmark whose time per operation grew by more than its threshold is
+reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.15
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str, ops: int):
+    """Registers a setup function that returns the callable to time."""
+
+    def register(setup):
+        setup.ops = ops
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@dataclass
+class Result:
+    name: str
+    ops: int
+    repeats: int
+    # Seconds per operation.
+    median: float
+    best: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1 / self.median if self.median else float("inf")
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def measure(name: str, fn: Callable, ops: int, repeats: int, warmup: int = 1) -> Result:
+    """Times `repeats` calls of fn after `warmup` untimed ones."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) / ops)
+    return Result(name, ops, repeats, statistics.median(samples), min(samples))
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, dict],
+    threshold: float = DEFAULT_THRESHOLD,
+    overrides: Optional[Dict[str, float]] = None,
+) -> List[Regression]:
+    """
+    Benchmarks whose median time per operation exceeds the baseline by more
+    than their threshold. Overrides map a name prefix to its own threshold;
+    the longest matching prefix wins. Benchmarks missing from the baseline
+    are not compared.
+    """
+    overrides = overrides or {}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous:
+            continue
+        prefixes = [p for p in overrides if result.name.startswith(p)]
+        limit = overrides[max(prefixes, key=len)] if prefixes else threshold
+        if result.median > previous["median"] * (1 + limit):
+            regressions.append(
+                Regression(result.name, previous["median"], result.median, limit)
+            )
+    return regressions
+
+
+def _application(**overrides):
+    from loans.models import Application
+
+    fields = {
+        "applicant_name": "Bench",
+        "amount": Decimal(12000),
+        "monthly_income": Decimal(4000),
+        "declared_debts": Decimal(500),
+        "country": "ES",
+        "loan_purpose": "home renovation and a new kitchen",
+    }
+    fields.update(overrides)
+    return Application(**fields)
+
+
+def _step(step_type: str, params: dict, iterations: int):
+    from orchestrator.core import RunContext
+    from orchestrator.steps import STEP_PROCESSORS
+
+    processor_class = STEP_PROCESSORS[step_type]
+    prepared = processor_class.prepare_params(params)
+    application = _application()
+
+    def run():
+        for _ in range(iterations):
+            processor_class(application, RunContext()).execute(prepared)
+
+    return run
+
+
+@benchmark("step.dti_rule", ops=2000)
+def bench_dti_rule():
+    return _step("dti_rule", {}, 2000)
+
+
+@benchmark("step.amount_policy", ops=2000)
+def bench_amount_policy():
+    return _step("amount_policy", {}, 2000)
+
+
+@benchmark("step.risk_scoring", ops=2000)
+def bench_risk_scoring():
+    return _step("risk_scoring", {}, 2000)
+
+
+@benchmark("step.sentiment_check", ops=2000)
+def bench_sentiment_check():
+    return _step("sentiment_check", {"mode": "keyword"}, 2000)
+
+
+STEP_OUTCOMES = {
+    "dti_rule": {"outcome": "PASS", "detail": {"dti": 0.125}},
+    "amount_policy": {"outcome": "PASS", "detail": {"cap": 30000}},
+    "risk_scoring": {"outcome": "SCORE", "detail": {"risk_score": 42}},
+    "sentiment_check": {"outcome": "SAFE", "detail": {"mode": "keyword"}},
+}
+CONDITIONS = [
+    "dti_rule.outcome == 'FAIL'",
+    "sentiment_check.outcome == 'RISKY'",
+    "risk_scoring.detail['risk_score'] > 80 or amount_policy.outcome == 'FAIL'",
+    "dti_rule.outcome == 'PASS' and amount_policy.outcome == 'PASS' "
+    "and risk_scoring.detail['risk_score'] <= 45",
+]
+
+
+@benchmark("rules.evaluate_terminal_rule", ops=2000)
+def bench_evaluate_terminal_rule():
+    from loans.tasks import evaluate_terminal_rule
+
+    def run():
+        for _ in range(500):
+            for condition in CONDITIONS:
+                evaluate_terminal_rule(condition, STEP_OUTCOMES)
+
+    return run
+
+
+@benchmark("rules.resolve_final_status", ops=2000)
+def bench_resolve_final_status():
+    from loans.tasks import resolve_final_status
+    from orchestrator.plan import PlannedRule
+    from orchestrator.rules import compile_condition
+
+    rules = [
+        PlannedRule(order, compile_condition(condition), "REJECTED")
+        for order, condition in enumerate(CONDITIONS)
+    ]
+    step_results = [
+        (step_type, result["outcome"], result["detail"])
+        for step_type, result in STEP_OUTCOMES.items()
+    ]
+
+    def run():
+        for _ in range(2000):
+            resolve_final_status(rules, step_results)
+
+    return run
+
+
+def _pipeline(name: str):
+    from loans.models import Pipeline, PipelineStep, TerminalRule
+
+    pipeline = Pipeline.objects.create(name=name, is_active=True)
+    for order, step_type in enumerate(
+        ["dti_rule", "amount_policy", "risk_scoring", "sentiment_check"], 1
+    ):
+        PipelineStep.objects.create(pipeline=pipeline, step_type=step_type, order=order)
+    for order, (condition, status) in enumerate(
+        [
+            ("dti_rule.outcome == 'FAIL'", "REJECTED"),
+            ("sentiment_check.outcome == 'RISKY'", "REJECTED"),
+            ("risk_scoring.detail['risk_score'] <= 45", "APPROVED"),
+        ],
+        1,
+    ):
+        TerminalRule.objects.create(
+            pipeline=pipeline, order=order, condition=condition, final_status=status
+        )
+    return pipeline
+
+
+@benchmark("serializer.pipeline_run", ops=200)
+def bench_pipeline_run_serializer():
+    from loans.models import PipelineRun
+    from loans.serializers import PipelineRunSerializer
+    from loans.tasks import run_pipeline_task
+
+    pipeline = _pipeline("bench-serializer")
+    for i in range(200):
+        application = _application(applicant_name=f"Serialized {i}")
+        application.save()
+        run_pipeline_task.apply(args=[application.id, pipeline.id])
+
+    def run():
+        runs = PipelineRun.objects.filter(pipeline=pipeline).prefetch_related(
+            "step_logs"
+        )
+        data = PipelineRunSerializer(runs, many=True).data
+        assert len(data) == 200
+
+    return run
+
+
+@benchmark("e2e.run_pipeline_task", ops=50)
+def bench_run_pipeline_task():
+    from loans.tasks import run_pipeline_task
+
+    pipeline = _pipeline("bench-e2e")
+    applications = []
+    for i in range(50):
+        application = _application(applicant_name=f"E2E {i}", amount=5000 + i * 500)
+        application.save()
+        applications.append(application)
+
+    def run():
+        # force skips result reuse, so every run executes its steps.
+        for application in applications:
+            run_pipeline_task.delay(application.id, pipeline.id, force=True)
+
+    return run
+
+
+def run_suite(names, repeats: int, scale: float) -> List[Result]:
+    from django.test.utils import setup_databases, teardown_databases
+
+    from config.celery import app
+
+    app.conf.task_always_eager = True
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        results = []
+        for name in names:
+            setup = BENCHMARKS[name]
+            runs = max(1, round(repeats * scale))
+            result = measure(name, setup(), setup.ops, runs)
+            print(
+                f"{name:<32} {result.median * 1e6:>12.1f} {result.best * 1e6:>12.1f} "
+                f"{result.ops_per_sec:>12.0f}"
+            )
+            results.append(result)
+        return results
+    finally:
+        teardown_databases(old_config, verbosity=0)
+
+
+def _threshold_override(value: str):
+    prefix, _, threshold = value.partition("=")
+    if not prefix or not threshold:
+        raise argparse.ArgumentTypeError("expected PREFIX=THRESHOLD")
+    return prefix, float(threshold)
+
+
+def _environment() -> dict:
+    from django.db import connection
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "database": connection.vendor,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write this run's results to the baseline file.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed growth of the median time per operation (0.15 = 15%%).",
+    )
+    parser.add_argument(
+        "--threshold-for",
+        type=_threshold_override,
+        action="append",
+        default=[],
+        metavar="PREFIX=THRESHOLD",
+        help="Threshold for benchmarks whose name starts with PREFIX.",
+    )
+    parser.add_argument(
+        "--only", nargs="+", default=[], help="Run benchmarks starting with these."
+    )
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiplier for --repeats."
+    )
+    args = parser.parse_args()
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+
+    # Offline: keyword sentiment only, and no LLM calls even if a key is set.
+    settings.OPENROUTER_API_KEY = ""
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not args.only or any(name.startswith(p) for p in args.only)
+    ]
+    print(f"{'benchmark':<32} {'median us/op':>12} {'best us/op':>12} {'ops/s':>12}")
+    results = run_suite(names, args.repeats, args.scale)
+
+    report = {
+        "environment": _environment(),
+        "results": {
+            r.name: {**asdict(r), "ops_per_sec": r.ops_per_sec} for r in results
+        },
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(
+            f"No baseline at {args.baseline}; run with --update-baseline to store one."
+        )
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, dict(args.threshold_for))
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.name}: {regression.baseline * 1e6:.1f} -> "
+            f"{regression.current * 1e6:.1f} us/op "
+            f"(+{regression.change:.0%}, allowed +{regression.threshold:.0%})"
+        )
+    if not regressions:
+        print(f"No regressions against {args.baseline}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "corsheaders",
     "rest_framework",
+    "django_filters",
     "drf_spectacular",
     "drf_spectacular_sidecar",
     "loans",
@@ -165,6 +166,119 @@ CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://redis:6379/0")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://redis:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
+# Pipeline runs go to PIPELINE_QUEUE, or PIPELINE_LLM_QUEUE when the pipeline
+# calls the LLM (see loans.routing); run one worker pool per queue so slow LLM
+# runs never hold the slots of rule-only ones.
+PIPELINE_QUEUE = env("PIPELINE_QUEUE", default="pipelines")
+PIPELINE_LLM_QUEUE = env("PIPELINE_LLM_QUEUE", default="pipelines-llm")
+CELERY_TASK_ROUTES = ("loans.routing.route_pipeline_task",)
+# Priority lanes (loans.routing.PRIORITY_LANES) within each Redis queue; 0 is
+# served first. Prefetching one task at a time keeps a busy worker from
+# holding queued high-priority tasks.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": [0, 3, 6, 9],
+    "sep": ":",
+    "queue_order_strategy": "priority",
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = env.int(
+    "CELERY_WORKER_PREFETCH_MULTIPLIER", default=1
+)
+
+# Shared Redis (the broker by default) for caches and cross-worker state.
+REDIS_URL = env("REDIS_URL", default=CELERY_BROKER_URL)
+REDIS_SOCKET_TIMEOUT = env.float("REDIS_SOCKET_TIMEOUT", default=0.5)
+# Seconds a Redis-backed feature stays disabled after a connection error.
+REDIS_RETRY_AFTER = env.int("REDIS_RETRY_AFTER", default=30)
+
+# Run request de-duplication (POST /api/run/): how long an Idempotency-Key is
+# remembered, and the longest a queued or running task coalesces duplicates.
+RUN_IDEMPOTENCY_TTL = env.int("RUN_IDEMPOTENCY_TTL", default=24 * 60 * 60)
+RUN_INFLIGHT_TTL = env.int("RUN_INFLIGHT_TTL", default=15 * 60)
+
+# GET /api/runs/by_task_id/<task_id>/events/ (server-sent events): how long a
+# client waits for completion, how often an idle stream sends a keepalive, and
+# how often the database is polled when Redis is unavailable (seconds).
+RUN_EVENTS_TIMEOUT = env.int("RUN_EVENTS_TIMEOUT", default=60)
+RUN_EVENTS_KEEPALIVE = env.int("RUN_EVENTS_KEEPALIVE", default=15)
+RUN_EVENTS_POLL_INTERVAL = env.float("RUN_EVENTS_POLL_INTERVAL", default=1.0)
+
+# Worker metrics (GET /api/metrics/): each process adds what it recorded to
+# this Redis hash at most every METRICS_FLUSH_INTERVAL seconds.
+METRICS_REDIS_KEY = env("METRICS_REDIS_KEY", default="loan-metrics")
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", default=5.0)
+
+# Default window (seconds) of GET /api/runs/timings/ percentiles.
+RUN_TIMINGS_WINDOW = env.int("RUN_TIMINGS_WINDOW", default=24 * 60 * 60)
+
+# Compiled pipeline versions kept per process.
+EXECUTION_PLAN_CACHE_SIZE = env.int("EXECUTION_PLAN_CACHE_SIZE", default=256)
+
+# Threads per worker process for running independent steps of DAG pipelines.
+PIPELINE_STEP_THREADS = env.int("PIPELINE_STEP_THREADS", default=8)
+
+# Run pipelines that call the LLM on the worker's event loop: steps await
+# their I/O, so the runs of a batch chunk (or of concurrent tasks with a
+# threads pool) share one loop instead of blocking the process per request.
+PIPELINE_ASYNC_STEPS = env.bool("PIPELINE_ASYNC_STEPS", default=False)
+
+# How run_pipeline_task guards the application: "row" holds SELECT ... FOR UPDATE
+# for the whole run; "optimistic" computes outside any transaction and retries
+# (up to PIPELINE_OPTIMISTIC_RETRIES times) if the application changed.
+PIPELINE_LOCK_MODE = env("PIPELINE_LOCK_MODE", default="row")
+PIPELINE_OPTIMISTIC_RETRIES = env.int("PIPELINE_OPTIMISTIC_RETRIES", default=3)
+
+# Re-running a pipeline version on an application whose decision inputs have
+# not changed records a run pointing at the earlier result (force=true skips).
+PIPELINE_REUSE_RESULTS = env.bool("PIPELINE_REUSE_RESULTS", default=True)
+
+# "rows" writes one StepLog row per step; "compact" keeps a run's step logs in
+# PipelineRun.step_results. The runs API returns the same shape either way.
+PIPELINE_STEP_LOG_STORAGE = env("PIPELINE_STEP_LOG_STORAGE", default="rows")
+
+# Rows validated and inserted per chunk by POST /api/applications/bulk/.
+BULK_INGEST_CHUNK_SIZE = env.int("BULK_INGEST_CHUNK_SIZE", default=1000)
 
 OPENROUTER_API_KEY = env("OPENROUTER_API_KEY")
 OPENROUTER_MODEL = env("OPENROUTER_MODEL", default="deepseek/deepseek-r1:free")
+OPENROUTER_URL = env(
+    "OPENROUTER_URL", default="https://openrouter.ai/api/v1/chat/completions"
+)
+# Per-worker HTTP client: keep-alive pool size, retry policy and timeouts (seconds).
+OPENROUTER_POOL_SIZE = env.int("OPENROUTER_POOL_SIZE", default=10)
+# Connections (and so concurrent requests) per event loop of the async client.
+OPENROUTER_ASYNC_POOL_SIZE = env.int("OPENROUTER_ASYNC_POOL_SIZE", default=100)
+OPENROUTER_MAX_RETRIES = env.int("OPENROUTER_MAX_RETRIES", default=3)
+OPENROUTER_BACKOFF_FACTOR = env.float("OPENROUTER_BACKOFF_FACTOR", default=0.5)
+OPENROUTER_BACKOFF_MAX = env.float("OPENROUTER_BACKOFF_MAX", default=8)
+OPENROUTER_CONNECT_TIMEOUT = env.float("OPENROUTER_CONNECT_TIMEOUT", default=3.05)
+OPENROUTER_READ_TIMEOUT = env.float("OPENROUTER_READ_TIMEOUT", default=20)
+# Completion budget: a classification answers with one word. Requests ask for
+# OPENROUTER_MAX_TOKENS, plus OPENROUTER_MAX_TOKENS_PER_ITEM per batched text;
+# raise both for reasoning models, which spend tokens before they answer.
+OPENROUTER_MAX_TOKENS_PER_ITEM = env.int("OPENROUTER_MAX_TOKENS_PER_ITEM", default=16)
+OPENROUTER_MAX_TOKENS = env.int(
+    "OPENROUTER_MAX_TOKENS", default=OPENROUTER_MAX_TOKENS_PER_ITEM
+)
+
+# Micro-batching of concurrent LLM classifications (0 disables the window).
+# Only worth it when one process runs many tasks at once (threads or gevent
+# pool); a prefork process has a single caller and would just wait.
+LLM_BATCH_WINDOW_MS = env.int("LLM_BATCH_WINDOW_MS", default=0)
+LLM_BATCH_MAX_ITEMS = env.int("LLM_BATCH_MAX_ITEMS", default=20)
+LLM_BATCH_CONCURRENCY = env.int("LLM_BATCH_CONCURRENCY", default=4)
+
+# LLM requests per minute across all workers (0 disables the limit), the burst
+# allowed above that rate, and how long a request may wait for a slot before
+# the step falls back to keywords (seconds).
+LLM_RATE_LIMIT = env.int("LLM_RATE_LIMIT", default=60)
+LLM_RATE_LIMIT_BURST = env.int("LLM_RATE_LIMIT_BURST", default=10)
+LLM_RATE_LIMIT_MAX_WAIT = env.float("LLM_RATE_LIMIT_MAX_WAIT", default=10)
+
+# Cache of LLM sentiment verdicts keyed by normalized purpose, model and prompt.
+LLM_CACHE_ENABLED = env.bool("LLM_CACHE_ENABLED", default=True)
+LLM_CACHE_LOCAL_SIZE = env.int("LLM_CACHE_LOCAL_SIZE", default=10_000)
+LLM_CACHE_LOCAL_TTL = env.int("LLM_CACHE_LOCAL_TTL", default=60 * 60)
+LLM_CACHE_REDIS_TTL = env.int("LLM_CACHE_REDIS_TTL", default=7 * 24 * 60 * 60)
+LLM_CACHE_REDIS_URL = env("LLM_CACHE_REDIS_URL", default=REDIS_URL)
+# How often (seconds) a worker checks whether the cache was flushed elsewhere.
+LLM_CACHE_GENERATION_TTL = env.float("LLM_CACHE_GENERATION_TTL", default=5)
@@ -1,5 +1,5 @@
 import axios from "axios";
-import type { Application, Pipeline, PipelineRun } from "@/types";
+import type { Application, CursorPage, Pipeline, PipelineRun } from "@/types";
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL || "http://localhost:8000/api",
@@ -46,13 +46,26 @@ export async function runPipeline(application_id: number, pipeline_id: number) {
     message: string;
     application_id: number;
     pipeline_id: number;
+    task_id: string;
+    poll_status_url: string;
+    events_url: string;
   };
 }
 
-// Runs
-export async function listRuns(): Promise<PipelineRun[]> {
-  const { data } = await api.get("/runs/");
-  return data;
+// Runs (cursor-paginated, newest first, filtered server-side)
+export type RunFilters = {
+  application?: number;
+  pipeline?: number;
+  final_status?: string;
+  start_time_after?: string;
+  start_time_before?: string;
+};
+
+export async function listRuns(filters: RunFilters = {}): Promise<PipelineRun[]> {
+  const { data } = await api.get<CursorPage<PipelineRun>>("/runs/", {
+    params: filters,
+  });
+  return data.results;
 }
 
 export async function getRun(id: number): Promise<PipelineRun> {
@@ -60,4 +73,24 @@ export async function getRun(id: number): Promise<PipelineRun> {
   return data;
 }
 
+export async function getRunByTaskId(taskId: string): Promise<PipelineRun> {
+  const { data } = await api.get(`/runs/by_task_id/${taskId}/`);
+  return data;
+}
+
+// Resolves once the run behind events_url is recorded (or the stream times out).
+export function waitForRun(eventsUrl: string): Promise<void> {
+  const url = new URL(eventsUrl, api.defaults.baseURL).toString();
+  return new Promise((resolve) => {
+    const source = new EventSource(url);
+    const done = () => {
+      source.close();
+      resolve();
+    };
+    source.addEventListener("completed", done);
+    source.addEventListener("timeout", done);
+    source.onerror = done;
+  });
+}
+
 export { api };
@@ -4,6 +4,7 @@ import {
   listPipelines,
   listRuns,
   runPipeline,
+  waitForRun,
 } from "@/api/api";
 import type { Application, Pipeline, PipelineRun } from "@/types";
 import { Select } from "@/components/Select";
@@ -40,8 +41,12 @@ export default function RunPage() {
     setLoading(true);
     setMsg(null);
     try {
-      await runPipeline(Number(applicationId), Number(pipelineId));
-      setMsg("Run requested. Fetching history…");
+      const { events_url } = await runPipeline(
+        Number(applicationId),
+        Number(pipelineId),
+      );
+      setMsg("Run requested. Waiting for it to finish…");
+      await waitForRun(events_url);
       await refreshRuns();
       // eslint-disable-next-line @typescript-eslint/no-explicit-any
     } catch (e: any) {
@@ -25,7 +25,7 @@ export default function RunsPage() {
       <header className="mb-3">
         <h1 className="h4 fw-bold mb-1">Runs</h1>
         <p className="text-body-secondary small mb-0">
-          All runs with step logs.
+          Latest runs with step logs.
         </p>
       </header>
       {loading ? <p className="mb-0">Loading…</p> : <RunsTable runs={runs} />}
@@ -17,6 +17,7 @@ export type PipelineStep = {
   step_type: StepType;
   order: number;
   params: JSONValue;
+  depends_on?: StepType[] | null;
 };
 
 export type TerminalRule = {
@@ -30,7 +31,9 @@ export type Pipeline = {
   id?: number;
   name: string;
   is_active: boolean;
+  early_termination?: boolean;
   description?: string | null;
+  version?: number;
   steps: PipelineStep[];
   terminal_rules: TerminalRule[];
 };
@@ -40,14 +43,28 @@ export type StepLog = {
   outcome: string;
   detail: JSONValue;
   execution_time: string;
+  wall_duration?: number | null;
+  cpu_duration?: number | null;
 };
 
 export type PipelineRun = {
   id: number;
   application: number;
   pipeline: number;
+  pipeline_version?: number | null;
   start_time: string;
   end_time: string | null;
   final_status: Status | null;
+  reused_from?: number | null;
+  enqueued_at?: string | null;
+  queue_wait?: number | null;
+  lock_wait?: number | null;
+  execution_duration?: number | null;
   step_logs: StepLog[];
 };
+
+export type CursorPage<T> = {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+};
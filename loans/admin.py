@@ -5,13 +5,44 @@ from .models import (
     Pipeline,
     PipelineRun,
     PipelineStep,
+    PipelineVersion,
     StepLog,
     TerminalRule,
 )
+from .serializers import PipelineSerializer
+
+
+class PipelineAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        """Edits go through the serializer, so a changed config gets a new version."""
+        if not change:
+            return super().save_model(request, obj, form, change)
+        PipelineSerializer().update(
+            Pipeline.objects.get(pk=obj.pk),
+            {field: form.cleaned_data[field] for field in form.changed_data},
+        )
+
+
+class SnapshotAdmin(admin.ModelAdmin):
+    """
+    Steps, rules and versions are shared by past versions of a pipeline and
+    are read-only here; change them through the pipelines API.
+    """
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 
 admin.site.register(Application)
-admin.site.register(Pipeline)
-admin.site.register(TerminalRule)
+admin.site.register(Pipeline, PipelineAdmin)
+admin.site.register(TerminalRule, SnapshotAdmin)
 admin.site.register(PipelineRun)
-admin.site.register(PipelineStep)
+admin.site.register(PipelineStep, SnapshotAdmin)
+admin.site.register(PipelineVersion, SnapshotAdmin)
 admin.site.register(StepLog)
@@ -0,0 +1,140 @@
+"""
+De-duplication of run requests in Redis, so retries and double submissions
+get the task that is already queued or running instead of a second run.
+
+Two kinds of keys, both expiring:
+  - run-idempotency:<key> maps a client's Idempotency-Key to its request and
+    task, for RUN_IDEMPOTENCY_TTL seconds;
+  - run-inflight:<application>:<pipeline>:<version> holds the task queued or
+    running for that combination until the task releases it (or
+    RUN_INFLIGHT_TTL passes, should the worker die).
+"""
+
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+from orchestrator.redis_client import get_redis, mark_unavailable
+
+logger = logging.getLogger(__name__)
+
+# Deletes the in-flight key only if it still belongs to the finishing task.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Deletes an Idempotency-Key record only if it still names the given task.
+_FORGET_SCRIPT = """
+local value = redis.call('get', KEYS[1])
+if value and cjson.decode(value)['task_id'] == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotencyKeyReused(Exception):
+    """The Idempotency-Key was already used for a different request."""
+
+
+@dataclass(frozen=True)
+class RunClaim:
+    task_id: str
+    # False when the request was coalesced into an existing task.
+    is_new: bool
+
+
+def _inflight_key(application_id, pipeline_id, version) -> str:
+    return f"run-inflight:{application_id}:{pipeline_id}:{version}"
+
+
+def _idempotency_key(key: str) -> str:
+    return f"run-idempotency:{key}"
+
+
+def claim_run(
+    application_id: int,
+    pipeline_id: int,
+    version: int,
+    idempotency_key: Optional[str] = None,
+) -> RunClaim:
+    """
+    Returns the task to use for a run request: an existing one for a reused
+    Idempotency-Key or an identical request still in flight, otherwise a new
+    task ID, now registered as in flight. Without Redis every request is new.
+    """
+    task_id = str(uuid.uuid4())
+    client = get_redis()
+    if client is None:
+        return RunClaim(task_id, True)
+
+    request = {"application_id": application_id, "pipeline_id": pipeline_id}
+    try:
+        if idempotency_key:
+            claimed = client.set(
+                _idempotency_key(idempotency_key),
+                json.dumps({**request, "task_id": task_id}),
+                nx=True,
+                ex=settings.RUN_IDEMPOTENCY_TTL,
+            )
+            previous = (
+                None if claimed else client.get(_idempotency_key(idempotency_key))
+            )
+            if previous is not None:
+                previous = json.loads(previous)
+                if {k: previous[k] for k in request} != request:
+                    raise IdempotencyKeyReused(idempotency_key)
+                return RunClaim(previous["task_id"], False)
+
+        inflight = _inflight_key(application_id, pipeline_id, version)
+        if client.set(inflight, task_id, nx=True, ex=settings.RUN_INFLIGHT_TTL):
+            return RunClaim(task_id, True)
+
+        existing = client.get(inflight)
+        if existing is None:
+            # Released in between: this request is the new in-flight run.
+            client.set(inflight, task_id, ex=settings.RUN_INFLIGHT_TTL)
+            return RunClaim(task_id, True)
+        existing = existing.decode() if isinstance(existing, bytes) else existing
+        if idempotency_key:
+            client.set(
+                _idempotency_key(idempotency_key),
+                json.dumps({**request, "task_id": existing}),
+                ex=settings.RUN_IDEMPOTENCY_TTL,
+            )
+        return RunClaim(existing, False)
+    except redis.RedisError as e:
+        mark_unavailable(e)
+        return RunClaim(task_id, True)
+
+
+def release_run(
+    application_id, pipeline_id, version, task_id, idempotency_key=None
+) -> None:
+    """
+    Ends the in-flight window of a finished (or never enqueued) task. For a
+    task that was never enqueued, pass the request's Idempotency-Key too, so
+    a retry with it is not answered with that task.
+    """
+    client = get_redis()
+    if client is None or version is None:
+        return
+    try:
+        client.eval(
+            _RELEASE_SCRIPT,
+            1,
+            _inflight_key(application_id, pipeline_id, version),
+            task_id,
+        )
+        if idempotency_key:
+            client.eval(_FORGET_SCRIPT, 1, _idempotency_key(idempotency_key), task_id)
+    except redis.RedisError as e:
+        mark_unavailable(e)
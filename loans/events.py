@@ -0,0 +1,108 @@
+"""
+Run completion notifications over Redis pub/sub, consumed by the run events
+stream so clients do not have to poll for results.
+"""
+
+import asyncio
+import json
+import logging
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+
+from orchestrator.redis_client import get_redis, mark_unavailable
+
+logger = logging.getLogger(__name__)
+
+
+def run_channel(task_id: str) -> str:
+    return f"run-completed:{task_id}"
+
+
+def run_event(run) -> dict:
+    return {
+        "run_id": run.id,
+        "task_id": run.task_id,
+        "application_id": run.application_id,
+        "pipeline_id": run.pipeline_id,
+        "final_status": run.final_status,
+    }
+
+
+def publish_run_completed(run) -> None:
+    """Announces a run once the surrounding transaction has committed."""
+    if not run.task_id:
+        return
+    message = json.dumps(run_event(run))
+
+    def publish():
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.publish(run_channel(run.task_id), message)
+        except redis.RedisError as e:
+            mark_unavailable(e)
+
+    transaction.on_commit(publish)
+
+
+def _frame(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _subscribe(task_id):
+    client = redis.asyncio.Redis.from_url(
+        settings.REDIS_URL, socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT
+    )
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(run_channel(task_id))
+    except (redis.RedisError, OSError) as e:
+        logger.warning(f"Run events for {task_id} fall back to polling: {e}")
+        await pubsub.aclose()
+        await client.aclose()
+        return None, None
+    return client, pubsub
+
+
+async def run_completion_events(task_id: str, find_run):
+    """
+    Server-sent events for one task: a single "completed" event with the run
+    once it is recorded, or "timeout" after RUN_EVENTS_TIMEOUT seconds.
+    Subscribes before looking the run up, so a run finishing in between is
+    not missed. Without Redis, the database is polled instead.
+    find_run is an async callable returning the run's event dict or None.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.RUN_EVENTS_TIMEOUT
+    client, pubsub = await _subscribe(task_id)
+    try:
+        while True:
+            event = await find_run(task_id)
+            if event is not None:
+                yield _frame("completed", event)
+                return
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                yield _frame("timeout", {"task_id": task_id})
+                return
+
+            if pubsub is not None:
+                message = await pubsub.get_message(
+                    timeout=min(remaining, settings.RUN_EVENTS_KEEPALIVE)
+                )
+                if message is not None:
+                    yield _frame("completed", json.loads(message["data"]))
+                    return
+            else:
+                await asyncio.sleep(min(remaining, settings.RUN_EVENTS_POLL_INTERVAL))
+            # Comment line: keeps proxies from closing an idle stream.
+            yield ": keepalive\n\n"
+    finally:
+        if pubsub is not None:
+            await pubsub.aclose()
+            await client.aclose()
@@ -0,0 +1,18 @@
+import django_filters
+
+from .models import STATUS_CHOICES, PipelineRun
+
+
+class PipelineRunFilter(django_filters.FilterSet):
+    """
+    Run history filters. Each one is served by a composite index on
+    PipelineRun that also covers the -start_time ordering.
+    """
+
+    final_status = django_filters.ChoiceFilter(choices=STATUS_CHOICES)
+    # ?start_time_after=...&start_time_before=... (ISO 8601, both inclusive)
+    start_time = django_filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = PipelineRun
+        fields = ["application", "pipeline", "final_status", "start_time"]
@@ -0,0 +1,51 @@
+import logging
+from itertools import islice
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Application
+from .parsers import InvalidRow
+from .serializers import ApplicationSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(rows: Iterable, size: int):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def ingest_applications(rows: Iterable, chunk_size: int) -> Tuple[List[int], list]:
+    """
+    Validates and inserts applications chunk by chunk, one bulk INSERT per
+    chunk. Invalid rows are reported and skipped without affecting the others.
+    Returns (created_ids, errors) where each error is {"index", "errors"}.
+    """
+    validator = ApplicationSerializer()
+    created_ids, errors = [], []
+    index = 0
+
+    for chunk in _chunks(rows, chunk_size):
+        applications = []
+        for row in chunk:
+            try:
+                if isinstance(row, InvalidRow):
+                    raise serializers.ValidationError({"non_field_errors": [row.error]})
+                if not isinstance(row, dict):
+                    raise serializers.ValidationError(
+                        {"non_field_errors": ["Expected an object."]}
+                    )
+                applications.append(Application(**validator.run_validation(row)))
+            except serializers.ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+            index += 1
+
+        with transaction.atomic():
+            created = Application.objects.bulk_create(applications)
+        created_ids.extend(application.pk for application in created)
+
+    logger.info(f"Ingested {len(created_ids)} applications, {len(errors)} rejected")
+    return created_ids, errors
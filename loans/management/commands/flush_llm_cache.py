@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from orchestrator.agents import get_verdict_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Empties the LLM verdict cache: the shared Redis tier, and every "
+        "worker's local tier through the cache generation."
+    )
+
+    def handle(self, *args, **options):
+        deleted = get_verdict_cache().flush()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} cached verdicts."))
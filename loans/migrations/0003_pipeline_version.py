@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0002_alter_steplog_detail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pipeline",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                editable=False,
+                help_text="Bumped on every configuration change; keys the cached execution plan.",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+import loans.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0003_pipeline_version"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="terminalrule",
+            name="condition",
+            field=models.CharField(
+                help_text="The condition is a string expression to be evaluated, (e.g., dti_rule.outcome == 'FAIL')",
+                max_length=255,
+                validators=[loans.models.validate_terminal_condition],
+            ),
+        ),
+    ]
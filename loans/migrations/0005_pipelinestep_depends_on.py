@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0004_terminalrule_condition_validator"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="steplog",
+            options={
+                "ordering": ["execution_time", "id"],
+                "verbose_name_plural": "Step Logs",
+            },
+        ),
+        migrations.AddField(
+            model_name="pipelinestep",
+            name="depends_on",
+            field=models.JSONField(
+                blank=True,
+                default=None,
+                help_text="step_types this step waits for. Declaring it on any step runs the pipeline as a DAG, executing independent steps concurrently.",
+                null=True,
+            ),
+        ),
+    ]
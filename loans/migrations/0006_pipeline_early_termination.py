@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0005_pipelinestep_depends_on"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pipeline",
+            name="early_termination",
+            field=models.BooleanField(
+                default=False,
+                help_text="Skip the remaining steps as soon as the terminal rules are decided.",
+            ),
+        ),
+    ]
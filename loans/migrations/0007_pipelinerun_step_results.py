@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:44
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0006_pipeline_early_termination"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="step_results",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                encoder=django.core.serializers.json.DjangoJSONEncoder,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0007_pipelinerun_step_results"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pipelinerun",
+            index=models.Index(
+                fields=["-start_time", "-id"], name="run_start_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pipelinerun",
+            index=models.Index(
+                fields=["application", "-start_time"], name="run_application_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pipelinerun",
+            index=models.Index(
+                fields=["pipeline", "-start_time"], name="run_pipeline_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pipelinerun",
+            index=models.Index(
+                fields=["final_status", "-start_time"], name="run_status_time_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_pipelines(apps, schema_editor):
+    """Captures the current configuration of every pipeline as its first version."""
+    Pipeline = apps.get_model("loans", "Pipeline")
+    PipelineVersion = apps.get_model("loans", "PipelineVersion")
+    for pipeline in Pipeline.objects.all():
+        snapshot = PipelineVersion.objects.create(
+            pipeline=pipeline,
+            number=pipeline.version,
+            early_termination=pipeline.early_termination,
+        )
+        snapshot.steps.set(pipeline.steps.all())
+        snapshot.terminal_rules.set(pipeline.terminal_rules.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0010_pipelinerun_fingerprint_reused_from"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="pipelinestep",
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name="terminalrule",
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name="pipeline",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1,
+                editable=False,
+                help_text="Number of the current PipelineVersion; bumped on every configuration change.",
+            ),
+        ),
+        migrations.CreateModel(
+            name="PipelineVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveIntegerField()),
+                ("early_termination", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "pipeline",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="versions",
+                        to="loans.pipeline",
+                    ),
+                ),
+                (
+                    "steps",
+                    models.ManyToManyField(
+                        related_name="versions", to="loans.pipelinestep"
+                    ),
+                ),
+                (
+                    "terminal_rules",
+                    models.ManyToManyField(
+                        related_name="versions", to="loans.terminalrule"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Pipeline Versions",
+                "ordering": ["pipeline", "number"],
+                "unique_together": {("pipeline", "number")},
+            },
+        ),
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="pipeline_version",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="runs",
+                to="loans.pipelineversion",
+            ),
+        ),
+        migrations.RunPython(snapshot_pipelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0011_pipeline_versions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="steplog",
+            name="cpu_duration",
+            field=models.FloatField(
+                blank=True,
+                help_text="CPU seconds the step used; empty if skipped.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="steplog",
+            name="wall_duration",
+            field=models.FloatField(
+                blank=True,
+                help_text="Seconds the step took; empty if skipped.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("loans", "0012_steplog_durations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="enqueued_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="execution_duration",
+            field=models.FloatField(
+                blank=True, help_text="Time spent running steps and rules.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="lock_wait",
+            field=models.FloatField(
+                blank=True,
+                help_text="Time spent acquiring the application lock.",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="pipelinerun",
+            name="queue_wait",
+            field=models.FloatField(
+                blank=True, help_text="Time the task waited for a worker.", null=True
+            ),
+        ),
+    ]
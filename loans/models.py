@@ -1,7 +1,13 @@
 from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import ValidationError
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from orchestrator.rules import CompiledCondition, InvalidCondition
+from orchestrator.steps import STEP_PROCESSORS
 
 STATUS_CHOICES = (
     ("APPROVED", "Approved"),
@@ -10,6 +16,14 @@ STATUS_CHOICES = (
 )
 
 
+def validate_terminal_condition(value):
+    """Rejects conditions that would fail to parse or use unsupported syntax."""
+    try:
+        CompiledCondition(value, allowed_names=STEP_PROCESSORS)
+    except InvalidCondition as e:
+        raise ValidationError(f"Invalid condition: {e}")
+
+
 class Application(models.Model):
     applicant_name = models.CharField(max_length=200)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -33,10 +47,63 @@ class Pipeline(models.Model):
     name = models.CharField(max_length=100, unique=True)
     is_active = models.BooleanField(default=True)
     description = models.TextField(blank=True, null=True)
+    early_termination = models.BooleanField(
+        default=False,
+        help_text="Skip the remaining steps as soon as the terminal rules are decided.",
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        help_text="Number of the current PipelineVersion; bumped on every configuration change.",
+    )
 
     def __str__(self):
         return self.name
 
+    def current_version(self) -> "PipelineVersion":
+        """The snapshot new runs use. Reading it never writes."""
+        version = getattr(self, "_current_version", None)
+        if version is None or version.number != self.version:
+            version = self._current_version = self.versions.get(number=self.version)
+        return version
+
+    def add_row(self, row) -> "PipelineVersion":
+        """
+        Adds a step or rule written without the API (ORM, scripts) to the
+        configuration. The current version takes it while no run has used
+        it; otherwise a new version is created so past runs keep theirs.
+        """
+        with transaction.atomic():
+            version = self.versions.select_for_update().get(
+                number=Pipeline.objects.values_list("version", flat=True).get(
+                    pk=self.pk
+                )
+            )
+            if version.runs.exists():
+                previous = version
+                Pipeline.objects.filter(pk=self.pk).update(version=F("version") + 1)
+                self.refresh_from_db(fields=["version"])
+                version = PipelineVersion.objects.create(
+                    pipeline=self,
+                    number=self.version,
+                    early_termination=previous.early_termination,
+                )
+                version.steps.set(previous.steps.all())
+                version.terminal_rules.set(previous.terminal_rules.all())
+            if isinstance(row, PipelineStep):
+                version.steps.add(row)
+            else:
+                version.terminal_rules.add(row)
+        return version
+
+    @property
+    def current_steps(self):
+        return self.current_version().steps.all()
+
+    @property
+    def current_terminal_rules(self):
+        return self.current_version().terminal_rules.all()
+
 
 class PipelineStep(models.Model):
     """An ordered step in a pipeline, linked to an executable processor class."""
@@ -50,12 +117,15 @@ class PipelineStep(models.Model):
     )
     order = models.IntegerField()
     params = models.JSONField(default=dict)
+    depends_on = models.JSONField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text="step_types this step waits for. Declaring it on any step runs "
+        "the pipeline as a DAG, executing independent steps concurrently.",
+    )
 
     class Meta:
-        unique_together = (
-            "pipeline",
-            "order",
-        )
         ordering = ["order"]
         verbose_name_plural = "Pipeline Steps"
 
@@ -74,14 +144,11 @@ class TerminalRule(models.Model):
     condition = models.CharField(
         max_length=255,
         help_text="The condition is a string expression to be evaluated, (e.g., dti_rule.outcome == 'FAIL')",
+        validators=[validate_terminal_condition],
     )
     final_status = models.CharField(max_length=20, choices=STATUS_CHOICES)
 
     class Meta:
-        unique_together = (
-            "pipeline",
-            "order",
-        )
         ordering = ["order"]
         verbose_name_plural = "Terminal Rules"
 
@@ -89,6 +156,31 @@ class TerminalRule(models.Model):
         return f"{self.pipeline.name} - Rule {self.order}: {self.condition} → {self.final_status}"
 
 
+class PipelineVersion(models.Model):
+    """
+    Immutable snapshot of a pipeline's configuration. Steps and rules are
+    never modified once written; a new version links the unchanged ones and
+    adds rows only for what changed.
+    """
+
+    pipeline = models.ForeignKey(
+        Pipeline, on_delete=models.CASCADE, related_name="versions"
+    )
+    number = models.PositiveIntegerField()
+    early_termination = models.BooleanField(default=False)
+    steps = models.ManyToManyField(PipelineStep, related_name="versions")
+    terminal_rules = models.ManyToManyField(TerminalRule, related_name="versions")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("pipeline", "number")
+        ordering = ["pipeline", "number"]
+        verbose_name_plural = "Pipeline Versions"
+
+    def __str__(self):
+        return f"{self.pipeline.name} v{self.number}"
+
+
 class PipelineRun(models.Model):
     """Records one execution of a Pipeline on an Application."""
 
@@ -96,18 +188,89 @@ class PipelineRun(models.Model):
         Application, on_delete=models.CASCADE, related_name="pipeline_runs"
     )
     pipeline = models.ForeignKey(Pipeline, on_delete=models.SET_NULL, null=True)
+    # The exact configuration the run executed.
+    pipeline_version = models.ForeignKey(
+        PipelineVersion,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="runs",
+    )
     start_time = models.DateTimeField(default=timezone.now)
     end_time = models.DateTimeField(null=True, blank=True)
+    # When the run was requested, and where its time went (seconds).
+    enqueued_at = models.DateTimeField(null=True, blank=True)
+    queue_wait = models.FloatField(
+        null=True, blank=True, help_text="Time the task waited for a worker."
+    )
+    lock_wait = models.FloatField(
+        null=True, blank=True, help_text="Time spent acquiring the application lock."
+    )
+    execution_duration = models.FloatField(
+        null=True, blank=True, help_text="Time spent running steps and rules."
+    )
 
     final_status = models.CharField(
         max_length=20, choices=STATUS_CHOICES, null=True, blank=True
     )
+    # Celery task that produced the run, for /api/runs/by_task_id/<task_id>/.
+    task_id = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    # Hash of the decision inputs and pipeline version the run was computed on.
+    fingerprint = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # Set on runs that reused an earlier result instead of executing the steps.
+    reused_from = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reuses",
+    )
+    # Set when a step fell back from its configured mode (e.g. LLM to keyword
+    # sentiment); such results are never reused.
+    degraded = models.BooleanField(default=False)
+    # Compact storage: every step's log in one column instead of StepLog rows.
+    step_results = models.JSONField(
+        null=True, blank=True, editable=False, encoder=DjangoJSONEncoder
+    )
 
     def __str__(self):
         return f"Run {self.id} for App {self.application_id}"
 
+    def get_step_logs(self):
+        """
+        The run's step logs in execution order, whichever way they were stored.
+        Compactly stored logs come back as unsaved StepLog instances.
+        """
+        if self.step_results is None:
+            return list(self.step_logs.all())
+        return [
+            StepLog(
+                pipeline_run=self,
+                step_type=entry["step_type"],
+                outcome=entry["outcome"],
+                detail=entry["detail"],
+                execution_time=parse_datetime(entry["execution_time"]),
+                wall_duration=entry.get("wall_duration"),
+                cpu_duration=entry.get("cpu_duration"),
+            )
+            for entry in self.step_results
+        ]
+
     class Meta:
         verbose_name_plural = "Pipeline Runs"
+        # Match the run history filters, each followed by its -start_time ordering.
+        indexes = [
+            models.Index(fields=["-start_time", "-id"], name="run_start_time_idx"),
+            models.Index(
+                fields=["application", "-start_time"], name="run_application_time_idx"
+            ),
+            models.Index(
+                fields=["pipeline", "-start_time"], name="run_pipeline_time_idx"
+            ),
+            models.Index(
+                fields=["final_status", "-start_time"], name="run_status_time_idx"
+            ),
+        ]
 
 
 class StepLog(models.Model):
@@ -120,10 +283,16 @@ class StepLog(models.Model):
     outcome = models.CharField(max_length=50)
     detail = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
     execution_time = models.DateTimeField(default=timezone.now)
+    wall_duration = models.FloatField(
+        null=True, blank=True, help_text="Seconds the step took; empty if skipped."
+    )
+    cpu_duration = models.FloatField(
+        null=True, blank=True, help_text="CPU seconds the step used; empty if skipped."
+    )
 
     def __str__(self):
         return f"{self.step_type}: {self.outcome}"
 
     class Meta:
-        ordering = ["execution_time"]
+        ordering = ["execution_time", "id"]
         verbose_name_plural = "Step Logs"
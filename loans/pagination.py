@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RunHistoryPagination(CursorPagination):
+    """Newest runs first; cursors stay stable while new runs are recorded."""
+
+    ordering = ("-start_time", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
@@ -0,0 +1,52 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+
+class InvalidRow:
+    """Stands in for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+class JSONArrayParser(JSONParser):
+    """JSON whose top level must be an array of rows."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = super().parse(stream, media_type, parser_context)
+        if not isinstance(data, list):
+            raise ParseError("Expected a JSON array or NDJSON body.")
+        return data
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one object per line. Returns a generator so rows
+    are decoded as the body is read instead of all at once. Blank lines are
+    skipped; undecodable lines are yielded as InvalidRow.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self._rows(stream, encoding)
+
+    @staticmethod
+    def _rows(stream, encoding):
+        if stream is None:
+            return
+        decoder = codecs.getincrementaldecoder(encoding)()
+        for line in stream:
+            text = decoder.decode(line).strip()
+            if not text:
+                continue
+            try:
+                yield json.loads(text)
+            except ValueError as e:
+                yield InvalidRow(f"Invalid JSON: {e}")
@@ -0,0 +1,57 @@
+from typing import Optional
+
+from django.conf import settings
+
+from loans.models import Pipeline
+from orchestrator.cache import LRUCache
+from orchestrator.plan import ExecutionPlan, compile_plan
+
+# Keyed by (pipeline_id, version number). Versions are immutable, so entries
+# never go stale and are only evicted for space.
+_plans = LRUCache(maxsize=settings.EXECUTION_PLAN_CACHE_SIZE, ttl=float("inf"))
+
+
+def load_execution_plan(
+    pipeline_id: int, version: Optional[int] = None
+) -> ExecutionPlan:
+    """
+    Reads one pipeline version (the current one by default) and compiles it,
+    bypassing the cache.
+    """
+    pipeline = Pipeline.objects.get(pk=pipeline_id)
+    if version is None or version == pipeline.version:
+        snapshot = pipeline.current_version()
+    else:
+        snapshot = pipeline.versions.get(number=version)
+
+    return compile_plan(
+        pipeline.id,
+        snapshot.number,
+        snapshot.steps.all(),
+        snapshot.terminal_rules.all(),
+        early_termination=snapshot.early_termination,
+        version_id=snapshot.id,
+    )
+
+
+def get_execution_plan(
+    pipeline_id: int, version: Optional[int] = None
+) -> ExecutionPlan:
+    """
+    Returns the compiled plan for a pipeline version from this process's
+    cache. When the caller already knows the version (e.g. it was passed in
+    the task message) a cached plan is served without touching the database,
+    and that exact version runs even if the pipeline was edited since.
+    """
+    if version is None:
+        version = Pipeline.objects.values_list("version", flat=True).get(pk=pipeline_id)
+
+    plan = _plans.get((pipeline_id, version))
+    if plan is None:
+        plan = load_execution_plan(pipeline_id, version)
+        _plans.set((pipeline_id, plan.version), plan)
+    return plan
+
+
+def clear_execution_plans() -> None:
+    _plans.clear()
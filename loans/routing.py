@@ -0,0 +1,46 @@
+"""
+Celery routing for pipeline runs. Runs of pipelines with an LLM-backed step
+go to PIPELINE_LLM_QUEUE and all others to PIPELINE_QUEUE, so a backlog of
+slow LLM calls never delays rule-only runs; each queue has its own workers.
+Within a queue, the message priority picks the lane.
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+
+from loans.plans import get_execution_plan
+from orchestrator.plan import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+# Request lane -> Redis message priority (0 is served first).
+PRIORITY_LANES = {"high": 0, "normal": 3, "low": 6}
+
+
+def pipeline_queue(plan: ExecutionPlan) -> str:
+    return settings.PIPELINE_LLM_QUEUE if plan.uses_llm else settings.PIPELINE_QUEUE
+
+
+def _pipeline_args(name: str, args) -> Optional[tuple]:
+    """(pipeline_id, version) from the task's positional args, if it runs one."""
+    if name == "loans.tasks.run_pipeline_task" and len(args) >= 2:
+        return args[1], args[2] if len(args) >= 3 else None
+    if name == "loans.tasks.run_pipeline_batch_task" and args:
+        return args[0], None
+    return None
+
+
+def route_pipeline_task(name, args, kwargs, options, task=None, **kw):
+    """CELERY_TASK_ROUTES entry; other tasks keep the default queue."""
+    pipeline = _pipeline_args(name, args or ())
+    if pipeline is None:
+        return None
+    try:
+        plan = get_execution_plan(*pipeline)
+    except Exception as e:
+        # The task reports the missing pipeline itself; any queue will do.
+        logger.warning(f"Routing {name} without a plan for pipeline {pipeline[0]}: {e}")
+        return {"queue": settings.PIPELINE_QUEUE}
+    return {"queue": pipeline_queue(plan)}
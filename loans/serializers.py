@@ -1,13 +1,22 @@
+import json
+
+from django.db import transaction
+from django.db.models import F
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from orchestrator.plan import InvalidPlan, resolve_dependencies
+
 from .models import (
     Application,
     Pipeline,
     PipelineRun,
     PipelineStep,
+    PipelineVersion,
     StepLog,
     TerminalRule,
 )
+from .routing import PRIORITY_LANES
 
 
 class PipelineStepSerializer(serializers.ModelSerializer):
@@ -15,9 +24,16 @@ class PipelineStepSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PipelineStep
-        fields = ["id", "step_type", "order", "params"]
+        fields = ["id", "step_type", "order", "params", "depends_on"]
         extra_kwargs = {"id": {"read_only": False, "required": False}}
 
+    def validate_depends_on(self, value):
+        if value is not None and not (
+            isinstance(value, list) and all(isinstance(v, str) for v in value)
+        ):
+            raise serializers.ValidationError("Must be a list of step types or null.")
+        return value
+
 
 class TerminalRuleSerializer(serializers.ModelSerializer):
     """Serializer for terminal rules."""
@@ -28,49 +44,163 @@ class TerminalRuleSerializer(serializers.ModelSerializer):
         extra_kwargs = {"id": {"read_only": False, "required": False}}
 
 
+def _step_key(step) -> tuple:
+    return (
+        step["step_type"],
+        step["order"],
+        json.dumps(step.get("params") or {}, sort_keys=True),
+        json.dumps(step.get("depends_on"), sort_keys=True),
+    )
+
+
+def _rule_key(rule) -> tuple:
+    return (rule["order"], rule["condition"], rule["final_status"])
+
+
+def _row(instance, fields) -> dict:
+    return {field: getattr(instance, field) for field in fields}
+
+
+STEP_FIELDS = ("step_type", "order", "params", "depends_on")
+RULE_FIELDS = ("order", "condition", "final_status")
+
+
 class PipelineSerializer(serializers.ModelSerializer):
     """
     Serializer for the Pipeline model, allowing nested creation/updates
     of steps and terminal rules. This is the API for the 'Pipeline Builder'.
+    Steps and rules are those of the current PipelineVersion; a change to
+    them (or to early_termination) creates a new version.
     """
 
-    steps = PipelineStepSerializer(many=True)
-    terminal_rules = TerminalRuleSerializer(many=True)
+    steps = PipelineStepSerializer(many=True, source="current_steps")
+    terminal_rules = TerminalRuleSerializer(many=True, source="current_terminal_rules")
 
     class Meta:
         model = Pipeline
-        fields = ["id", "name", "is_active", "description", "steps", "terminal_rules"]
+        fields = [
+            "id",
+            "name",
+            "is_active",
+            "description",
+            "early_termination",
+            "version",
+            "steps",
+            "terminal_rules",
+        ]
+        read_only_fields = ["version"]
 
-    def create(self, validated_data):
-        steps_data = validated_data.pop("steps")
-        rules_data = validated_data.pop("terminal_rules")
-        pipeline = Pipeline.objects.create(**validated_data)
+    def validate_steps(self, steps):
+        steps = sorted(steps, key=lambda s: s["order"])
+        if len({s["order"] for s in steps}) != len(steps):
+            raise serializers.ValidationError("Step orders must be unique.")
+        try:
+            resolve_dependencies(
+                [s["step_type"] for s in steps],
+                [s.get("depends_on") for s in steps],
+            )
+        except InvalidPlan as e:
+            raise serializers.ValidationError(str(e))
+        return steps
 
-        for step_data in steps_data:
-            PipelineStep.objects.create(pipeline=pipeline, **step_data)
-        for rule_data in rules_data:
-            TerminalRule.objects.create(pipeline=pipeline, **rule_data)
+    def validate_terminal_rules(self, rules):
+        if len({r["order"] for r in rules}) != len(rules):
+            raise serializers.ValidationError("Rule orders must be unique.")
+        return rules
 
+    def create(self, validated_data):
+        steps_data = validated_data.pop("current_steps")
+        rules_data = validated_data.pop("current_terminal_rules")
+        with transaction.atomic():
+            pipeline = Pipeline.objects.create(**validated_data)
+            self._create_version(pipeline, steps_data, rules_data)
         return pipeline
 
     def update(self, instance, validated_data):
-        steps_data = validated_data.pop("steps", [])
-        rules_data = validated_data.pop("terminal_rules", [])
+        steps_data = validated_data.pop("current_steps", None)
+        rules_data = validated_data.pop("current_terminal_rules", None)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        with transaction.atomic():
+            previous = instance.current_version()
+            if steps_data is None:
+                steps_data = [_row(s, STEP_FIELDS) for s in previous.steps.all()]
+            if rules_data is None:
+                rules_data = [
+                    _row(r, RULE_FIELDS) for r in previous.terminal_rules.all()
+                ]
 
-        instance.steps.all().delete()
-        for step_data in steps_data:
-            PipelineStep.objects.create(pipeline=instance, **step_data)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
 
-        instance.terminal_rules.all().delete()
-        for rule_data in rules_data:
-            TerminalRule.objects.create(pipeline=instance, **rule_data)
+            changed = (
+                instance.early_termination != previous.early_termination
+                or sorted(map(_step_key, steps_data))
+                != sorted(_step_key(_row(s, STEP_FIELDS)) for s in previous.steps.all())
+                or sorted(map(_rule_key, rules_data))
+                != sorted(
+                    _rule_key(_row(r, RULE_FIELDS))
+                    for r in previous.terminal_rules.all()
+                )
+            )
+            if not changed:
+                instance.save()
+                return instance
 
+            instance.version = F("version") + 1
+            instance.save()
+            instance.refresh_from_db(fields=["version"])
+            self._create_version(instance, steps_data, rules_data, previous)
         return instance
 
+    @staticmethod
+    def _create_version(pipeline, steps_data, rules_data, previous=None):
+        """
+        Snapshots pipeline.version: rows identical to ones in the previous
+        version are linked again, only new ones are inserted (in bulk).
+        """
+        steps = PipelineSerializer._reuse_or_build(
+            PipelineStep,
+            pipeline,
+            steps_data,
+            previous.steps.all() if previous else (),
+            STEP_FIELDS,
+            _step_key,
+        )
+        rules = PipelineSerializer._reuse_or_build(
+            TerminalRule,
+            pipeline,
+            rules_data,
+            previous.terminal_rules.all() if previous else (),
+            RULE_FIELDS,
+            _rule_key,
+        )
+
+        # A new pipeline already has its (empty) first version from the
+        # post_save signal.
+        version, _ = PipelineVersion.objects.get_or_create(
+            pipeline=pipeline,
+            number=pipeline.version,
+            defaults={"early_termination": pipeline.early_termination},
+        )
+        version.steps.set(steps)
+        version.terminal_rules.set(rules)
+        return version
+
+    @staticmethod
+    def _reuse_or_build(model, pipeline, items, existing, fields, key):
+        existing = {key(_row(row, fields)): row for row in existing}
+        rows, new_rows = [], []
+        for item in items:
+            row = existing.get(key(item))
+            if row is None:
+                row = model(
+                    pipeline=pipeline, **{f: item[f] for f in fields if f in item}
+                )
+                new_rows.append(row)
+            rows.append(row)
+        model.objects.bulk_create(new_rows)
+        return rows
+
 
 class ApplicationSerializer(serializers.ModelSerializer):
     """Serializer for creating and viewing loan applications."""
@@ -97,13 +227,18 @@ class StepLogSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StepLog
-        fields = ["step_type", "outcome", "detail", "execution_time"]
-
+        fields = [
+            "step_type",
+            "outcome",
+            "detail",
+            "execution_time",
+            "wall_duration",
+            "cpu_duration",
+        ]
 
-class PipelineRunSerializer(serializers.ModelSerializer):
-    """Serializer for fetching the run history, including step logs."""
 
-    step_logs = StepLogSerializer(many=True, read_only=True)
+class PipelineRunListSerializer(serializers.ModelSerializer):
+    """Lean run history entry, without step logs."""
 
     class Meta:
         model = PipelineRun
@@ -111,12 +246,41 @@ class PipelineRunSerializer(serializers.ModelSerializer):
             "id",
             "application",
             "pipeline",
+            "pipeline_version",
             "start_time",
             "end_time",
             "final_status",
-            "step_logs",
+            "reused_from",
+            "enqueued_at",
+            "queue_wait",
+            "lock_wait",
+            "execution_duration",
+        ]
+        read_only_fields = [
+            "pipeline_version",
+            "final_status",
+            "start_time",
+            "end_time",
+            "reused_from",
+            "enqueued_at",
+            "queue_wait",
+            "lock_wait",
+            "execution_duration",
         ]
-        read_only_fields = ["final_status", "start_time", "end_time"]
+
+
+class PipelineRunSerializer(PipelineRunListSerializer):
+    """Serializer for fetching the run history, including step logs."""
+
+    step_logs = serializers.SerializerMethodField()
+
+    class Meta(PipelineRunListSerializer.Meta):
+        fields = PipelineRunListSerializer.Meta.fields + ["step_logs"]
+
+    @extend_schema_field(StepLogSerializer(many=True))
+    def get_step_logs(self, obj):
+        # Same shape whether the logs are StepLog rows or compact step_results.
+        return StepLogSerializer(obj.get_step_logs(), many=True).data
 
 
 class RunPipelineRequestSerializer(serializers.Serializer):
@@ -126,3 +290,87 @@ class RunPipelineRequestSerializer(serializers.Serializer):
     pipeline_id = serializers.IntegerField(
         help_text="The ID of the pipeline configuration to execute."
     )
+    force = serializers.BooleanField(
+        default=False,
+        help_text="Recompute even if an earlier run used the same inputs and pipeline version.",
+    )
+    priority = serializers.ChoiceField(
+        choices=list(PRIORITY_LANES),
+        default="normal",
+        help_text="Queue lane: high runs are picked before normal and low ones.",
+    )
+
+
+class RunPipelineBatchRequestSerializer(serializers.Serializer):
+    pipeline_id = serializers.IntegerField(
+        help_text="The ID of the pipeline configuration to execute."
+    )
+    application_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        help_text="IDs of the applications to process. Omit to process all of them.",
+    )
+    chunk_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=10_000,
+        help_text="How many applications are loaded and written per chunk.",
+    )
+    vectorized = serializers.BooleanField(
+        default=False,
+        help_text="Evaluate dti_rule, amount_policy and risk_scoring column-wise with NumPy.",
+    )
+    priority = serializers.ChoiceField(
+        choices=list(PRIORITY_LANES),
+        default="low",
+        help_text="Queue lane; batches default to low so single runs go first.",
+    )
+
+
+class BulkApplicationQuerySerializer(serializers.Serializer):
+    pipeline_id = serializers.IntegerField(
+        required=False,
+        help_text="Run this pipeline over the inserted applications as a batch.",
+    )
+    chunk_size = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=10_000,
+        help_text="How many rows are validated and inserted per chunk.",
+    )
+    vectorized = serializers.BooleanField(
+        default=False,
+        help_text="Passed to the batch run when pipeline_id is given.",
+    )
+    priority = serializers.ChoiceField(
+        choices=list(PRIORITY_LANES),
+        default="low",
+        help_text="Queue lane of the batch run when pipeline_id is given.",
+    )
+
+
+class RunTimingsQuerySerializer(serializers.Serializer):
+    window = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text=(
+            "Only runs started in the last `window` seconds "
+            "(default RUN_TIMINGS_WINDOW) unless start_time_after is given."
+        ),
+    )
+    percentiles = serializers.CharField(
+        required=False,
+        help_text="Comma-separated percentiles to report, e.g. 50,95,99.",
+    )
+
+    def validate_percentiles(self, value):
+        try:
+            percentiles = [float(p) for p in value.split(",") if p.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Percentiles must be numbers.")
+        if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+            raise serializers.ValidationError(
+                "Give one or more percentiles between 0 and 100."
+            )
+        return percentiles
@@ -0,0 +1,27 @@
+"""
+Keeps a PipelineVersion for every pipeline written outside PipelineSerializer
+(ORM, admin, scripts), so reading the current version never has to create one.
+The serializer writes its rows with bulk_create, which sends no signals.
+"""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from loans.models import Pipeline, PipelineStep, PipelineVersion, TerminalRule
+
+
+@receiver(post_save, sender=Pipeline)
+def create_first_version(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PipelineVersion.objects.create(
+            pipeline=instance,
+            number=instance.version,
+            early_termination=instance.early_termination,
+        )
+
+
+@receiver(post_save, sender=PipelineStep)
+@receiver(post_save, sender=TerminalRule)
+def add_row_to_version(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        instance.pipeline.add_row(instance)
@@ -0,0 +1,103 @@
+"""
+Percentiles of where pipeline runs spend their time: waiting in the queue for
+a worker, waiting for the application lock, and executing steps and rules.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+from django.db import connection
+from django.db.models import Aggregate, Count, FloatField
+
+# Reported name -> PipelineRun field.
+TIMING_FIELDS = {
+    "queue_wait": "queue_wait",
+    "lock_wait": "lock_wait",
+    "execution": "execution_duration",
+}
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+class PercentileCont(Aggregate):
+    """PostgreSQL's interpolated percentile; NULLs are ignored."""
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, fraction=round(percentile / 100, 6), **extra)
+
+
+def _key(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+def _alias(name: str, percentile: float) -> str:
+    return f"{name}_{_key(percentile)}".replace(".", "_")
+
+
+def _in_database(queryset, percentiles) -> List[dict]:
+    aggregates = {
+        _alias(name, p): PercentileCont(field, p)
+        for name, field in TIMING_FIELDS.items()
+        for p in percentiles
+    }
+    rows = (
+        queryset.order_by()
+        .values("pipeline")
+        .annotate(runs=Count("id"), **aggregates)
+        .order_by("pipeline")
+    )
+    return [
+        {
+            "pipeline": row["pipeline"],
+            "runs": row["runs"],
+            **{
+                name: {_key(p): row[_alias(name, p)] for p in percentiles}
+                for name in TIMING_FIELDS
+            },
+        }
+        for row in rows
+    ]
+
+
+def _in_python(queryset, percentiles) -> List[dict]:
+    # Same linear interpolation as PERCENTILE_CONT, for databases without it.
+    values: Dict[int, Dict[str, list]] = defaultdict(lambda: defaultdict(list))
+    runs: Dict[int, int] = defaultdict(int)
+    for pipeline, *timings in queryset.order_by().values_list(
+        "pipeline", *TIMING_FIELDS.values()
+    ):
+        runs[pipeline] += 1
+        for name, value in zip(TIMING_FIELDS, timings):
+            if value is not None:
+                values[pipeline][name].append(value)
+
+    result = []
+    for pipeline in sorted(runs, key=lambda p: (p is None, p)):
+        entry = {"pipeline": pipeline, "runs": runs[pipeline]}
+        for name in TIMING_FIELDS:
+            series = values[pipeline][name]
+            computed = np.percentile(series, percentiles) if series else None
+            entry[name] = {
+                _key(p): None if computed is None else float(computed[i])
+                for i, p in enumerate(percentiles)
+            }
+        result.append(entry)
+    return result
+
+
+def timing_percentiles(
+    queryset, percentiles: Sequence[float] = DEFAULT_PERCENTILES
+) -> List[dict]:
+    """
+    Per pipeline in the queryset of PipelineRun: the number of runs and the
+    requested percentiles (in seconds) of each timing, e.g.
+    {"pipeline": 1, "runs": 20, "queue_wait": {"p50": 0.01, "p99": 1.2}, ...}.
+    A percentile is None when no run in the group recorded that timing.
+    """
+    if connection.vendor == "postgresql":
+        return _in_database(queryset, percentiles)
+    return _in_python(queryset, percentiles)
@@ -4,9 +4,13 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     ApplicationViewSet,
+    MetricsView,
     PipelineConfigurationViewSet,
     PipelineRunHistoryViewSet,
+    RunEventsView,
     RunPipelineAPIView,
+    RunPipelineBatchAPIView,
+    RunPipelineBatchStatusAPIView,
 )
 
 router = DefaultRouter()
@@ -16,10 +20,24 @@ router.register(r"runs", PipelineRunHistoryViewSet, basename="pipelinerun")
 
 
 urlpatterns = [
+    # Push notification of a run's completion (server-sent events)
+    path(
+        "runs/by_task_id/<str:task_id>/events/",
+        RunEventsView.as_view(),
+        name="run-events",
+    ),
     # CRUD Applications, Pipelines and Runs
     path("", include(router.urls)),
     # Custom endpoint for running the pipeline
     path("run/", RunPipelineAPIView.as_view(), name="run-pipeline"),
+    path("run/batch/", RunPipelineBatchAPIView.as_view(), name="run-pipeline-batch"),
+    path(
+        "run/batch/<str:task_id>/",
+        RunPipelineBatchStatusAPIView.as_view(),
+        name="run-pipeline-batch-status",
+    ),
+    # Prometheus scrape target
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     # DOCS
     path("schema/", SpectacularAPIView.as_view(api_version="v1"), name="schema"),
     path(
@@ -1,17 +1,43 @@
+from datetime import timedelta
+
+from celery.result import AsyncResult
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from loans.tasks import run_pipeline_task
+from loans.tasks import (
+    DEFAULT_BATCH_CHUNK_SIZE,
+    run_pipeline_batch_task,
+    run_pipeline_task,
+)
+from orchestrator.metrics import read_metrics, render
 
+from .dedup import IdempotencyKeyReused, claim_run, release_run
+from .events import run_completion_events, run_event
+from .filters import PipelineRunFilter
+from .ingestion import ingest_applications
 from .models import Application, Pipeline, PipelineRun
+from .pagination import RunHistoryPagination
+from .parsers import JSONArrayParser, NDJSONParser
+from .routing import PRIORITY_LANES
 from .serializers import (
     ApplicationSerializer,
+    BulkApplicationQuerySerializer,
+    PipelineRunListSerializer,
     PipelineRunSerializer,
     PipelineSerializer,
+    RunPipelineBatchRequestSerializer,
     RunPipelineRequestSerializer,
+    RunTimingsQuerySerializer,
 )
+from .timings import DEFAULT_PERCENTILES, timing_percentiles
 
 
 class ApplicationViewSet(viewsets.ModelViewSet):
@@ -20,6 +46,64 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     queryset = Application.objects.all().order_by("-created_at")
     serializer_class = ApplicationSerializer
 
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[JSONArrayParser, NDJSONParser],
+    )
+    def bulk(self, request, *args, **kwargs):
+        """
+        Inserts many applications from a JSON array or NDJSON body. Invalid
+        rows are reported by index and skipped. With ?pipeline_id=, the
+        inserted applications are queued for a batch run.
+        """
+        options = BulkApplicationQuerySerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        pipeline_id = options.validated_data.get("pipeline_id")
+        chunk_size = options.validated_data.get(
+            "chunk_size", settings.BULK_INGEST_CHUNK_SIZE
+        )
+
+        if (
+            pipeline_id is not None
+            and not Pipeline.objects.filter(pk=pipeline_id).exists()
+        ):
+            return Response(
+                {"detail": "Pipeline not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        rows = request.data
+        if isinstance(rows, dict):
+            return Response(
+                {"detail": "Expected a JSON array or NDJSON body."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created_ids, errors = ingest_applications(rows, chunk_size)
+        body = {"created": len(created_ids), "ids": created_ids, "errors": errors}
+
+        if pipeline_id is not None and created_ids:
+            task = run_pipeline_batch_task.apply_async(
+                args=[
+                    pipeline_id,
+                    created_ids,
+                    options.validated_data.get("chunk_size", DEFAULT_BATCH_CHUNK_SIZE),
+                    options.validated_data["vectorized"],
+                ],
+                kwargs={"enqueued_at": timezone.now().isoformat()},
+                priority=PRIORITY_LANES[options.validated_data["priority"]],
+            )
+            body.update(task_id=task.id, poll_status_url=f"/api/run/batch/{task.id}/")
+
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created_ids:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(body, status=response_status)
+
 
 class PipelineConfigurationViewSet(viewsets.ModelViewSet):
     """API for defining and managing pipelines (steps/rules) (Requirement 2)."""
@@ -33,9 +117,68 @@ class PipelineRunHistoryViewSet(
 ):
     """API for fetching pipeline run history (Requirement 4)."""
 
-    queryset = PipelineRun.objects.all().order_by("-start_time")
+    queryset = PipelineRun.objects.prefetch_related("step_logs").order_by(
+        "-start_time", "-id"
+    )
     serializer_class = PipelineRunSerializer
-    filter_fields = ("application",)
+    pagination_class = RunHistoryPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = PipelineRunFilter
+
+    def _include_step_logs(self):
+        return self.request.query_params.get("step_logs", "true").lower() not in (
+            "0",
+            "false",
+        )
+
+    def get_queryset(self):
+        if self.action == "list" and not self._include_step_logs():
+            return PipelineRun.objects.order_by("-start_time", "-id")
+        return super().get_queryset()
+
+    @action(detail=False, url_path=r"by_task_id/(?P<task_id>[^/]+)")
+    def by_task_id(self, request, task_id=None):
+        """The run recorded by a run_pipeline_task; 404 until it has finished."""
+        run = self.get_queryset().filter(task_id=task_id).first()
+        if run is None:
+            return Response(
+                {"detail": "No run recorded for this task yet.", "task_id": task_id},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response(self.get_serializer(run).data)
+
+    @action(detail=False, pagination_class=None)
+    def timings(self, request):
+        """
+        Percentiles of queue wait, lock wait and execution time per pipeline,
+        over the runs matching the history filters that started within the
+        window.
+        """
+        options = RunTimingsQuerySerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        percentiles = options.validated_data.get("percentiles", DEFAULT_PERCENTILES)
+
+        queryset = self.filter_queryset(PipelineRun.objects.all())
+        start_time_after = request.query_params.get("start_time_after")
+        if not start_time_after:
+            window = options.validated_data.get("window", settings.RUN_TIMINGS_WINDOW)
+            start_time_after = timezone.now() - timedelta(seconds=window)
+            queryset = queryset.filter(start_time__gte=start_time_after)
+
+        return Response(
+            {
+                "start_time_after": start_time_after,
+                "start_time_before": request.query_params.get("start_time_before"),
+                "percentiles": percentiles,
+                "pipelines": timing_percentiles(queryset, percentiles),
+            }
+        )
+
+    def get_serializer_class(self):
+        # ?step_logs=false lists runs without their step logs.
+        if self.action == "list" and not self._include_step_logs():
+            return PipelineRunListSerializer
+        return super().get_serializer_class()
 
 
 class RunPipelineAPIView(APIView):
@@ -58,22 +201,165 @@ class RunPipelineAPIView(APIView):
 
         try:
             get_object_or_404(Application, pk=application_id)
-            get_object_or_404(Pipeline, pk=pipeline_id)
+            pipeline = get_object_or_404(Pipeline, pk=pipeline_id)
         except:
             return Response(
                 {"detail": "Application or Pipeline not found."},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        task = run_pipeline_task.delay(application_id, pipeline_id)
+        idempotency_key = request.headers.get("Idempotency-Key")
+        try:
+            claim = claim_run(
+                application_id, pipeline_id, pipeline.version, idempotency_key
+            )
+        except IdempotencyKeyReused:
+            return Response(
+                {"detail": "Idempotency-Key was already used for another request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        task_id = claim.task_id
+        if claim.is_new:
+            try:
+                run_pipeline_task.apply_async(
+                    args=[application_id, pipeline_id, pipeline.version],
+                    kwargs={
+                        "force": serializer.validated_data["force"],
+                        # Lets the run tell its queue wait from its execution.
+                        "enqueued_at": timezone.now().isoformat(),
+                    },
+                    task_id=task_id,
+                    priority=PRIORITY_LANES[serializer.validated_data["priority"]],
+                )
+            except Exception:
+                release_run(
+                    application_id,
+                    pipeline_id,
+                    pipeline.version,
+                    task_id,
+                    idempotency_key,
+                )
+                raise
 
         return Response(
             {
-                "message": "Pipeline execution successfully initiated.",
+                "message": (
+                    "Pipeline execution successfully initiated."
+                    if claim.is_new
+                    else "Pipeline execution already requested."
+                ),
                 "application_id": application_id,
                 "pipeline_id": pipeline_id,
+                "task_id": task_id,
+                "deduplicated": not claim.is_new,
+                "poll_status_url": f"/api/runs/by_task_id/{task_id}/",
+                "events_url": f"/api/runs/by_task_id/{task_id}/events/",
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class RunPipelineBatchAPIView(APIView):
+    """API to trigger one pipeline over many applications in a single task."""
+
+    serializer_class = RunPipelineBatchRequestSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        pipeline_id = serializer.validated_data["pipeline_id"]
+        application_ids = serializer.validated_data.get("application_ids")
+        chunk_size = serializer.validated_data.get(
+            "chunk_size", DEFAULT_BATCH_CHUNK_SIZE
+        )
+
+        if not Pipeline.objects.filter(pk=pipeline_id).exists():
+            return Response(
+                {"detail": "Pipeline not found."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        task = run_pipeline_batch_task.apply_async(
+            args=[
+                pipeline_id,
+                application_ids,
+                chunk_size,
+                serializer.validated_data["vectorized"],
+            ],
+            kwargs={"enqueued_at": timezone.now().isoformat()},
+            priority=PRIORITY_LANES[serializer.validated_data["priority"]],
+        )
+
+        return Response(
+            {
+                "message": "Batch pipeline execution successfully initiated.",
+                "pipeline_id": pipeline_id,
+                "application_count": (
+                    len(application_ids)
+                    if application_ids is not None
+                    else Application.objects.count()
+                ),
                 "task_id": task.id,
-                "poll_status_url": f"/api/runs/by_task_id/{task.id}",
+                "poll_status_url": f"/api/run/batch/{task.id}/",
             },
             status=status.HTTP_202_ACCEPTED,
         )
+
+
+class RunPipelineBatchStatusAPIView(APIView):
+    """API to poll the progress of a batch run."""
+
+    def get(self, request, task_id, *args, **kwargs):
+        result = AsyncResult(task_id)
+        info = result.info if isinstance(result.info, dict) else {}
+        if result.failed():
+            info = {"detail": str(result.info)}
+
+        return Response({"task_id": task_id, "state": result.state, **info})
+
+
+class RunEventsView(View):
+    """
+    Server-sent events stream that pushes a run's completion to the client
+    (see loans.events). Serve config.asgi:application with an ASGI server so
+    waiting clients do not hold a worker thread each.
+    """
+
+    async def get(self, request, task_id, *args, **kwargs):
+        response = StreamingHttpResponse(
+            run_completion_events(task_id, self.find_run),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    async def find_run(task_id):
+        run = (
+            await PipelineRun.objects.filter(task_id=task_id)
+            .order_by("-start_time")
+            .afirst()
+        )
+        return run_event(run) if run is not None else None
+
+
+class MetricsView(View):
+    """
+    Step, run, rule evaluation, DB write and LLM metrics recorded by all
+    workers, in the Prometheus text format (see orchestrator.metrics).
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get(self, request, *args, **kwargs):
+        samples = read_metrics()
+        if samples is None:
+            return HttpResponse(
+                "Metrics store unavailable\n",
+                status=503,
+                content_type=self.content_type,
+            )
+        return HttpResponse(render(samples), content_type=self.content_type)
@@ -1,23 +1,323 @@
 # orchestrator/agents.py
+import asyncio
+import hashlib
+import json
 import logging
 import os
-from typing import Iterable
+import random
+import threading
+import weakref
+from typing import Iterable, List, Optional, Sequence
 
+import httpx
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .batching import BatchingClassifier
+from .cache import VerdictCache
+from .metrics import get_metrics
+from .ratelimit import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = (
+    "You are a loan-risk classifier. "
+    "Return only one word: 'RISKY' if the purpose suggests gambling, crypto speculation, "
+    "scam, or other financial risk. Otherwise, return 'SAFE'."
+)
+USER_PROMPT = "Classify this loan purpose as RISKY or SAFE:\n{text}"
+BATCH_SYSTEM_PROMPT = (
+    "You are a loan-risk classifier. You receive numbered loan purposes. "
+    "A purpose is RISKY if it suggests gambling, crypto speculation, scam, or other "
+    "financial risk, otherwise SAFE. Reply with only a JSON object mapping each "
+    'number to "RISKY" or "SAFE", e.g. {"1": "SAFE", "2": "RISKY"}.'
+)
+# Part of every cached verdict's key: editing a prompt invalidates old verdicts.
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + USER_PROMPT + BATCH_SYSTEM_PROMPT).encode()
+).hexdigest()[:12]
+
+_verdict_cache: Optional[VerdictCache] = None
+_verdict_cache_lock = threading.Lock()
+
+_client: Optional["OpenRouterClient"] = None
+_client_lock = threading.Lock()
+
+# httpx pools belong to the event loop they were first used on.
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+_batching_classifier: Optional[BatchingClassifier] = None
+_batching_classifier_lock = threading.Lock()
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
 
 class LLMException(Exception):
     pass
 
 
-def risky_by_keywords(text: str, keywords: Iterable[str]) -> bool:
-    if not text:
-        return False
-    low = text.lower()
-    return any(kw.lower() in low for kw in keywords)
+class OpenRouterClient:
+    """
+    Long-lived OpenRouter client. A pooled keep-alive session avoids a TCP/TLS
+    handshake per classification; 429/5xx responses and connection errors are
+    retried a bounded number of times with jittered exponential backoff
+    (honouring Retry-After), and connect/read timeouts are separate.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        api_key: str,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 20,
+    ):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+            backoff_jitter=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "Authorization": f"Bearer {api_key}",
+                "X-Title": "Loan Orchestrator",
+                "Content-Type": "application/json",
+            }
+        )
+
+    @classmethod
+    def from_settings(cls) -> "OpenRouterClient":
+        return cls(
+            url=settings.OPENROUTER_URL,
+            api_key=settings.OPENROUTER_API_KEY,
+            pool_size=settings.OPENROUTER_POOL_SIZE,
+            max_retries=settings.OPENROUTER_MAX_RETRIES,
+            backoff_factor=settings.OPENROUTER_BACKOFF_FACTOR,
+            backoff_max=settings.OPENROUTER_BACKOFF_MAX,
+            connect_timeout=settings.OPENROUTER_CONNECT_TIMEOUT,
+            read_timeout=settings.OPENROUTER_READ_TIMEOUT,
+        )
+
+    def chat_completion(self, payload: dict) -> dict:
+        try:
+            resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.exceptions.RetryError as e:
+            raise LLMException(f"Gave up after retries: {e}") from e
+
+        data = resp.json()
+        if resp.status_code != 200:
+            raise LLMException(data.get("error"))
+        return data
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncOpenRouterClient:
+    """
+    OpenRouterClient for coroutines, on an httpx connection pool: one event
+    loop keeps up to pool_size requests in flight over keep-alive
+    connections. Retries, backoff and timeouts behave as in OpenRouterClient.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        api_key: str,
+        pool_size: int = 100,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 8,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 20,
+    ):
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "X-Title": "Loan Orchestrator",
+                "Content-Type": "application/json",
+            },
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+
+    @classmethod
+    def from_settings(cls) -> "AsyncOpenRouterClient":
+        return cls(
+            url=settings.OPENROUTER_URL,
+            api_key=settings.OPENROUTER_API_KEY,
+            pool_size=settings.OPENROUTER_ASYNC_POOL_SIZE,
+            max_retries=settings.OPENROUTER_MAX_RETRIES,
+            backoff_factor=settings.OPENROUTER_BACKOFF_FACTOR,
+            backoff_max=settings.OPENROUTER_BACKOFF_MAX,
+            connect_timeout=settings.OPENROUTER_CONNECT_TIMEOUT,
+            read_timeout=settings.OPENROUTER_READ_TIMEOUT,
+        )
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                pass
+        delay = min(self.backoff_factor * 2**attempt, self.backoff_max)
+        return delay + random.uniform(0, self.backoff_factor)
+
+    async def chat_completion(self, payload: dict) -> dict:
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await self.client.post(self.url, json=payload)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise LLMException(f"Gave up after retries: {e}") from e
+            else:
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or attempt == self.max_retries
+                ):
+                    break
+            await asyncio.sleep(self._backoff(attempt, response))
+
+        data = response.json()
+        if response.status_code != 200:
+            raise LLMException(data.get("error"))
+        return data
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def get_async_openrouter_client() -> AsyncOpenRouterClient:
+    """The running event loop's shared async client, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncOpenRouterClient.from_settings()
+    return client
+
+
+def get_openrouter_client() -> OpenRouterClient:
+    """The worker process's shared client, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenRouterClient.from_settings()
+    return _client
+
+
+def _reset_client_after_fork():
+    # Pooled sockets and collector threads do not survive into forked workers.
+    global _client, _batching_classifier
+    _client = None
+    _batching_classifier = None
+    _async_clients.clear()
+
+
+os.register_at_fork(after_in_child=_reset_client_after_fork)
+
+
+def _llm_rate_limiter() -> Optional[RateLimiter]:
+    """The LLM_RATE_LIMIT shared by all workers, or None if it is off."""
+    if settings.LLM_RATE_LIMIT <= 0:
+        return None
+    return RateLimiter(
+        "llm-rate-limit",
+        rate=settings.LLM_RATE_LIMIT / 60,
+        burst=settings.LLM_RATE_LIMIT_BURST,
+    )
+
+
+def _chat_completion(payload: dict, kind: str) -> dict:
+    """
+    Sends one request with the shared client, counting it in the LLM metrics.
+    Raises LLMException when the shared rate limit has no slot in time.
+    """
+    metrics = get_metrics()
+    limiter = _llm_rate_limiter()
+    with metrics.time("loan_llm_rate_limit_wait_seconds", kind=kind):
+        acquired = limiter is None or limiter.acquire(settings.LLM_RATE_LIMIT_MAX_WAIT)
+    if not acquired:
+        metrics.inc("loan_llm_rate_limited_total", kind=kind)
+        raise LLMException("LLM rate limit reached")
+
+    metrics.inc("loan_llm_requests_total", kind=kind)
+    try:
+        with metrics.time("loan_llm_request_duration_seconds", kind=kind):
+            return get_openrouter_client().chat_completion(payload)
+    except Exception:
+        metrics.inc("loan_llm_errors_total", kind=kind)
+        raise
+
+
+async def _achat_completion(payload: dict, kind: str) -> dict:
+    """_chat_completion with the event loop's async client."""
+    metrics = get_metrics()
+    limiter = _llm_rate_limiter()
+    with metrics.time("loan_llm_rate_limit_wait_seconds", kind=kind):
+        acquired = limiter is None or await limiter.aacquire(
+            settings.LLM_RATE_LIMIT_MAX_WAIT
+        )
+    if not acquired:
+        metrics.inc("loan_llm_rate_limited_total", kind=kind)
+        raise LLMException("LLM rate limit reached")
+
+    metrics.inc("loan_llm_requests_total", kind=kind)
+    try:
+        with metrics.time("loan_llm_request_duration_seconds", kind=kind):
+            return await get_async_openrouter_client().chat_completion(payload)
+    except Exception:
+        metrics.inc("loan_llm_errors_total", kind=kind)
+        raise
+
+
+def _single_payload(text: str) -> dict:
+    return {
+        "model": settings.OPENROUTER_MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": USER_PROMPT.format(text=text)},
+        ],
+        "temperature": 0,
+        "max_tokens": settings.OPENROUTER_MAX_TOKENS,
+    }
+
+
+def _single_answer(data: dict) -> bool:
+    answer = (
+        data.get("choices", [{}])[0]
+        .get("message", {})
+        .get("content", "")
+        .strip()
+        .lower()
+    )
+    return "risky" in answer
 
 
 def risky_by_deepseek(text: str, *, threshold: float = 0.5) -> bool:
@@ -30,47 +330,184 @@ def risky_by_deepseek(text: str, *, threshold: float = 0.5) -> bool:
         raise LLMException("Missing Credentials or text for LLM analysis")
 
     try:
-        resp = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {settings.OPENROUTER_API_KEY}",
-                "X-Title": "Loan Orchestrator",
-                "Content-Type": "application/json",
-            },
-            json={
+        return _single_answer(_chat_completion(_single_payload(text), kind="single"))
+    except Exception as e:
+        logger.warning(f"[DeepSeek] classification failed: {e}")
+        raise e
+
+
+async def arisky_by_deepseek(text: str) -> bool:
+    """risky_by_deepseek without blocking: awaits the async client."""
+    if not (settings.OPENROUTER_API_KEY and text):
+        raise LLMException("Missing Credentials or text for LLM analysis")
+
+    try:
+        data = await _achat_completion(_single_payload(text), kind="single")
+        return _single_answer(data)
+    except Exception as e:
+        logger.warning(f"[DeepSeek] classification failed: {e}")
+        raise e
+
+
+def parse_batch_answer(content: str, count: int) -> List[Optional[bool]]:
+    """
+    Reads {"1": "RISKY", "2": "SAFE", ...} out of a batched answer. Items that
+    are missing or unreadable come back as None.
+    """
+    verdicts: List[Optional[bool]] = [None] * count
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        return verdicts
+    try:
+        answers = json.loads(content[start : end + 1])
+    except ValueError:
+        return verdicts
+    if not isinstance(answers, dict):
+        return verdicts
+
+    for i in range(count):
+        answer = str(answers.get(str(i + 1), "")).strip().lower()
+        if "risky" in answer:
+            verdicts[i] = True
+        elif "safe" in answer:
+            verdicts[i] = False
+    return verdicts
+
+
+def risky_by_deepseek_many(texts: Sequence[str]) -> List[Optional[bool]]:
+    """
+    Classifies several purposes with one chat completion. A single text uses
+    the one-item prompt. Returns one verdict per text, None where the answer
+    has no usable verdict.
+    """
+    if not settings.OPENROUTER_API_KEY:
+        raise LLMException("Missing Credentials for LLM analysis")
+    if len(texts) == 1:
+        return [risky_by_deepseek(texts[0])]
+
+    numbered = "\n".join(f"{i}. {' '.join(t.split())}" for i, t in enumerate(texts, 1))
+    try:
+        data = _chat_completion(
+            {
                 "model": settings.OPENROUTER_MODEL,
                 "messages": [
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a loan-risk classifier. "
-                            "Return only one word: 'RISKY' if the purpose suggests gambling, crypto speculation, "
-                            "scam, or other financial risk. Otherwise, return 'SAFE'."
-                        ),
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Classify this loan purpose as RISKY or SAFE:\n{text}",
-                    },
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": numbered},
                 ],
                 "temperature": 0,
-                "max_tokens": 1000,
+                "max_tokens": settings.OPENROUTER_MAX_TOKENS
+                + settings.OPENROUTER_MAX_TOKENS_PER_ITEM * len(texts),
             },
-            timeout=20,
-        )
-        data = resp.json()
-
-        if resp.status_code != 200:
-            raise LLMException(data.get("error"))
-
-        answer = (
-            data.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
-            .lower()
+            kind="batch",
         )
-        return "risky" in answer
     except Exception as e:
-        logger.warning(f"[DeepSeek] classification failed: {e}")
+        logger.warning(f"[DeepSeek] batch classification failed: {e}")
         raise e
+
+    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    verdicts = parse_batch_answer(content, len(texts))
+    missing = verdicts.count(None)
+    if missing:
+        logger.warning(f"[DeepSeek] batch answer missing {missing}/{len(texts)} items")
+    return verdicts
+
+
+def get_batching_classifier() -> BatchingClassifier:
+    global _batching_classifier
+    if _batching_classifier is None:
+        with _batching_classifier_lock:
+            if _batching_classifier is None:
+                _batching_classifier = BatchingClassifier(
+                    risky_by_deepseek_many,
+                    window=settings.LLM_BATCH_WINDOW_MS / 1000,
+                    max_batch=settings.LLM_BATCH_MAX_ITEMS,
+                    concurrency=settings.LLM_BATCH_CONCURRENCY,
+                )
+    return _batching_classifier
+
+
+def classify_risky(text: str) -> bool:
+    """
+    One LLM verdict, micro-batched with concurrent callers when
+    LLM_BATCH_WINDOW_MS is set, otherwise a direct request.
+    """
+    if settings.LLM_BATCH_WINDOW_MS > 0 and settings.OPENROUTER_API_KEY and text:
+        return get_batching_classifier().classify(text)
+    return risky_by_deepseek(text)
+
+
+def prefetch_verdicts(texts: Iterable[str]) -> int:
+    """
+    Warms the verdict cache for many texts (e.g. a batch-run chunk) with as
+    few batched requests as possible. Failures are logged and left to the
+    per-run path. Returns how many verdicts were stored.
+    """
+    cache = get_verdict_cache()
+    if not (cache.enabled and settings.OPENROUTER_API_KEY):
+        return 0
+
+    keys = {}
+    for text in texts:
+        if text:
+            key = cache.key(text, settings.OPENROUTER_MODEL, PROMPT_VERSION)
+            if key not in keys and cache.get(key) is None:
+                keys[key] = text
+
+    stored = 0
+    pending = list(keys.items())
+    size = settings.LLM_BATCH_MAX_ITEMS
+    for i in range(0, len(pending), size):
+        chunk = pending[i : i + size]
+        try:
+            verdicts = risky_by_deepseek_many([text for _, text in chunk])
+        except Exception:
+            continue
+        for (key, _), verdict in zip(chunk, verdicts):
+            if verdict is not None:
+                cache.set(key, verdict)
+                stored += 1
+    return stored
+
+
+def get_verdict_cache() -> VerdictCache:
+    """Process-wide cache of LLM verdicts, configured from settings on first use."""
+    global _verdict_cache
+    if _verdict_cache is None:
+        with _verdict_cache_lock:
+            if _verdict_cache is None:
+                _verdict_cache = VerdictCache(
+                    "llm-verdict",
+                    local_size=settings.LLM_CACHE_LOCAL_SIZE,
+                    local_ttl=settings.LLM_CACHE_LOCAL_TTL,
+                    redis_ttl=settings.LLM_CACHE_REDIS_TTL,
+                    redis_url=settings.LLM_CACHE_REDIS_URL,
+                    enabled=settings.LLM_CACHE_ENABLED,
+                    generation_ttl=settings.LLM_CACHE_GENERATION_TTL,
+                )
+    return _verdict_cache
+
+
+def cached_risky_by_deepseek(text: str, *, bypass_cache: bool = False) -> bool:
+    """classify_risky behind the verdict cache; failures are never cached."""
+    return get_verdict_cache().get_or_compute(
+        text,
+        lambda: classify_risky(text),
+        model=settings.OPENROUTER_MODEL,
+        prompt_version=PROMPT_VERSION,
+        bypass=bypass_cache,
+    )
+
+
+async def acached_risky_by_deepseek(text: str, *, bypass_cache: bool = False) -> bool:
+    """
+    cached_risky_by_deepseek for the asyncio executor. Each miss is its own
+    request rather than part of a micro-batch; the event loop keeps many of
+    them in flight at once instead.
+    """
+    return await get_verdict_cache().aget_or_compute(
+        text,
+        lambda: arisky_by_deepseek(text),
+        model=settings.OPENROUTER_MODEL,
+        prompt_version=PROMPT_VERSION,
+        bypass=bypass_cache,
+    )
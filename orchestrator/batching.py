@@ -0,0 +1,88 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MissingVerdict(Exception):
+    """The batched answer did not contain a verdict for this text."""
+
+
+class BatchingClassifier:
+    """
+    Micro-batches classification requests from concurrent callers. Texts are
+    collected for up to `window` seconds (or until `max_batch` texts are
+    waiting), classified with one `classify_many` call, and each verdict is
+    routed back to its caller. A text without a verdict raises MissingVerdict
+    in its caller only, so callers can fall back item by item.
+    """
+
+    def __init__(
+        self,
+        classify_many: Callable[[Sequence[str]], List[Optional[bool]]],
+        *,
+        window: float,
+        max_batch: int,
+        concurrency: int = 4,
+    ):
+        self.classify_many = classify_many
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._dispatchers = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="llm-batch"
+        )
+        self._collector: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def classify(self, text: str) -> bool:
+        future: Future = Future()
+        self._queue.put((text, future))
+        self._ensure_collector()
+        return future.result()
+
+    def _ensure_collector(self):
+        if self._collector is None:
+            with self._lock:
+                if self._collector is None:
+                    self._collector = threading.Thread(
+                        target=self._collect, name="llm-batch-collector", daemon=True
+                    )
+                    self._collector.start()
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Classify on the pool so the next batch is collected meanwhile.
+            self._dispatchers.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            verdicts = self.classify_many(texts)
+        except BaseException as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        by_text = dict(zip(texts, verdicts))
+        for text, future in batch:
+            verdict = by_text.get(text)
+            if verdict is None:
+                future.set_exception(MissingVerdict(text))
+            else:
+                future.set_result(verdict)
+        logger.debug(f"Classified {len(texts)} texts for {len(batch)} callers")
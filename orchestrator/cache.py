@@ -0,0 +1,227 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional
+
+import redis
+
+from .redis_client import get_redis, mark_unavailable
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class VerdictCache:
+    """
+    Two-tier cache of boolean LLM verdicts: an in-process LRU in front of a
+    shared Redis tier. Keys hash the normalized text together with the model
+    and prompt version, so changing either never serves stale verdicts.
+    Keys also carry a generation kept in Redis: flush() bumps it, and every
+    process moves to new keys within generation_ttl seconds, so verdicts in
+    other workers' local tiers stop being served.
+    Redis errors only disable that tier for a while; they never fail a run.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        local_size: int,
+        local_ttl: float,
+        redis_ttl: int,
+        redis_url: Optional[str] = None,
+        enabled: bool = True,
+        generation_ttl: float = 5,
+    ):
+        self.namespace = namespace
+        self.local = LRUCache(local_size, local_ttl)
+        self.redis_ttl = redis_ttl
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self.generation_ttl = generation_ttl
+        # Outside the namespace:* pattern, so flush() never deletes it.
+        self.generation_key = f"{namespace}-generation"
+        # (generation, monotonic time it was read)
+        self._generation = (0, float("-inf"))
+        self.counters = Counter()
+
+    def generation(self) -> int:
+        """The flush generation, re-read from Redis every generation_ttl seconds."""
+        generation, read_at = self._generation
+        if time.monotonic() - read_at >= self.generation_ttl:
+            raw = self._redis_call("get", self.generation_key)
+            if raw is not None:
+                generation = int(raw)
+            self._generation = (generation, time.monotonic())
+        return generation
+
+    def key(self, text: str, model: str, prompt_version: str) -> str:
+        digest = hashlib.sha256(
+            "\x00".join((model, prompt_version, normalize_text(text))).encode()
+        ).hexdigest()
+        return f"{self.namespace}:{self.generation()}:{digest}"
+
+    def _redis_call(self, method: str, *args):
+        client = get_redis(self.redis_url)
+        if client is None:
+            return None
+        try:
+            return getattr(client, method)(*args)
+        except redis.RedisError as e:
+            self.counters["redis_errors"] += 1
+            mark_unavailable(e, self.redis_url)
+            return None
+
+    def get(self, key: str) -> Optional[bool]:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.counters["local_hits"] += 1
+            return value
+
+        raw = self._redis_call("get", key)
+        if raw is not None:
+            self.counters["redis_hits"] += 1
+            value = raw == b"1"
+            self.local.set(key, value)
+            return value
+
+        self.counters["misses"] += 1
+        return None
+
+    def set(self, key: str, verdict: bool) -> None:
+        self.local.set(key, verdict)
+        self._redis_call("set", key, b"1" if verdict else b"0", self.redis_ttl)
+
+    def get_or_compute(
+        self,
+        text: str,
+        compute: Callable[[], bool],
+        *,
+        model: str,
+        prompt_version: str,
+        bypass: bool = False,
+    ) -> bool:
+        """
+        Returns the cached verdict for text or computes and stores it.
+        bypass skips the lookup but still refreshes the cache with the result.
+        Exceptions from compute propagate and nothing is cached.
+        """
+        if not self.enabled:
+            return compute()
+
+        key, cached = self._lookup(text, model, prompt_version, bypass)
+        if cached is not None:
+            return cached
+
+        verdict = bool(compute())
+        self.set(key, verdict)
+        return verdict
+
+    async def aget_or_compute(
+        self,
+        text: str,
+        compute: Callable[[], Awaitable[bool]],
+        *,
+        model: str,
+        prompt_version: str,
+        bypass: bool = False,
+    ) -> bool:
+        """
+        get_or_compute for a coroutine function. The Redis calls run in the
+        loop's default executor, so a slow or unreachable Redis never stalls
+        the other coroutines on the loop.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key, cached = await asyncio.to_thread(
+            self._lookup, text, model, prompt_version, bypass
+        )
+        if cached is not None:
+            return cached
+
+        verdict = bool(await compute())
+        await asyncio.to_thread(self.set, key, verdict)
+        return verdict
+
+    def _lookup(self, text, model, prompt_version, bypass):
+        key = self.key(text, model, prompt_version)
+        if bypass:
+            self.counters["bypassed"] += 1
+            return key, None
+        return key, self.get(key)
+
+    def flush(self) -> int:
+        """
+        Empties both tiers and bumps the generation, which retires the local
+        entries of every other process too. Returns how many Redis keys were
+        deleted.
+        """
+        self.local.clear()
+        generation = self._redis_call("incr", self.generation_key)
+        if generation is not None:
+            self._generation = (int(generation), time.monotonic())
+        client = get_redis(self.redis_url)
+        if client is None:
+            return 0
+
+        deleted = 0
+        try:
+            batch = []
+            for key in client.scan_iter(match=f"{self.namespace}:*", count=1000):
+                batch.append(key)
+                if len(batch) == 1000:
+                    deleted += client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += client.delete(*batch)
+        except redis.RedisError as e:
+            mark_unavailable(e, self.redis_url)
+        return deleted
+
+    def stats(self) -> dict:
+        return {"local_entries": len(self.local), **self.counters}
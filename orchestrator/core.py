@@ -5,13 +5,14 @@ from decimal import Decimal
 logger = logging.getLogger(__name__)
 
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
 
 
 class Outcome(str, Enum):
     PASS_ = "PASS"
     FAIL = "FAIL"
     ERROR = "ERROR"
+    SKIPPED = "SKIPPED"
 
 
 @dataclass(frozen=True)
@@ -24,13 +25,62 @@ class StepResult:
         yield self.detail
 
 
+class PreparedParams(dict):
+    """
+    Step params already merged with the defaults and converted to the types
+    the step computes with. Built once per pipeline version and shared by runs.
+    """
+
+
+class RunContext:
+    """
+    Per-run memo that steps publish derived values to (e.g. 'dti') so that
+    later steps of the same run read them instead of recomputing them.
+    A value can be qualified by a variant when it depends on step params.
+    """
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Hashable], Any] = {}
+        # Plan index -> (wall, CPU) seconds of each step that ran.
+        self.step_timings: Dict[int, Tuple[float, float]] = {}
+
+    def get_or_compute(
+        self, name: str, compute: Callable[[], Any], variant: Hashable = None
+    ) -> Any:
+        key = (name, variant)
+        if key not in self._values:
+            self._values[key] = compute()
+        return self._values[key]
+
+    def publish(self, name: str, value: Any, variant: Hashable = None) -> None:
+        self._values[(name, variant)] = value
+
+    def get(self, name: str, default: Any = None, variant: Hashable = None) -> Any:
+        return self._values.get((name, variant), default)
+
+
 class BaseStep:
     """Abstract base class for all pipeline steps."""
 
     name = "base_step"
+    # Names of the RunContext values the step publishes and reads.
+    produces: Tuple[str, ...] = ()
+    consumes: Tuple[str, ...] = ()
 
-    def __init__(self, application):
+    def __init__(self, application, context: Optional[RunContext] = None):
         self.application = application
+        self.context = context if context is not None else RunContext()
+
+    @classmethod
+    def prepare_params(cls, params: dict) -> PreparedParams:
+        """Normalizes the raw params stored on the PipelineStep."""
+        return PreparedParams(params)
+
+    @classmethod
+    def ensure_prepared(cls, params: dict) -> PreparedParams:
+        if isinstance(params, PreparedParams):
+            return params
+        return cls.prepare_params(params)
 
     def get_params(self, params):
         raise NotImplementedError("Subclasses must implement the method.")
@@ -41,3 +91,16 @@ class BaseStep:
         Returns: tuple of (outcome: str, detail: dict)
         """
         raise NotImplementedError("Subclasses must implement the method.")
+
+    async def aexecute(self, params: dict) -> StepResult:
+        """
+        Coroutine version of execute, used by the asyncio executor. Steps that
+        wait on I/O override it to await instead of blocking the event loop;
+        by default execute runs inline, which suits quick CPU-only steps.
+        """
+        return self.execute(params)
+
+    @classmethod
+    def is_async(cls) -> bool:
+        """Whether the step overrides aexecute."""
+        return cls.aexecute is not BaseStep.aexecute
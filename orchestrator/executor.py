@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Optional, TypeVar
+
+from django.conf import settings
+
+from .core import Outcome, RunContext
+from .metrics import get_metrics
+from .plan import DEFAULT_FINAL_STATUS
+from .rules import decide_final_status
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
+def get_step_pool() -> ThreadPoolExecutor:
+    """Per-process pool used to run independent steps of DAG pipelines."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.PIPELINE_STEP_THREADS,
+                    thread_name_prefix="pipeline-step",
+                )
+    return _pool
+
+
+def _run_step(index, planned_step, application, context):
+    processor = planned_step.processor_class(application, context)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    outcome, detail = processor.execute(planned_step.params)
+    record_step_timing(
+        context,
+        index,
+        planned_step.step_type,
+        time.perf_counter() - wall,
+        time.thread_time() - cpu,
+    )
+    return planned_step.step_type, outcome, detail
+
+
+async def _arun_step(index, planned_step, application, context):
+    processor = planned_step.processor_class(application, context)
+    wall, cpu = time.perf_counter(), time.thread_time()
+    outcome, detail = await processor.aexecute(planned_step.params)
+    wall = time.perf_counter() - wall
+    # While a step awaits, the loop runs other steps on the same thread, so
+    # its thread time is only its own if it never awaited.
+    cpu = None if planned_step.processor_class.is_async() else time.thread_time() - cpu
+    record_step_timing(context, index, planned_step.step_type, wall, cpu)
+    return planned_step.step_type, outcome, detail
+
+
+def record_step_timing(context, index, step_type, wall, cpu):
+    """Keeps a step's wall and CPU seconds on the run and in the step metrics."""
+    context.step_timings[index] = (wall, cpu)
+    metrics = get_metrics()
+    metrics.observe("loan_step_duration_seconds", wall, step_type=step_type)
+    if cpu is not None:
+        metrics.observe("loan_step_cpu_seconds", cpu, step_type=step_type)
+
+
+def _skipped(planned_step, final_status):
+    return (
+        planned_step.step_type,
+        Outcome.SKIPPED.value,
+        {"reason": f"Final status already decided: {final_status}"},
+    )
+
+
+def _decided_status(plan, results, pending_steps) -> Optional[str]:
+    if not plan.early_termination:
+        return None
+    return decide_final_status(
+        plan.terminal_rules,
+        [r for r in results if r is not None],
+        frozenset(s.step_type for s in pending_steps),
+        DEFAULT_FINAL_STATUS,
+    )
+
+
+def execute_plan(application, plan, context: Optional[RunContext] = None) -> list:
+    """
+    Runs the planned steps against one application and returns a list of
+    (step_type, outcome, detail) tuples in plan order, whatever the order the
+    steps actually finished in. With plan.early_termination, steps that can no
+    longer change the final status are reported as SKIPPED instead of run.
+    The wall and CPU time of each step that ran is left in context.step_timings.
+    """
+    context = context if context is not None else RunContext()
+    if plan.is_dag:
+        return _execute_dag(application, plan, context)
+
+    results = []
+    for i, planned_step in enumerate(plan.steps):
+        final_status = _decided_status(plan, results, plan.steps[i:])
+        if final_status is not None:
+            results.extend(_skipped(s, final_status) for s in plan.steps[i:])
+            break
+        results.append(_run_step(i, planned_step, application, context))
+    return results
+
+
+def _execute_dag(application, plan, context) -> list:
+    pool = get_step_pool()
+    results = [None] * len(plan.steps)
+    pending = set(range(len(plan.steps)))
+    running = {}
+    done = set()
+
+    while pending or running:
+        final_status = _decided_status(
+            plan, results, [plan.steps[i] for i in pending | set(running.values())]
+        )
+        if final_status is not None:
+            for i in pending:
+                results[i] = _skipped(plan.steps[i], final_status)
+            pending.clear()
+            if not running:
+                break
+
+        ready = [
+            i
+            for i in sorted(pending)
+            if all(dep in done for dep in plan.steps[i].dependencies)
+        ]
+        for i in ready:
+            pending.discard(i)
+            future = pool.submit(_run_step, i, plan.steps[i], application, context)
+            running[future] = i
+
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            i = running.pop(future)
+            results[i] = future.result()
+            done.add(i)
+
+    return results
+
+
+async def aexecute_plan(
+    application, plan, context: Optional[RunContext] = None
+) -> list:
+    """
+    execute_plan on an event loop: each step's aexecute is awaited, so steps
+    waiting on I/O (e.g. LLM sentiment) let the loop drive other runs. DAG
+    steps whose dependencies are met run concurrently as tasks. Results,
+    early termination and timings are as in execute_plan, except that steps
+    overriding aexecute have no CPU time.
+    """
+    context = context if context is not None else RunContext()
+    if plan.is_dag:
+        return await _aexecute_dag(application, plan, context)
+
+    results = []
+    for i, planned_step in enumerate(plan.steps):
+        final_status = _decided_status(plan, results, plan.steps[i:])
+        if final_status is not None:
+            results.extend(_skipped(s, final_status) for s in plan.steps[i:])
+            break
+        results.append(await _arun_step(i, planned_step, application, context))
+    return results
+
+
+async def _aexecute_dag(application, plan, context) -> list:
+    results = [None] * len(plan.steps)
+    pending = set(range(len(plan.steps)))
+    running = {}
+    done = set()
+
+    while pending or running:
+        final_status = _decided_status(
+            plan, results, [plan.steps[i] for i in pending | set(running.values())]
+        )
+        if final_status is not None:
+            for i in pending:
+                results[i] = _skipped(plan.steps[i], final_status)
+            pending.clear()
+            if not running:
+                break
+
+        ready = [
+            i
+            for i in sorted(pending)
+            if all(dep in done for dep in plan.steps[i].dependencies)
+        ]
+        for i in ready:
+            pending.discard(i)
+            task = asyncio.ensure_future(
+                _arun_step(i, plan.steps[i], application, context)
+            )
+            running[task] = i
+
+        finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in finished:
+            i = running.pop(task)
+            results[i] = task.result()
+            done.add(i)
+
+    return results
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    The worker process's event loop, running forever on a daemon thread so
+    the async LLM client's connections outlive individual tasks.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="pipeline-event-loop", daemon=True
+                ).start()
+                _loop = loop
+    return _loop
+
+
+def run_async(coroutine: Awaitable[T]) -> T:
+    """
+    Runs a coroutine on the worker's event loop and blocks until it is done.
+    Safe to call from several threads at once; their coroutines interleave.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, get_event_loop()).result()
+
+
+def _reset_after_fork():
+    # The loop's thread does not survive into forked workers.
+    global _loop, _loop_lock
+    _loop = None
+    _loop_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
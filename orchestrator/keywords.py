@@ -0,0 +1,113 @@
+"""
+Multi-keyword matching with an Aho-Corasick automaton: one pass over the text
+finds every keyword, however long the keyword list is.
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+# Below this many keywords, str.find in C beats walking the automaton in Python.
+_SCAN_MAX_KEYWORDS = 128
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive matcher for a fixed keyword list. By default keywords
+    match anywhere, like `kw in text`; with word_boundary=True a keyword must
+    not be preceded or followed by a letter, digit or underscore.
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False):
+        self.word_boundary = word_boundary
+        self.keywords: Tuple[str, ...] = tuple(
+            dict.fromkeys(kw for kw in keywords if kw and kw.strip())
+        )
+        # State 0 is the root. Each state has its transitions, its failure
+        # link and the (keyword index, length) pairs that end there.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, int], ...]] = [()]
+
+        self._lowered = tuple(kw.lower() for kw in self.keywords)
+        self._scan = not word_boundary and len(self.keywords) <= _SCAN_MAX_KEYWORDS
+        if not self._scan:
+            for index, keyword in enumerate(self._lowered):
+                self._add(index, keyword)
+            self._link()
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _add(self, index: int, pattern: str):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = next_state
+        self._out[state] += ((index, len(pattern)),)
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def _iter_matches(self, text: str):
+        low = text.lower()
+        if self._scan:
+            yield from (i for i, kw in enumerate(self._lowered) if kw in low)
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(low, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index, length in out[state]:
+                if self.word_boundary and not self._on_boundary(low, end - length, end):
+                    continue
+                yield index
+
+    @staticmethod
+    def _on_boundary(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not _is_word_char(text[start - 1])) and (
+            end == len(text) or not _is_word_char(text[end])
+        )
+
+    def matches(self, text: str) -> bool:
+        """True as soon as any keyword is found."""
+        if not text:
+            return False
+        return next(self._iter_matches(text), None) is not None
+
+    def find(self, text: str) -> List[str]:
+        """Matched keywords, as configured and in configured order."""
+        if not text:
+            return []
+        found = set(self._iter_matches(text))
+        return [self.keywords[index] for index in sorted(found)]
+
+
+@lru_cache(maxsize=256)
+def compile_keywords(
+    keywords: Tuple[str, ...], word_boundary: bool = False
+) -> KeywordMatcher:
+    """Shared matcher per keyword list, so each list is compiled once per process."""
+    return KeywordMatcher(keywords, word_boundary)
@@ -0,0 +1,296 @@
+"""
+Latency histograms and counters for the run hot path. Observations go to an
+in-process recorder (a lock and a few additions each); workers add what they
+recorded to a shared Redis hash every METRICS_FLUSH_INTERVAL seconds, and the
+metrics endpoint renders that hash, the sum over all processes, in the
+Prometheus text format.
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis, mark_unavailable
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+# Seconds; from a fast rule step up to a slow LLM call.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+METRICS: Dict[str, Tuple[str, str]] = {
+    "loan_step_duration_seconds": (HISTOGRAM, "Wall time of one step execution."),
+    "loan_step_cpu_seconds": (HISTOGRAM, "CPU time of one step execution."),
+    "loan_pipeline_run_duration_seconds": (
+        HISTOGRAM,
+        "Wall time of one pipeline run, steps to final status.",
+    ),
+    "loan_rule_evaluation_seconds": (
+        HISTOGRAM,
+        "Time spent evaluating a run's terminal rules.",
+    ),
+    "loan_run_queue_wait_seconds": (
+        HISTOGRAM,
+        "Time a run's task waited in the queue for a worker.",
+    ),
+    "loan_run_lock_wait_seconds": (
+        HISTOGRAM,
+        "Time spent acquiring the application row lock.",
+    ),
+    "loan_run_db_write_seconds": (
+        HISTOGRAM,
+        "Time spent writing one run, its step logs and the status.",
+    ),
+    "loan_llm_request_duration_seconds": (HISTOGRAM, "Latency of LLM requests."),
+    "loan_llm_requests_total": (COUNTER, "LLM requests sent."),
+    "loan_llm_errors_total": (COUNTER, "LLM requests that failed."),
+    "loan_llm_rate_limit_wait_seconds": (
+        HISTOGRAM,
+        "Time spent waiting for the shared LLM rate limit.",
+    ),
+    "loan_llm_rate_limited_total": (
+        COUNTER,
+        "LLM requests not sent because the shared rate limit had no slot.",
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRecorder:
+    """
+    Per-process accumulator. Histograms keep per-bucket counts (the last one
+    is +Inf) plus sum and count; flush() adds them to Redis as cumulative
+    Prometheus samples and starts over.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = defaultdict(float)
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        with self._lock:
+            self._counters[(name, _labels(labels))] += amount
+
+    def observe(self, name: str, value: float, count: int = 1, **labels) -> None:
+        """Records `count` observations of `value` seconds."""
+        bucket = bisect.bisect_left(self.buckets, value)
+        key = (name, _labels(labels))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                # Bucket counts, then sum and count.
+                series = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            series[bucket] += count
+            series[-2] += value * count
+            series[-1] += count
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def samples(self) -> Dict[str, float]:
+        """Current values as Redis hash fields (see _field)."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(series) for key, series in self._histograms.items()}
+
+        fields: Dict[str, float] = {}
+        for (name, labels), value in counters.items():
+            fields[_field(name, labels)] = value
+        for (name, labels), series in histograms.items():
+            cumulative = 0
+            for le, bucket_count in zip(
+                self.buckets + (math.inf,), series[: len(self.buckets) + 1]
+            ):
+                cumulative += bucket_count
+                fields[_field(f"{name}_bucket", labels, le)] = cumulative
+            fields[_field(f"{name}_sum", labels)] = series[-2]
+            fields[_field(f"{name}_count", labels)] = series[-1]
+        return fields
+
+    def flush(self) -> bool:
+        """
+        Adds everything recorded since the last flush to Redis. When Redis is
+        unavailable the observations are kept for the next attempt.
+        """
+        self._last_flush = time.monotonic()
+        client = get_redis()
+        if client is None:
+            return False
+
+        with self._lock:
+            counters, self._counters = self._counters, defaultdict(float)
+            histograms, self._histograms = self._histograms, {}
+        pending = MetricsRecorder(self.buckets)
+        pending._counters, pending._histograms = counters, histograms
+        fields = pending.samples()
+        if not fields:
+            return True
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for field, value in fields.items():
+                pipe.hincrbyfloat(settings.METRICS_REDIS_KEY, field, value)
+            pipe.execute()
+        except redis.RedisError as e:
+            mark_unavailable(e)
+            self._merge(counters, histograms)
+            return False
+        return True
+
+    def flush_if_due(self) -> None:
+        if time.monotonic() - self._last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def _merge(self, counters, histograms) -> None:
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] += value
+            for key, series in histograms.items():
+                current = self._histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    current[i] += value
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _field(sample: str, labels: Labels, le: Optional[float] = None) -> str:
+    """Hash field for one sample: name, labels and bucket bound, tab separated."""
+    label_text = ",".join(f"{k}={v}" for k, v in labels)
+    return f"{sample}\t{label_text}\t{'' if le is None else _format_value(le)}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _family(sample: str) -> str:
+    for suffix in ("_bucket", "_sum", "_count"):
+        if sample.endswith(suffix) and sample[: -len(suffix)] in METRICS:
+            return sample[: -len(suffix)]
+    return sample
+
+
+def render(fields: Dict[str, float]) -> str:
+    """Prometheus text exposition (format 0.0.4) of flushed samples."""
+    rows = []
+    for field, value in fields.items():
+        sample, label_text, le = field.split("\t")
+        labels = [tuple(pair.split("=", 1)) for pair in label_text.split(",") if pair]
+        rows.append((_family(sample), labels, sample, le, float(value)))
+
+    suffix_order = {"_bucket": 0, "_sum": 1, "_count": 2}
+    rows.sort(
+        key=lambda r: (
+            r[0],
+            r[1],
+            suffix_order.get(r[2][len(r[0]) :], 0),
+            float(r[3]) if r[3] else 0,
+        )
+    )
+
+    lines = []
+    current = None
+    for family, labels, sample, le, value in rows:
+        if family != current:
+            current = family
+            kind, help_text = METRICS.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+        pairs = [f'{k}="{_escape(v)}"' for k, v in labels]
+        if le:
+            pairs.append(f'le="{le}"')
+        label_part = "{" + ",".join(pairs) + "}" if pairs else ""
+        lines.append(f"{sample}{label_part} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def read_metrics() -> Optional[Dict[str, float]]:
+    """Flushed samples from all processes, or None when Redis is unavailable."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = client.hgetall(settings.METRICS_REDIS_KEY)
+    except redis.RedisError as e:
+        mark_unavailable(e)
+        return None
+    return {
+        (k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()
+    }
+
+
+_recorder: Optional[MetricsRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRecorder:
+    """This process's recorder."""
+    global _recorder
+    if _recorder is None:
+        with _recorder_lock:
+            if _recorder is None:
+                _recorder = MetricsRecorder()
+    return _recorder
+
+
+def _reset_after_fork():
+    # A forked worker must not flush the parent's observations a second time.
+    global _recorder_lock
+    _recorder_lock = threading.Lock()
+    if _recorder is not None:
+        _recorder._lock = threading.Lock()
+        _recorder.reset()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
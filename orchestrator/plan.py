@@ -0,0 +1,194 @@
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence, Tuple
+
+from .core import PreparedParams
+from .rules import CompiledCondition, InvalidCondition, compile_condition
+from .steps import STEP_PROCESSORS
+
+logger = logging.getLogger(__name__)
+
+# Status of a run when no terminal rule matches.
+DEFAULT_FINAL_STATUS = "NEEDS_REVIEW"
+
+
+class InvalidPlan(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class PlannedStep:
+    step_type: str
+    order: int
+    processor_class: type
+    params: PreparedParams
+    # Indices (in plan.steps) of the steps this one waits for; None runs in order.
+    dependencies: Optional[Tuple[int, ...]] = None
+
+
+@dataclass(frozen=True)
+class PlannedRule:
+    order: int
+    condition: CompiledCondition
+    final_status: str
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """
+    Everything a run needs from one pipeline version, resolved once:
+    processor classes, prepared params and ordered rules.
+    """
+
+    pipeline_id: int
+    version: int
+    steps: Tuple[PlannedStep, ...]
+    terminal_rules: Tuple[PlannedRule, ...]
+    # Stop running steps once the terminal rules can no longer change.
+    early_termination: bool = False
+    # Primary key of the stored snapshot the plan was compiled from, if any.
+    version_id: Optional[int] = None
+
+    @property
+    def is_dag(self) -> bool:
+        return any(step.dependencies is not None for step in self.steps)
+
+    @property
+    def uses_llm(self) -> bool:
+        """Whether any step may call the LLM (see the processors' uses_llm)."""
+        return any(
+            getattr(step.processor_class, "uses_llm", lambda params: False)(step.params)
+            for step in self.steps
+        )
+
+
+def resolve_dependencies(
+    step_types: Sequence[str], depends_on: Sequence[Optional[Sequence[str]]]
+) -> Optional[Tuple[Tuple[int, ...], ...]]:
+    """
+    Turns the declared depends_on lists of ordered steps into dependency
+    indices. Returns None when no step declares dependencies, which keeps the
+    pipeline sequential. Otherwise a step also waits for the steps producing
+    the RunContext values it consumes, so each value is computed once.
+    Raises InvalidPlan for unknown references and cycles.
+    """
+    if all(deps is None for deps in depends_on):
+        return None
+
+    resolved = []
+    for i, (step_type, deps) in enumerate(zip(step_types, depends_on)):
+        indices = set()
+        for dep in deps or ():
+            matches = [j for j, other in enumerate(step_types) if other == dep]
+            if not matches:
+                raise InvalidPlan(f"'{step_type}' depends on unknown step '{dep}'.")
+            indices.update(matches)
+
+        processor_class = STEP_PROCESSORS.get(step_type)
+        for name in getattr(processor_class, "consumes", ()):
+            indices.update(
+                j
+                for j, other in enumerate(step_types)
+                if name in getattr(STEP_PROCESSORS.get(other), "produces", ())
+            )
+
+        indices.discard(i)
+        resolved.append(tuple(sorted(indices)))
+
+    _check_acyclic(step_types, resolved)
+    return tuple(resolved)
+
+
+def _check_acyclic(step_types, dependencies):
+    visiting, done = set(), set()
+
+    def visit(i):
+        if i in done:
+            return
+        if i in visiting:
+            raise InvalidPlan(f"Step dependencies form a cycle at '{step_types[i]}'.")
+        visiting.add(i)
+        for j in dependencies[i]:
+            visit(j)
+        visiting.discard(i)
+        done.add(i)
+
+    for i in range(len(dependencies)):
+        visit(i)
+
+
+def compile_plan(
+    pipeline_id: int,
+    version: int,
+    steps: Iterable,
+    terminal_rules: Iterable,
+    early_termination: bool = False,
+    version_id: Optional[int] = None,
+) -> ExecutionPlan:
+    """
+    Builds an ExecutionPlan from step configs (step_type, order, params,
+    depends_on) and
+    terminal rules (order, condition, final_status). Unknown step types and
+    conditions that cannot be parsed are dropped here instead of on every run.
+    """
+    step_configs = []
+    for step_config in sorted(steps, key=lambda s: s.order):
+        if step_config.step_type not in STEP_PROCESSORS:
+            logger.warning(f"Unknown step_type: {step_config.step_type}. Skipping.")
+            continue
+        step_configs.append(step_config)
+
+    step_types = [s.step_type for s in step_configs]
+    try:
+        dependencies = resolve_dependencies(
+            step_types,
+            [
+                (
+                    None
+                    if s.depends_on is None
+                    else [dep for dep in s.depends_on if dep in step_types]
+                )
+                for s in step_configs
+            ],
+        )
+    except InvalidPlan as e:
+        logger.error(f"Running pipeline {pipeline_id} sequentially: {e}")
+        dependencies = None
+
+    planned_steps = []
+    for i, step_config in enumerate(step_configs):
+        processor_class = STEP_PROCESSORS[step_config.step_type]
+        planned_steps.append(
+            PlannedStep(
+                step_type=step_config.step_type,
+                order=step_config.order,
+                processor_class=processor_class,
+                params=processor_class.prepare_params(step_config.params or {}),
+                dependencies=dependencies[i] if dependencies else None,
+            )
+        )
+
+    planned_rules = []
+    for rule in sorted(terminal_rules, key=lambda r: r.order):
+        try:
+            condition = compile_condition(rule.condition)
+        except InvalidCondition as e:
+            logger.error(f"Skipping terminal rule '{rule.condition}': {e}")
+            continue
+
+        planned_rules.append(
+            PlannedRule(
+                order=rule.order,
+                condition=condition,
+                final_status=rule.final_status,
+            )
+        )
+
+    return ExecutionPlan(
+        pipeline_id=pipeline_id,
+        version=version,
+        steps=tuple(planned_steps),
+        terminal_rules=tuple(planned_rules),
+        early_termination=early_termination,
+        version_id=version_id,
+    )
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import redis
+
+from .redis_client import get_redis, mark_unavailable
+
+logger = logging.getLogger(__name__)
+
+# Token bucket kept in one hash, refilled from the Redis clock so every
+# worker sees the same time. Takes a token and returns 0, or returns the
+# seconds until one is available without taking it.
+_ACQUIRE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RateLimiter:
+    """
+    Rate limit shared by every process through Redis: on average `rate`
+    acquisitions per second, in bursts of up to `burst`. While Redis is
+    unavailable acquisitions are let through rather than blocking the work.
+    """
+
+    def __init__(
+        self, key: str, rate: float, burst: int = 1, url: Optional[str] = None
+    ):
+        self.key = key
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.url = url
+
+    def _try_acquire(self) -> float:
+        client = get_redis(self.url)
+        if client is None:
+            return 0.0
+        try:
+            return float(
+                client.eval(_ACQUIRE_SCRIPT, 1, self.key, self.rate, self.burst)
+            )
+        except redis.RedisError as e:
+            mark_unavailable(e, self.url)
+            return 0.0
+
+    def acquire(self, max_wait: float) -> bool:
+        """
+        Waits for a slot for up to max_wait seconds. Returns False, without
+        taking a slot, when none would be free in time.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait: float) -> bool:
+        """
+        acquire for coroutines: the Redis call runs in the loop's default
+        executor and the wait is an asyncio sleep, so the loop never blocks.
+        """
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire)
+            if wait <= 0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
@@ -0,0 +1,43 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, redis.Redis] = {}
+_unavailable_until: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def get_redis(url: Optional[str] = None) -> Optional[redis.Redis]:
+    """
+    Returns a shared, pooled client for url (settings.REDIS_URL by default),
+    or None while that server is backing off after a connection error.
+    Callers treat None as "Redis tier unavailable" and carry on without it.
+    """
+    url = url or settings.REDIS_URL
+    if not url or _unavailable_until.get(url, 0) > time.monotonic():
+        return None
+
+    client = _clients.get(url)
+    if client is None:
+        with _lock:
+            client = _clients.get(url)
+            if client is None:
+                client = _clients[url] = redis.Redis.from_url(
+                    url,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                )
+    return client
+
+
+def mark_unavailable(error: Exception, url: Optional[str] = None) -> None:
+    """Stops handing out the client for a while after a connection error."""
+    url = url or settings.REDIS_URL
+    logger.warning(f"Redis at {url} unavailable, retrying later: {error}")
+    _unavailable_until[url] = time.monotonic() + settings.REDIS_RETRY_AFTER
@@ -0,0 +1,170 @@
+import ast
+import logging
+import threading
+from functools import lru_cache
+from typing import AbstractSet, Any, Dict, Iterable, Optional, Sequence
+
+from simpleeval import DEFAULT_FUNCTIONS, DEFAULT_OPERATORS, SimpleEval
+
+from .core import Outcome, StepResult
+
+logger = logging.getLogger(__name__)
+
+# Operator nodes are not evaluated on their own; they must map to a known operator.
+_OPERATOR_NODES = (ast.cmpop, ast.operator, ast.unaryop)
+
+
+class InvalidCondition(ValueError):
+    pass
+
+
+class _PendingStep(Exception):
+    pass
+
+
+class _PartialContext(dict):
+    """Rule context whose lookups of steps that have not run yet abort evaluation."""
+
+    def __init__(self, context, pending):
+        super().__init__(context)
+        self.pending = pending
+
+    def __getitem__(self, name):
+        if name in self.pending:
+            raise _PendingStep(name)
+        return super().__getitem__(name)
+
+
+_local = threading.local()
+
+
+def _evaluator() -> SimpleEval:
+    """One evaluator per thread; only its names change between evaluations."""
+    evaluator = getattr(_local, "evaluator", None)
+    if evaluator is None:
+        evaluator = _local.evaluator = SimpleEval(names={})
+    return evaluator
+
+
+class CompiledCondition:
+    """
+    A terminal rule condition parsed and validated once, then evaluated with
+    the same simpleeval semantics as simple_eval() against each run's results.
+    """
+
+    def __init__(self, source: str, allowed_names: Optional[Iterable[str]] = None):
+        self.source = source
+        try:
+            module = ast.parse(source.strip())
+        except SyntaxError as e:
+            raise InvalidCondition(f"Invalid syntax: {e.msg}") from e
+
+        if len(module.body) != 1 or not isinstance(module.body[0], ast.Expr):
+            raise InvalidCondition("The condition must be a single expression.")
+
+        self.tree = module.body[0]
+        self.names = frozenset(
+            node.id for node in ast.walk(self.tree) if isinstance(node, ast.Name)
+        )
+        self._validate(allowed_names)
+
+    def _validate(self, allowed_names):
+        supported = _evaluator().nodes
+        for node in ast.walk(self.tree):
+            if isinstance(node, (ast.expr_context, ast.boolop)):
+                continue
+            if isinstance(node, _OPERATOR_NODES):
+                if type(node) not in DEFAULT_OPERATORS:
+                    raise InvalidCondition(
+                        f"Operator {type(node).__name__} is not allowed."
+                    )
+                continue
+            if type(node) not in supported or isinstance(
+                node, (ast.Assign, ast.AugAssign, ast.Import)
+            ):
+                raise InvalidCondition(f"{type(node).__name__} is not allowed.")
+            if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+                raise InvalidCondition(f"Access to '{node.attr}' is not allowed.")
+
+        if allowed_names is not None:
+            unknown = self.names - set(allowed_names) - set(DEFAULT_FUNCTIONS)
+            if unknown:
+                raise InvalidCondition(
+                    f"Unknown step(s) in condition: {', '.join(sorted(unknown))}."
+                )
+
+    def evaluate(self, context: Dict[str, StepResult]) -> Any:
+        """
+        Evaluates against a context built by build_rule_context. Any runtime
+        failure (e.g. a step that did not run) makes the rule not match.
+        """
+        evaluator = _evaluator()
+        evaluator.names = context
+        try:
+            return evaluator.eval(self.source, previously_parsed=self.tree)
+        except Exception as e:
+            logger.error(f"Failed to evaluate rule condition '{self.source}': {e}")
+            return False
+        finally:
+            evaluator.names = {}
+
+    def evaluate_partial(
+        self, context: Dict[str, StepResult], pending: AbstractSet[str]
+    ) -> Optional[bool]:
+        """
+        Evaluates while some steps are still pending. simpleeval short-circuits
+        and/or left to right, so if evaluation completes without reading a
+        pending step, the full evaluation will take the same path and return
+        the same result. Returns None when a pending step would be read.
+        """
+        if not self.names & pending:
+            return bool(self.evaluate(context))
+
+        evaluator = _evaluator()
+        evaluator.names = _PartialContext(context, pending)
+        try:
+            return bool(evaluator.eval(self.source, previously_parsed=self.tree))
+        except _PendingStep:
+            return None
+        except Exception:
+            return False
+        finally:
+            evaluator.names = {}
+
+    def __repr__(self):
+        return f"CompiledCondition({self.source!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(source: str) -> CompiledCondition:
+    return CompiledCondition(source)
+
+
+def build_rule_context(step_results) -> Dict[str, StepResult]:
+    """
+    Builds the names terminal rules see from (step_type, outcome, detail)
+    tuples. Skipped steps are left out, as if they were not configured.
+    """
+    return {
+        step_type: StepResult(outcome, detail)
+        for step_type, outcome, detail in step_results
+        if outcome != Outcome.SKIPPED
+    }
+
+
+def decide_final_status(
+    terminal_rules: Sequence, step_results, pending: AbstractSet[str], default: str
+) -> Optional[str]:
+    """
+    Returns the final status if it no longer depends on the pending steps:
+    the first rule that matches after every earlier rule was ruled out, or
+    the default when all rules are ruled out. Returns None while undecided.
+    """
+    context = build_rule_context(step_results)
+    for rule in terminal_rules:
+        matched = rule.condition.evaluate_partial(context, pending)
+        if matched is None:
+            return None
+        if matched:
+            return rule.final_status
+    return default
@@ -1,10 +1,15 @@
 import logging
 from decimal import Decimal
-from typing import Dict
+from typing import Dict, List, Optional
 
-from orchestrator.agents import risky_by_deepseek, risky_by_keywords
+from orchestrator.agents import (
+    acached_risky_by_deepseek,
+    cached_risky_by_deepseek,
+    prefetch_verdicts,
+)
 
-from .core import BaseStep, StepResult
+from .core import BaseStep, PreparedParams, StepResult
+from .keywords import compile_keywords
 
 logger = logging.getLogger(__name__)
 
@@ -21,19 +26,33 @@ DEFAULT_PARAMS = {
 
 class DebtToIncomeRule(BaseStep):
     name = "dti_rule"
+    produces = ("dti",)
+
+    @classmethod
+    def prepare_params(cls, params):
+        return PreparedParams(
+            max_dti_threshold=Decimal(
+                params.get(
+                    "max_dti_threshold",
+                    DEFAULT_PARAMS["dti_rule"]["max_dti_threshold"],
+                )
+            )
+        )
 
     def get_params(self, params):
-        self.threshold = Decimal(
-            params.get(
-                "max_dti_threshold", DEFAULT_PARAMS["dti_rule"]["max_dti_threshold"]
-            )
+        self.threshold = self.ensure_prepared(params)["max_dti_threshold"]
+
+    def get_dti(self):
+        return self.context.get_or_compute(
+            "dti",
+            lambda: self.application.declared_debts / self.application.monthly_income,
         )
 
     def execute(self, params: dict) -> StepResult:
         """Checks if DTI is below the configured threshold."""
         self.get_params(params)
         try:
-            dti = self.application.declared_debts / self.application.monthly_income
+            dti = self.get_dti()
         except (ZeroDivisionError, TypeError):
             logger.error(
                 f"DTI Rule failed for App {self.application.id}: Invalid income data."
@@ -48,20 +67,40 @@ class DebtToIncomeRule(BaseStep):
 
 class AmountPolicyRule(BaseStep):
     name = "amount_policy"
+    produces = ("country_max",)
 
-    def get_params(self, params):
+    @classmethod
+    def prepare_params(cls, params):
         cap_for_country = params.get(
             "cap_for_country", DEFAULT_PARAMS["amount_policy"]["cap_for_country"]
         )
-        country_code = self.application.country.upper()
-        self.max_amount = Decimal(
+        caps = {
+            country_code: Decimal(cap) for country_code, cap in cap_for_country.items()
+        }
+        other_cap = Decimal(
             cap_for_country.get(
-                country_code,
-                cap_for_country.get(
-                    "OTHER", DEFAULT_PARAMS["amount_policy"]["cap_for_country"]["OTHER"]
-                ),
+                "OTHER", DEFAULT_PARAMS["amount_policy"]["cap_for_country"]["OTHER"]
             )
         )
+        return PreparedParams(
+            cap_for_country=caps,
+            other_cap=other_cap,
+            # Identifies the cap table, so country_max is shared only between
+            # steps configured with the same caps.
+            caps_key=(tuple(sorted(caps.items())), other_cap),
+        )
+
+    def get_country_max(self, params):
+        params = self.ensure_prepared(params)
+        country_code = self.application.country.upper()
+        return self.context.get_or_compute(
+            "country_max",
+            lambda: params["cap_for_country"].get(country_code, params["other_cap"]),
+            variant=params["caps_key"],
+        )
+
+    def get_params(self, params):
+        self.max_amount = self.get_country_max(params)
 
     def execute(self, params: dict) -> StepResult:
         """Checks if the loan amount exceeds the country-specific maximum."""
@@ -77,18 +116,27 @@ class AmountPolicyRule(BaseStep):
 
 class RiskScoringStep(BaseStep):
     name = "risk_scoring"
+    consumes = ("dti", "country_max")
+
+    @classmethod
+    def prepare_params(cls, params):
+        # The score reuses the amount and DTI calculations with these same params.
+        return PreparedParams(
+            **AmountPolicyRule.prepare_params(params),
+            **DebtToIncomeRule.prepare_params(params),
+            approve_threshold=params.get(
+                "approve_threshold", DEFAULT_PARAMS["risk_scoring"]["approve_threshold"]
+            ),
+        )
 
     def get_params(self, params):
-        _, details_amount_policy_calculation = AmountPolicyRule(
-            self.application
-        ).execute(params)
-        _, details_dti_calculation = DebtToIncomeRule(self.application).execute(params)
-
-        self.dti = details_dti_calculation["dti"]
-        self.max_amount_allowed = details_amount_policy_calculation["country_max"]
-        self.approve_threshold = params.get(
-            "approve_threshold", DEFAULT_PARAMS["risk_scoring"]["approve_threshold"]
-        )
+        params = self.ensure_prepared(params)
+        # Reuses what dti_rule / amount_policy already computed in this run.
+        self.dti = round(DebtToIncomeRule(self.application, self.context).get_dti(), 4)
+        self.max_amount_allowed = AmountPolicyRule(
+            self.application, self.context
+        ).get_country_max(params)
+        self.approve_threshold = params["approve_threshold"]
 
     def execute(self, params: dict) -> StepResult:
         """Simulates an external call to a Risk Scoring Service."""
@@ -104,7 +152,7 @@ class RiskScoringStep(BaseStep):
         return StepResult(outcome, detail)
 
 
-class SentimentCheckStep:
+class SentimentCheckStep(BaseStep):
     """
     Bonus agent-style step.
     Modes:
@@ -117,38 +165,110 @@ class SentimentCheckStep:
     class SentimentSubStrategy:
         def is_risky(self, purpose: str, params: dict) -> bool: ...
 
+        async def ais_risky(self, purpose: str, params: dict) -> bool:
+            return self.is_risky(purpose, params)
+
     class KeywordSentiment(SentimentSubStrategy):
         def is_risky(self, purpose: str, params: dict) -> bool:
-            keywords = params.get(
-                "risky_keywords", DEFAULT_PARAMS["sentiment_check"]["risky_keywords"]
-            )
-            return risky_by_keywords(purpose, keywords)
+            return bool(self.matched_keywords(purpose, params))
+
+        def matched_keywords(self, purpose: str, params: dict) -> List[str]:
+            if not isinstance(params, PreparedParams):
+                params = SentimentCheckStep.prepare_params(params)
+            return params["keyword_matcher"].find(purpose)
 
     class LLMSentiment(SentimentSubStrategy):
         def is_risky(self, purpose: str, params: dict) -> bool:
-            return risky_by_deepseek(purpose)
+            # params {"cache": false} forces a fresh classification.
+            return cached_risky_by_deepseek(
+                purpose, bypass_cache=not params.get("cache", True)
+            )
+
+        async def ais_risky(self, purpose: str, params: dict) -> bool:
+            return await acached_risky_by_deepseek(
+                purpose, bypass_cache=not params.get("cache", True)
+            )
 
     SENTIMENT_MODES: Dict[str, SentimentSubStrategy] = {
         "keyword": KeywordSentiment(),
         "llm": LLMSentiment(),
     }
 
-    def __init__(self, application):
-        self.application = application
+    @classmethod
+    def prepare_params(cls, params: dict) -> PreparedParams:
+        risky_keywords = tuple(
+            params.get(
+                "risky_keywords",
+                DEFAULT_PARAMS["sentiment_check"]["risky_keywords"],
+            )
+        )
+        return PreparedParams(
+            params,
+            risky_keywords=risky_keywords,
+            keyword_matcher=compile_keywords(
+                risky_keywords, bool(params.get("word_boundary", False))
+            ),
+        )
 
-    def execute(self, params: dict) -> StepResult:
+    @classmethod
+    def uses_llm(cls, params: dict) -> bool:
+        """Whether a run of this step calls the LLM, for queue routing."""
+        return params.get("mode") == "llm"
+
+    @classmethod
+    def prefetch(cls, applications, params: dict) -> None:
+        """
+        Classifies the purposes of many applications in batched LLM requests
+        ahead of their runs, so each run reads its verdict from the cache.
+        """
+        if params.get("mode") != "llm" or not params.get("cache", True):
+            return
+        prefetch_verdicts((a.loan_purpose or "").strip() for a in applications)
+
+    def _strategy(self, params: dict):
         mode = params.get("mode", "keyword")
-        sentiment_strategy = self.SENTIMENT_MODES.get(
-            mode, self.SENTIMENT_MODES["keyword"]
-        )
-        purpose = (self.application.loan_purpose or "").strip()
+        strategy = self.SENTIMENT_MODES.get(mode, self.SENTIMENT_MODES["keyword"])
+        return mode, strategy, (self.application.loan_purpose or "").strip()
 
+    def execute(self, params: dict) -> StepResult:
+        mode, sentiment_strategy, purpose = self._strategy(params)
         try:
+            if isinstance(sentiment_strategy, self.KeywordSentiment):
+                matched_keywords = sentiment_strategy.matched_keywords(purpose, params)
+                return self._result(
+                    mode, purpose, bool(matched_keywords), matched_keywords
+                )
             risky = sentiment_strategy.is_risky(purpose, params)
         except Exception as _:
-            risky = self.SENTIMENT_MODES["keyword"].is_risky(purpose, params)
-            mode = "keyword"
+            return self._keyword_fallback(purpose, params)
+        return self._result(mode, purpose, risky)
+
+    async def aexecute(self, params: dict) -> StepResult:
+        """Like execute, but awaits the LLM instead of blocking the worker."""
+        mode, sentiment_strategy, purpose = self._strategy(params)
+        if isinstance(sentiment_strategy, self.KeywordSentiment):
+            return self.execute(params)
+        try:
+            risky = await sentiment_strategy.ais_risky(purpose, params)
+        except Exception as _:
+            return self._keyword_fallback(purpose, params)
+        return self._result(mode, purpose, risky)
+
+    def _keyword_fallback(self, purpose: str, params: dict) -> StepResult:
+        matched_keywords = self.SENTIMENT_MODES["keyword"].matched_keywords(
+            purpose, params
+        )
+        return self._result(
+            "keyword", purpose, bool(matched_keywords), matched_keywords
+        )
 
+    def _result(
+        self,
+        mode: str,
+        purpose: str,
+        risky: bool,
+        matched_keywords: Optional[List[str]] = None,
+    ) -> StepResult:
         outcome = "RISKY" if risky else "SAFE"
         detail = {
             "mode": mode,
@@ -159,6 +279,8 @@ class SentimentCheckStep:
                 else ("DeepSeek detected risk" if risky else "No risk detected")
             ),
         }
+        if matched_keywords is not None:
+            detail["matched_keywords"] = matched_keywords
         return StepResult(outcome, detail)
 
 
@@ -0,0 +1,315 @@
+"""
+Columnar execution of the numeric rule steps over many applications at once.
+
+Outcomes are computed with NumPy. Comparisons that land too close to a
+threshold for float64 to be trusted are re-checked with Decimal, and details
+are materialized per row with the same Decimal arithmetic as the scalar steps,
+so results match DebtToIncomeRule, AmountPolicyRule and RiskScoringStep.
+Rows the columnar path cannot reproduce (e.g. zero income) are flagged in
+``fallback`` and must be executed by the scalar step instead.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .core import PreparedParams, RunContext, StepResult
+from .executor import _decided_status, _skipped, record_step_timing
+from .steps import AmountPolicyRule, DebtToIncomeRule, RiskScoringStep
+
+logger = logging.getLogger(__name__)
+
+# Relative distance to a threshold under which float64 results are re-checked exactly.
+_EXACT_CHECK_TOLERANCE = 1e-9
+
+
+@dataclass
+class ApplicationColumns:
+    """Decision inputs of many applications, as Decimals and as arrays."""
+
+    amount: List[Decimal]
+    monthly_income: List[Decimal]
+    declared_debts: List[Decimal]
+    country: np.ndarray
+    amount_f: np.ndarray
+    income_f: np.ndarray
+    debts_f: np.ndarray
+    income_cents: np.ndarray
+    debts_cents: np.ndarray
+    exact_cents: np.ndarray
+
+    def __len__(self):
+        return len(self.amount)
+
+    @classmethod
+    def from_applications(cls, applications: Sequence) -> "ApplicationColumns":
+        return cls.from_rows(
+            (a.amount, a.monthly_income, a.declared_debts, a.country)
+            for a in applications
+        )
+
+    @classmethod
+    def from_rows(cls, rows) -> "ApplicationColumns":
+        """rows: iterable of (amount, monthly_income, declared_debts, country)."""
+        amount, income, debts, country = [], [], [], []
+        for row_amount, row_income, row_debts, row_country in rows:
+            amount.append(Decimal(row_amount))
+            income.append(Decimal(row_income))
+            debts.append(Decimal(row_debts))
+            country.append(row_country.upper())
+
+        income_cents = [_to_cents(v) for v in income]
+        debts_cents = [_to_cents(v) for v in debts]
+        exact_cents = np.array(
+            [
+                i is not None and d is not None
+                for i, d in zip(income_cents, debts_cents)
+            ],
+            dtype=bool,
+        )
+        return cls(
+            amount=amount,
+            monthly_income=income,
+            declared_debts=debts,
+            country=np.array(country, dtype=str),
+            amount_f=np.array(amount, dtype=np.float64),
+            income_f=np.array(income, dtype=np.float64),
+            debts_f=np.array(debts, dtype=np.float64),
+            income_cents=np.array([v or 0 for v in income_cents], dtype=np.int64),
+            debts_cents=np.array([v or 0 for v in debts_cents], dtype=np.int64),
+            exact_cents=exact_cents,
+        )
+
+
+def _to_cents(value: Decimal):
+    cents = value.scaleb(2)
+    if cents != cents.to_integral_value() or abs(cents) >= 10**12:
+        return None
+    return int(cents)
+
+
+@dataclass
+class ColumnarStepResult:
+    step_type: str
+    outcomes: np.ndarray
+    fallback: np.ndarray
+    detail_for: Callable[[int], dict]
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def result(self, i: int) -> StepResult:
+        return StepResult(str(self.outcomes[i]), self.detail_for(i))
+
+
+def _near(values: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+    scale = np.maximum(np.abs(threshold), 1.0)
+    return np.abs(values - threshold) <= _EXACT_CHECK_TOLERANCE * scale
+
+
+def _exact_dti(columns: ApplicationColumns, i: int) -> Decimal:
+    return columns.declared_debts[i] / columns.monthly_income[i]
+
+
+def _dti_columns(columns: ApplicationColumns):
+    """
+    Returns (valid, rounded_dti_units, dti_f) where rounded_dti_units is
+    round(debts / income, 4) * 10_000 computed exactly on integer cents
+    (ROUND_HALF_EVEN, like Decimal's round()).
+    """
+    valid = (
+        columns.exact_cents & (columns.income_cents > 0) & (columns.debts_cents >= 0)
+    )
+    income = np.where(valid, columns.income_cents, 1)
+    numerator = np.where(valid, columns.debts_cents, 0) * 10_000
+    quotient, remainder = np.divmod(numerator, income)
+    twice = remainder * 2
+    round_up = (twice > income) | ((twice == income) & (quotient % 2 == 1))
+    rounded_units = quotient + round_up
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dti_f = np.where(
+            valid, columns.debts_f / np.where(valid, columns.income_f, 1), 0
+        )
+    return valid, rounded_units, dti_f
+
+
+def _rounded_dti(rounded_units: np.ndarray, i: int) -> Decimal:
+    return Decimal(int(rounded_units[i])).scaleb(-4)
+
+
+def _country_caps(columns: ApplicationColumns, params: PreparedParams):
+    codes, inverse = np.unique(columns.country, return_inverse=True)
+    caps = [params["cap_for_country"].get(code, params["other_cap"]) for code in codes]
+    caps_f = np.array(caps, dtype=np.float64)
+    return [caps[j] for j in inverse], caps_f[inverse]
+
+
+def evaluate_dti(columns: ApplicationColumns, params: dict) -> ColumnarStepResult:
+    params = DebtToIncomeRule.ensure_prepared(params)
+    threshold = params["max_dti_threshold"]
+    valid, rounded_units, dti_f = _dti_columns(columns)
+
+    passed = dti_f < float(threshold)
+    for i in np.flatnonzero(valid & _near(dti_f, float(threshold))):
+        passed[i] = _exact_dti(columns, i) < threshold
+
+    outcomes = np.where(passed, "PASS", "FAIL")
+    threshold_str = str(threshold)
+
+    def detail_for(i):
+        return {"dti": _rounded_dti(rounded_units, i), "threshold": threshold_str}
+
+    return ColumnarStepResult("dti_rule", outcomes, ~valid, detail_for)
+
+
+def evaluate_amount_policy(
+    columns: ApplicationColumns, params: dict
+) -> ColumnarStepResult:
+    params = AmountPolicyRule.ensure_prepared(params)
+    caps, caps_f = _country_caps(columns, params)
+
+    passed = columns.amount_f <= caps_f
+    for i in np.flatnonzero(_near(columns.amount_f, caps_f)):
+        passed[i] = columns.amount[i] <= caps[i]
+
+    outcomes = np.where(passed, "PASS", "FAIL")
+
+    def detail_for(i):
+        return {
+            "country_max": caps[i],
+            "application_amount": str(columns.amount[i]),
+        }
+
+    return ColumnarStepResult(
+        "amount_policy", outcomes, np.zeros(len(columns), dtype=bool), detail_for
+    )
+
+
+def evaluate_risk_scoring(
+    columns: ApplicationColumns, params: dict
+) -> ColumnarStepResult:
+    params = RiskScoringStep.ensure_prepared(params)
+    approve_threshold = params["approve_threshold"]
+    valid, rounded_units, _ = _dti_columns(columns)
+    caps, caps_f = _country_caps(columns, params)
+    valid &= caps_f != 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        risk_f = (
+            rounded_units / 100.0 + columns.amount_f / np.where(valid, caps_f, 1) * 20
+        )
+
+    def risk_score(i):
+        # Same operations, in the same order, as RiskScoringStep.execute.
+        return (_rounded_dti(rounded_units, i) * 100) + (
+            columns.amount[i] / caps[i] * 20
+        )
+
+    passed = risk_f <= float(approve_threshold)
+    for i in np.flatnonzero(valid & _near(risk_f, float(approve_threshold))):
+        passed[i] = risk_score(i) <= approve_threshold
+
+    outcomes = np.where(passed, "PASS", "FAIL")
+
+    def detail_for(i):
+        return {"risk_score": risk_score(i), "min_threshold": approve_threshold}
+
+    return ColumnarStepResult("risk_scoring", outcomes, ~valid, detail_for)
+
+
+VECTORIZED_STEPS: Dict[
+    str, Callable[[ApplicationColumns, dict], ColumnarStepResult]
+] = {
+    "dti_rule": evaluate_dti,
+    "amount_policy": evaluate_amount_policy,
+    "risk_scoring": evaluate_risk_scoring,
+}
+
+
+class ColumnarPlanExecutor:
+    """
+    Runs an ExecutionPlan over a chunk of applications. Vectorizable steps are
+    evaluated once for the whole chunk; other steps and fallback rows go
+    through the scalar processors.
+    """
+
+    def __init__(self, plan, applications: Sequence):
+        self.plan = plan
+        self.applications = applications
+        columns = ApplicationColumns.from_applications(applications)
+        self.columnar = []
+        # Each row's share of the (wall, CPU) time of the columnar steps.
+        self.columnar_timings = []
+        for planned_step in plan.steps:
+            evaluate = VECTORIZED_STEPS.get(planned_step.step_type)
+            if evaluate is None:
+                self.columnar.append(None)
+                self.columnar_timings.append((0.0, 0.0))
+                continue
+            wall, cpu = time.perf_counter(), time.thread_time()
+            self.columnar.append(evaluate(columns, planned_step.params))
+            rows = max(len(applications), 1)
+            self.columnar_timings.append(
+                (
+                    (time.perf_counter() - wall) / rows,
+                    (time.thread_time() - cpu) / rows,
+                )
+            )
+
+    def execute(self, i: int, context: Optional[RunContext] = None) -> list:
+        """
+        Returns (step_type, outcome, detail) tuples for the i-th application
+        and leaves each step's timing in context.step_timings. Early
+        termination skips steps exactly like execute_plan does.
+        """
+        context = context if context is not None else RunContext()
+        results = []
+        for j, planned_step in enumerate(self.plan.steps):
+            final_status = _decided_status(self.plan, results, self.plan.steps[j:])
+            if final_status is not None:
+                results.extend(_skipped(s, final_status) for s in self.plan.steps[j:])
+                break
+            results.append(self._run_step(i, j, context))
+        return results
+
+    def decided_before(self, i: int, j: int) -> Optional[str]:
+        """
+        The final status early termination settles for the i-th application
+        before its j-th step, or None. LLM-backed steps are not run for this,
+        so an application whose run would reach one counts as undecided.
+        """
+        results = []
+        for k, planned_step in enumerate(self.plan.steps[: j + 1]):
+            final_status = _decided_status(self.plan, results, self.plan.steps[k:])
+            if final_status is not None or k == j:
+                return final_status
+            uses_llm = getattr(planned_step.processor_class, "uses_llm", None)
+            if uses_llm is not None and uses_llm(planned_step.params):
+                return None
+            results.append(self._run_step(i, k, RunContext()))
+        return None
+
+    def _run_step(self, i: int, j: int, context: RunContext) -> tuple:
+        planned_step = self.plan.steps[j]
+        columnar = self.columnar[j]
+        wall, cpu = time.perf_counter(), time.thread_time()
+        if columnar is not None and not columnar.fallback[i]:
+            outcome, detail = columnar.result(i)
+            shared_wall, shared_cpu = self.columnar_timings[j]
+        else:
+            processor = planned_step.processor_class(self.applications[i], context)
+            outcome, detail = processor.execute(planned_step.params)
+            shared_wall = shared_cpu = 0.0
+        record_step_timing(
+            context,
+            j,
+            planned_step.step_type,
+            time.perf_counter() - wall + shared_wall,
+            time.thread_time() - cpu + shared_cpu,
+        )
+        return planned_step.step_type, outcome, detail
@@ -0,0 +1,32 @@
+import pytest
+
+from loans import dedup, events
+from loans.plans import clear_execution_plans
+from orchestrator import cache, metrics, ratelimit
+from orchestrator.agents import get_verdict_cache
+
+# Modules that reach the shared Redis through get_redis.
+REDIS_MODULES = (cache, dedup, events, metrics, ratelimit)
+
+
+@pytest.fixture(autouse=True)
+def _no_shared_redis(monkeypatch):
+    # A reachable Redis (the broker by default) would carry verdicts, locks
+    # and metrics between tests and runs; tests that need it patch in a fake.
+    for module in REDIS_MODULES:
+        monkeypatch.setattr(module, "get_redis", lambda url=None: None)
+
+
+@pytest.fixture(autouse=True)
+def _clear_plan_cache():
+    # Pipeline IDs are reused between rolled-back tests; never serve a stale plan.
+    clear_execution_plans()
+    yield
+    clear_execution_plans()
+
+
+@pytest.fixture(autouse=True)
+def _clear_verdict_cache():
+    get_verdict_cache().local.clear()
+    yield
+    get_verdict_cache().local.clear()
@@ -0,0 +1,66 @@
+"""In-memory stand-in for the few redis-py calls the app makes."""
+
+import json
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def scan_iter(self, match, count):
+        prefix = match.rstrip("*")
+        return [k for k in list(self.data) if k.startswith(prefix)]
+
+    def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    def eval(self, script, numkeys, key, value):
+        # The scripts in use delete key if it still holds value, or if it
+        # holds JSON whose task_id is value.
+        current = self.data.get(key)
+        if current is not None and "cjson" in script:
+            current = json.loads(current)["task_id"].encode()
+        if current == value.encode():
+            return self.delete(key)
+        return 0
+
+    def hincrbyfloat(self, key, field, amount):
+        hash_ = self.data.setdefault(key, {})
+        hash_[field.encode()] = float(hash_.get(field.encode(), 0)) + amount
+        return hash_[field.encode()]
+
+    def hgetall(self, key):
+        return {k: str(v).encode() for k, v in self.data.get(key, {}).items()}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Runs queued calls against the FakeRedis on execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+        return lambda *args, **kwargs: self.calls.append((method, args, kwargs))
+
+    def execute(self):
+        results = [method(*args, **kwargs) for method, args, kwargs in self.calls]
+        self.calls = []
+        return results
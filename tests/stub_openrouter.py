@@ -0,0 +1,70 @@
+"""
+Local stand-in for the OpenRouter chat-completions endpoint, used to test and
+benchmark the HTTP client offline. Scripted statuses are served first, then
+200 responses whose content is produced by ``answer(request_json)``.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOpenRouter:
+    def __init__(self, statuses=(), answer=None, latency=0.0):
+        self.statuses = list(statuses)
+        self.answer = answer or (lambda payload: "SAFE")
+        self.latency = latency
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/api/v1/chat/completions"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )
+                with stub._lock:
+                    stub.requests.append(payload)
+                    stub.connections.add(self.client_address)
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if status == 200:
+                    body = {"choices": [{"message": {"content": stub.answer(payload)}}]}
+                else:
+                    body = {"error": {"code": status, "message": "stubbed failure"}}
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(raw)
+
+        return Handler
@@ -0,0 +1,211 @@
+import asyncio
+import time
+import weakref
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from fake_redis import FakeRedis
+from stub_openrouter import StubOpenRouter
+
+from loans.models import Application, Pipeline, PipelineRun, PipelineStep
+from loans.tasks import run_pipeline_batch_task
+from orchestrator import agents, cache, ratelimit
+from orchestrator.agents import AsyncOpenRouterClient, LLMException
+from orchestrator.cache import VerdictCache
+from orchestrator.core import BaseStep
+from orchestrator.executor import aexecute_plan, execute_plan, run_async
+from orchestrator.plan import compile_plan
+from orchestrator.ratelimit import RateLimiter
+from orchestrator.steps import STEP_PROCESSORS, SentimentCheckStep
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def _config(step_type, order, params=None, depends_on=None):
+    return SimpleNamespace(
+        step_type=step_type, order=order, params=params or {}, depends_on=depends_on
+    )
+
+
+def _application(purpose="casino weekend"):
+    return Application(
+        amount=Decimal(12000),
+        monthly_income=Decimal(4000),
+        declared_debts=Decimal(500),
+        country="ES",
+        loan_purpose=purpose,
+    )
+
+
+@pytest.fixture
+def stub_llm(settings, monkeypatch):
+    # Clients are kept per event loop and would outlive the stub.
+    monkeypatch.setattr(agents, "_async_clients", weakref.WeakKeyDictionary())
+    with StubOpenRouter(
+        latency=0.2,
+        answer=lambda p: "RISKY" if "casino" in str(p["messages"]) else "SAFE",
+    ) as stub:
+        settings.OPENROUTER_API_KEY = "test"
+        settings.OPENROUTER_URL = stub.url
+        settings.LLM_RATE_LIMIT = 0
+        settings.LLM_CACHE_ENABLED = False
+        yield stub
+
+
+def test_sync_steps_run_through_the_same_registry():
+    assert all(issubclass(p, BaseStep) for p in STEP_PROCESSORS.values())
+    assert SentimentCheckStep.is_async()
+    assert not STEP_PROCESSORS["dti_rule"].is_async()
+
+
+@pytest.mark.parametrize("depends_on", [None, []])
+def test_async_execution_matches_sync_execution(depends_on):
+    plan = compile_plan(
+        1,
+        1,
+        [
+            _config(step_type, order, depends_on=depends_on)
+            for order, step_type in enumerate(STEP_PROCESSORS, 1)
+        ],
+        [],
+    )
+
+    results = asyncio.run(aexecute_plan(_application(), plan))
+
+    assert results == execute_plan(_application(), plan)
+
+
+def test_llm_classifications_of_many_runs_are_in_flight_together(stub_llm):
+    plan = compile_plan(1, 1, [_config("sentiment_check", 1, {"mode": "llm"})], [])
+    applications = [
+        _application("casino weekend" if i % 2 else "new roof") for i in range(20)
+    ]
+
+    async def run_all():
+        return await asyncio.gather(*(aexecute_plan(a, plan) for a in applications))
+
+    started = time.perf_counter()
+    results = run_async(run_all())
+    elapsed = time.perf_counter() - started
+
+    assert [r[0][1] for r in results] == ["SAFE", "RISKY"] * 10
+    assert all(r[0][2]["mode"] == "llm" for r in results)
+    assert len(stub_llm.requests) == 20
+    # One request takes 0.2s; in sequence they would take 4s.
+    assert elapsed < 2
+
+
+def test_failed_async_classification_falls_back_to_keywords(settings):
+    settings.OPENROUTER_API_KEY = ""
+    step = SentimentCheckStep(_application())
+
+    outcome, detail = asyncio.run(
+        step.aexecute(SentimentCheckStep.prepare_params({"mode": "llm"}))
+    )
+
+    assert (outcome, detail["mode"]) == ("RISKY", "keyword")
+    assert detail["matched_keywords"] == ["casino"]
+
+
+class SlowRedis(FakeRedis):
+    def get(self, key):
+        time.sleep(0.3)
+        return super().get(key)
+
+    def eval(self, *args):
+        time.sleep(0.3)
+        return "0"
+
+
+def test_slow_redis_does_not_block_the_event_loop(monkeypatch):
+    client = SlowRedis()
+    monkeypatch.setattr(cache, "get_redis", lambda url=None: client)
+    monkeypatch.setattr(ratelimit, "get_redis", lambda url=None: client)
+    verdicts = VerdictCache("slow", local_size=10, local_ttl=60, redis_ttl=60)
+    limiter = RateLimiter("slow", rate=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.05)
+
+    async def classify():
+        async def compute():
+            return True
+
+        return await verdicts.aget_or_compute(
+            "casino", compute, model="m", prompt_version="v"
+        )
+
+    async def main():
+        return await asyncio.gather(classify(), limiter.aacquire(1), ticker())
+
+    verdict, acquired, _ = asyncio.run(main())
+
+    assert verdict is True and acquired is True
+    assert ticks[-1] - ticks[0] < 0.3
+
+
+def test_async_client_retries_then_succeeds():
+    async def call():
+        client = AsyncOpenRouterClient(
+            url=stub.url, api_key="test", backoff_factor=0.01, backoff_max=0.05
+        )
+        try:
+            return await client.chat_completion(PAYLOAD)
+        finally:
+            await client.aclose()
+
+    with StubOpenRouter(statuses=[429, 503], answer=lambda p: "RISKY") as stub:
+        data = asyncio.run(call())
+
+    assert data["choices"][0]["message"]["content"] == "RISKY"
+    assert len(stub.requests) == 3
+
+
+def test_async_client_retries_are_bounded():
+    async def call():
+        client = AsyncOpenRouterClient(
+            url=stub.url, api_key="test", max_retries=2, backoff_factor=0.01
+        )
+        try:
+            return await client.chat_completion(PAYLOAD)
+        finally:
+            await client.aclose()
+
+    with StubOpenRouter(statuses=[503] * 10) as stub:
+        with pytest.raises(LLMException):
+            asyncio.run(call())
+
+    assert len(stub.requests) == 3
+
+
+@pytest.mark.django_db
+def test_batch_runs_await_llm_steps_on_the_event_loop(stub_llm, settings):
+    settings.PIPELINE_ASYNC_STEPS = True
+    pipeline = Pipeline.objects.create(name="async")
+    PipelineStep.objects.create(
+        pipeline=pipeline,
+        step_type="sentiment_check",
+        order=1,
+        params={"mode": "llm", "cache": False},
+    )
+    ids = []
+    for i in range(10):
+        application = _application("casino weekend" if i % 2 else "new roof")
+        application.applicant_name = f"A{i}"
+        application.save()
+        ids.append(application.id)
+
+    started = time.perf_counter()
+    run_pipeline_batch_task(pipeline.id, ids)
+    elapsed = time.perf_counter() - started
+
+    runs = PipelineRun.objects.filter(pipeline=pipeline).order_by("application_id")
+    logs = [run.step_logs.get() for run in runs]
+    assert [log.outcome for log in logs] == ["SAFE", "RISKY"] * 5
+    assert all(log.detail["mode"] == "llm" for log in logs)
+    assert all(log.cpu_duration is None and log.wall_duration for log in logs)
+    assert elapsed < 1.5
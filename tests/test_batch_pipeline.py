@@ -0,0 +1,107 @@
+import pytest
+from rest_framework.test import APIClient
+
+from loans.models import Application, PipelineRun, StepLog
+from loans.tasks import run_pipeline_batch_task
+
+testdata = [
+    ["Ana", 12000, 4000, 500, "ES", "home renovation", "APPROVED"],
+    ["Luis", 28000, 2000, 1200, "OTHER", "home renovation", "REJECTED"],
+    ["Mia", 20000, 3000, 900, "FR", "home renovation", "NEEDS_REVIEW"],
+    ["Eva", 15000, 5000, 200, "ES", "gambling", "REJECTED"],
+]
+
+pipe_payload = {
+    "name": "batch-pipeline",
+    "is_active": True,
+    "steps": [
+        {"step_type": "dti_rule", "order": 1},
+        {"step_type": "amount_policy", "order": 2},
+        {"step_type": "sentiment_check", "order": 3, "params": {"mode": "keyword"}},
+        {"step_type": "risk_scoring", "order": 4},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "dti_rule.outcome == 'FAIL' or amount_policy.outcome == 'FAIL'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 2,
+            "condition": "sentiment_check.outcome == 'RISKY'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 3,
+            "condition": "risk_scoring.outcome == 'PASS'",
+            "final_status": "APPROVED",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def applications(db):
+    return [
+        Application.objects.create(
+            applicant_name=name,
+            amount=amount,
+            monthly_income=income,
+            declared_debts=debts,
+            country=country,
+            loan_purpose=purpose,
+        )
+        for name, amount, income, debts, country, purpose, _ in testdata
+    ]
+
+
+@pytest.fixture
+def pipeline_id(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+@pytest.mark.parametrize("application_ids", ["explicit", None])
+def test_batch_run_matches_single_run_outcomes(
+    applications, pipeline_id, application_ids, vectorized
+):
+    ids = [a.id for a in applications] if application_ids else None
+
+    summary = run_pipeline_batch_task(
+        pipeline_id, ids, chunk_size=3, vectorized=vectorized
+    )
+
+    assert summary["processed"] == len(testdata)
+    assert summary["errors"] == 0
+    assert summary["final_statuses"] == {
+        "APPROVED": 1,
+        "REJECTED": 2,
+        "NEEDS_REVIEW": 1,
+    }
+
+    for application, row in zip(applications, testdata):
+        application.refresh_from_db()
+        assert application.status == row[-1]
+        run = PipelineRun.objects.get(application=application)
+        assert run.final_status == row[-1]
+        assert run.end_time is not None
+        assert run.step_logs.count() == 4
+
+    assert StepLog.objects.count() == 4 * len(testdata)
+
+
+def test_batch_run_reports_missing_applications(applications, pipeline_id):
+    summary = run_pipeline_batch_task(pipeline_id, [applications[0].id, 999_999])
+
+    assert summary["processed"] == 2
+    assert summary["missing"] == 1
+    assert PipelineRun.objects.count() == 1
+
+
+def test_batch_run_api_rejects_unknown_pipeline(db):
+    resp = APIClient().post(
+        "/api/run/batch/", data={"pipeline_id": 12345}, format="json"
+    )
+    assert resp.status_code == 404
@@ -0,0 +1,35 @@
+from benchmarks.suite import Result, compare, measure
+
+
+def _result(name, median):
+    return Result(name=name, ops=1, repeats=1, median=median, best=median)
+
+
+def test_compare_flags_only_growth_beyond_the_threshold():
+    baseline = {"step.a": {"median": 1.0}, "step.b": {"median": 1.0}}
+    results = [_result("step.a", 1.1), _result("step.b", 1.3), _result("new", 9.0)]
+
+    regressions = compare(results, baseline, threshold=0.2)
+
+    assert [r.name for r in regressions] == ["step.b"]
+    assert round(regressions[0].change, 2) == 0.3
+
+
+def test_longest_prefix_override_wins():
+    baseline = {"e2e.run": {"median": 1.0}, "e2e.other": {"median": 1.0}}
+    results = [_result("e2e.run", 1.4), _result("e2e.other", 1.4)]
+
+    regressions = compare(
+        results, baseline, threshold=0.1, overrides={"e2e.": 0.5, "e2e.other": 0.2}
+    )
+
+    assert [(r.name, r.threshold) for r in regressions] == [("e2e.other", 0.2)]
+
+
+def test_measure_reports_time_per_operation():
+    calls = []
+    result = measure("noop", lambda: calls.append(1), ops=10, repeats=3)
+
+    assert len(calls) == 4  # one warmup
+    assert result.ops == 10 and result.repeats == 3
+    assert 0 <= result.best <= result.median
@@ -0,0 +1,122 @@
+import json
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from loans.models import Application, Pipeline
+from loans.routing import PRIORITY_LANES
+
+ROWS = [
+    {
+        "applicant_name": "Ana",
+        "amount": 12000,
+        "monthly_income": 4000,
+        "declared_debts": 500,
+        "country": "ES",
+        "loan_purpose": "home renovation",
+    },
+    {"applicant_name": "Broken", "amount": "lots", "country": "ES"},
+    {
+        "applicant_name": "Luis",
+        "amount": 28000,
+        "monthly_income": 2000,
+        "declared_debts": 1200,
+        "country": "OTHER",
+    },
+]
+
+
+def _post_ndjson(body, query=""):
+    return APIClient().post(
+        f"/api/applications/bulk/{query}",
+        data=body,
+        content_type="application/x-ndjson",
+    )
+
+
+@pytest.mark.django_db
+def test_json_array_inserts_valid_rows_and_reports_invalid_ones():
+    resp = APIClient().post(
+        "/api/applications/bulk/?chunk_size=2", data=ROWS, format="json"
+    )
+
+    assert resp.status_code == 207, resp.content
+    body = resp.json()
+    assert body["created"] == 2
+    assert [e["index"] for e in body["errors"]] == [1]
+    assert set(body["errors"][0]["errors"]) >= {"amount", "monthly_income"}
+    names = Application.objects.filter(pk__in=body["ids"]).values_list(
+        "applicant_name", flat=True
+    )
+    assert sorted(names) == ["Ana", "Luis"]
+
+
+@pytest.mark.django_db
+def test_ndjson_body_is_ingested_line_by_line():
+    lines = [json.dumps(ROWS[0]), "", "{not json", json.dumps(ROWS[2]), "[1, 2]"]
+    resp = _post_ndjson("\n".join(lines) + "\n")
+
+    assert resp.status_code == 207, resp.content
+    body = resp.json()
+    assert body["created"] == 2
+    assert [e["index"] for e in body["errors"]] == [1, 3]
+    assert "Invalid JSON" in str(body["errors"][0]["errors"])
+    assert Application.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_all_valid_rows_return_created():
+    resp = _post_ndjson(json.dumps(ROWS[0]))
+
+    assert resp.status_code == 201
+    assert resp.json()["errors"] == []
+
+
+@pytest.mark.django_db
+def test_no_valid_rows_is_a_bad_request():
+    resp = APIClient().post("/api/applications/bulk/", data=[ROWS[1]], format="json")
+
+    assert resp.status_code == 400
+    assert Application.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_inserted_applications_are_queued_for_a_batch_run():
+    pipeline_id = Pipeline.objects.create(name="p").id
+
+    with mock.patch("loans.views.run_pipeline_batch_task.apply_async") as apply:
+        apply.return_value.id = "task-1"
+        resp = APIClient().post(
+            f"/api/applications/bulk/?pipeline_id={pipeline_id}&vectorized=true",
+            data=ROWS,
+            format="json",
+        )
+
+    body = resp.json()
+    assert body["task_id"] == "task-1"
+    assert body["poll_status_url"] == "/api/run/batch/task-1/"
+    apply.assert_called_once()
+    args = apply.call_args.kwargs["args"]
+    assert args[0] == pipeline_id and args[1] == body["ids"] and args[3] is True
+    assert apply.call_args.kwargs["priority"] == PRIORITY_LANES["low"]
+
+
+@pytest.mark.django_db
+def test_unknown_pipeline_is_rejected_before_inserting():
+    resp = APIClient().post(
+        "/api/applications/bulk/?pipeline_id=999999", data=ROWS, format="json"
+    )
+
+    assert resp.status_code == 404
+    assert Application.objects.count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("body", [42, "x", {"applicant_name": "Ana"}])
+def test_json_body_that_is_not_an_array_is_a_bad_request(body):
+    resp = APIClient().post("/api/applications/bulk/", data=body, format="json")
+
+    assert resp.status_code == 400
+    assert resp.json() == {"detail": "Expected a JSON array or NDJSON body."}
+    assert Application.objects.count() == 0
@@ -0,0 +1,92 @@
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+from loans.models import Application
+from orchestrator.core import BaseStep, StepResult
+from orchestrator.executor import execute_plan
+from orchestrator.plan import compile_plan
+from orchestrator.steps import STEP_PROCESSORS
+
+
+class SlowStep(BaseStep):
+    name = "slow_step"
+
+    def get_params(self, params):
+        pass
+
+    def execute(self, params):
+        time.sleep(0.3)
+        return StepResult("PASS", {"slept": 0.3})
+
+
+def _config(step_type, order, depends_on=None):
+    return SimpleNamespace(
+        step_type=step_type, order=order, params={}, depends_on=depends_on
+    )
+
+
+@pytest.fixture
+def slow_step(monkeypatch):
+    monkeypatch.setitem(STEP_PROCESSORS, "slow_step", SlowStep)
+    monkeypatch.setitem(STEP_PROCESSORS, "other_slow_step", SlowStep)
+
+
+def test_independent_steps_run_concurrently_in_plan_order(slow_step):
+    plan = compile_plan(
+        1,
+        1,
+        [
+            _config("slow_step", 1, depends_on=[]),
+            _config("other_slow_step", 2, depends_on=[]),
+            _config("dti_rule", 3, depends_on=[]),
+            _config("risk_scoring", 4),
+        ],
+        [],
+    )
+    application = Application(
+        amount=Decimal(12000),
+        monthly_income=Decimal(4000),
+        declared_debts=Decimal(500),
+        country="ES",
+    )
+
+    started = time.perf_counter()
+    results = execute_plan(application, plan)
+    elapsed = time.perf_counter() - started
+
+    assert plan.is_dag
+    # risk_scoring consumes the DTI published by dti_rule.
+    assert plan.steps[3].dependencies == (2,)
+    assert [r[0] for r in results] == [
+        "slow_step",
+        "other_slow_step",
+        "dti_rule",
+        "risk_scoring",
+    ]
+    assert elapsed < 0.55
+
+
+def test_pipeline_without_dependencies_stays_sequential():
+    plan = compile_plan(1, 1, [_config("dti_rule", 1), _config("risk_scoring", 2)], [])
+
+    assert not plan.is_dag
+
+
+def test_dependency_cycles_are_rejected(db):
+    payload = {
+        "name": "cyclic",
+        "is_active": True,
+        "steps": [
+            {"step_type": "dti_rule", "order": 1, "depends_on": ["amount_policy"]},
+            {"step_type": "amount_policy", "order": 2, "depends_on": ["dti_rule"]},
+        ],
+        "terminal_rules": [],
+    }
+    resp = APIClient().post("/api/pipelines/", data=payload, format="json")
+
+    assert resp.status_code == 400
+    assert "cycle" in str(resp.json()["steps"])
@@ -104,7 +104,7 @@ def test_e2e_create_application_pipeline_and_run(
     # 4b) We should have at least one PipelineRun with step logs
     resp = client.get("/api/runs/")
     assert resp.status_code == 200, resp.content
-    runs = resp.json()
+    runs = resp.json()["results"]
     assert isinstance(runs, list) and len(runs) >= 1
     run = runs[0]
     assert run["application"] == application_id
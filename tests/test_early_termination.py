@@ -0,0 +1,126 @@
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from loans.models import Application, PipelineRun
+from loans.tasks import run_pipeline_batch_task, run_pipeline_task
+from orchestrator import agents
+
+pipe_payload = {
+    "name": "early-termination",
+    "is_active": True,
+    "early_termination": True,
+    "steps": [
+        {"step_type": "dti_rule", "order": 1},
+        {"step_type": "amount_policy", "order": 2},
+        {"step_type": "sentiment_check", "order": 3, "params": {"mode": "llm"}},
+        {"step_type": "risk_scoring", "order": 4},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "dti_rule.outcome == 'FAIL' or amount_policy.outcome == 'FAIL'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 2,
+            "condition": "sentiment_check.outcome == 'RISKY'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 3,
+            "condition": "risk_scoring.outcome == 'PASS'",
+            "final_status": "APPROVED",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def pipeline_id(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+def _run(pipeline_id, **fields):
+    application = Application.objects.create(applicant_name="X", **fields)
+    with mock.patch("orchestrator.agents.risky_by_deepseek", return_value=False) as llm:
+        final_status = run_pipeline_task(application.id, pipeline_id)
+    run = PipelineRun.objects.get(application=application)
+    return final_status, llm, [(s.step_type, s.outcome) for s in run.step_logs.all()]
+
+
+def test_failed_dti_skips_remaining_steps(pipeline_id):
+    final_status, llm, logs = _run(
+        pipeline_id,
+        amount=28000,
+        monthly_income=2000,
+        declared_debts=1200,
+        country="OTHER",
+        loan_purpose="home renovation",
+    )
+
+    assert final_status == "REJECTED"
+    assert not llm.called
+    assert logs == [
+        ("dti_rule", "FAIL"),
+        ("amount_policy", "SKIPPED"),
+        ("sentiment_check", "SKIPPED"),
+        ("risk_scoring", "SKIPPED"),
+    ]
+
+
+def test_undecided_runs_execute_every_step(pipeline_id):
+    final_status, llm, logs = _run(
+        pipeline_id,
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+        loan_purpose="home renovation",
+    )
+
+    assert final_status == "APPROVED"
+    assert llm.called
+    assert [outcome for _, outcome in logs] == ["PASS", "PASS", "SAFE", "PASS"]
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_batch_runs_skip_the_same_steps(pipeline_id, settings, vectorized):
+    settings.OPENROUTER_API_KEY = "test"
+    rejected = Application.objects.create(
+        applicant_name="R",
+        amount=28000,
+        monthly_income=2000,
+        declared_debts=1200,
+        country="OTHER",
+        loan_purpose="casino weekend",
+    )
+    approved = Application.objects.create(
+        applicant_name="A",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+        loan_purpose="home renovation",
+    )
+
+    many = mock.Mock(side_effect=lambda texts: [False] * len(texts))
+    with (
+        mock.patch.object(agents, "risky_by_deepseek_many", many),
+        mock.patch.object(agents, "risky_by_deepseek", return_value=False),
+    ):
+        run_pipeline_batch_task(
+            pipeline_id, [rejected.id, approved.id], vectorized=vectorized
+        )
+
+    # Only the undecided application's purpose is sent to the LLM.
+    assert many.call_args.args[0] == ["home renovation"]
+    logs = {
+        run.application_id: [s.outcome for s in run.step_logs.all()]
+        for run in PipelineRun.objects.all()
+    }
+    assert logs[rejected.id] == ["FAIL", "SKIPPED", "SKIPPED", "SKIPPED"]
+    assert logs[approved.id] == ["PASS", "PASS", "SAFE", "PASS"]
@@ -0,0 +1,183 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.admin import site
+from rest_framework.test import APIClient
+
+from loans.models import (
+    Application,
+    Pipeline,
+    PipelineRun,
+    PipelineStep,
+    PipelineVersion,
+    TerminalRule,
+)
+from loans.plans import clear_execution_plans, get_execution_plan
+from loans.tasks import run_pipeline_task
+from orchestrator.core import PreparedParams
+from orchestrator.steps import AmountPolicyRule, DebtToIncomeRule
+
+pipe_payload = {
+    "name": "plan-pipeline",
+    "is_active": True,
+    "steps": [
+        {"step_type": "dti_rule", "order": 1, "params": {"max_dti_threshold": 0.3}},
+        {"step_type": "not_a_step", "order": 2},
+        {"step_type": "amount_policy", "order": 3},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "dti_rule.outcome == 'FAIL'",
+            "final_status": "REJECTED",
+        }
+    ],
+}
+
+
+@pytest.fixture
+def pipeline(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()
+
+
+def test_plan_resolves_processors_and_prepares_params(pipeline):
+    plan = get_execution_plan(pipeline["id"])
+
+    assert [s.step_type for s in plan.steps] == ["dti_rule", "amount_policy"]
+    assert [s.processor_class for s in plan.steps] == [
+        DebtToIncomeRule,
+        AmountPolicyRule,
+    ]
+    dti_params = plan.steps[0].params
+    assert isinstance(dti_params, PreparedParams)
+    assert dti_params["max_dti_threshold"] == Decimal(0.3)
+    assert plan.steps[1].params["other_cap"] == Decimal(20_000)
+    assert [r.final_status for r in plan.terminal_rules] == ["REJECTED"]
+
+
+def test_hot_plan_needs_no_queries(pipeline, django_assert_num_queries):
+    plan = get_execution_plan(pipeline["id"])
+
+    with django_assert_num_queries(0):
+        assert get_execution_plan(pipeline["id"], plan.version) is plan
+
+
+def test_pipeline_update_creates_a_new_version(pipeline):
+    plan = get_execution_plan(pipeline["id"])
+
+    payload = {**pipe_payload, "steps": pipe_payload["steps"][:1]}
+    resp = APIClient().put(
+        f"/api/pipelines/{pipeline['id']}/", data=payload, format="json"
+    )
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["version"] == plan.version + 1
+
+    new_plan = get_execution_plan(pipeline["id"])
+    assert new_plan.version == plan.version + 1
+    assert new_plan.version_id != plan.version_id
+    assert [s.step_type for s in new_plan.steps] == ["dti_rule"]
+
+    # The old version is still loadable exactly as it was.
+    clear_execution_plans()
+    old_plan = get_execution_plan(pipeline["id"], plan.version)
+    assert [s.step_type for s in old_plan.steps] == ["dti_rule", "amount_policy"]
+
+
+def test_update_reuses_unchanged_rows(pipeline):
+    before = Pipeline.objects.get(pk=pipeline["id"]).current_version()
+    old_ids = {s.step_type: s.id for s in before.steps.all()}
+
+    steps = [dict(s) for s in pipe_payload["steps"]]
+    steps[2]["params"] = {"other_cap": 5000}
+    resp = APIClient().put(
+        f"/api/pipelines/{pipeline['id']}/",
+        data={**pipe_payload, "steps": steps},
+        format="json",
+    )
+    assert resp.status_code == 200, resp.content
+
+    after = Pipeline.objects.get(pk=pipeline["id"]).current_version()
+    new_ids = {s.step_type: s.id for s in after.steps.all()}
+    assert new_ids["dti_rule"] == old_ids["dti_rule"]
+    assert new_ids["not_a_step"] == old_ids["not_a_step"]
+    assert new_ids["amount_policy"] != old_ids["amount_policy"]
+    assert list(after.terminal_rules.all()) == list(before.terminal_rules.all())
+    # The previous version keeps its own row.
+    assert before.steps.get(step_type="amount_policy").params == {}
+
+
+def test_unchanged_update_keeps_the_version(pipeline):
+    resp = APIClient().put(
+        f"/api/pipelines/{pipeline['id']}/",
+        data={**pipe_payload, "name": "renamed"},
+        format="json",
+    )
+    assert resp.status_code == 200, resp.content
+    assert resp.json()["version"] == pipeline["version"]
+    assert PipelineVersion.objects.filter(pipeline_id=pipeline["id"]).count() == 1
+
+
+def test_runs_reference_the_version_they_ran(pipeline, settings):
+    settings.PIPELINE_REUSE_RESULTS = False
+    app = Application.objects.create(
+        applicant_name="V",
+        amount=1000,
+        monthly_income=3000,
+        declared_debts=100,
+        country="ES",
+        loan_purpose="car",
+    )
+    run_pipeline_task.apply(args=[app.id, pipeline["id"]]).get()
+
+    run = PipelineRun.objects.get(application=app)
+    assert run.pipeline_version.number == pipeline["version"]
+
+
+@pytest.mark.django_db
+def test_rows_written_through_the_orm_are_versioned():
+    orm = Pipeline.objects.create(name="orm")
+    PipelineStep.objects.create(pipeline=orm, step_type="dti_rule", order=1)
+    TerminalRule.objects.create(
+        pipeline=orm, order=1, condition="True", final_status="APPROVED"
+    )
+
+    version = orm.current_version()
+    assert [s.step_type for s in version.steps.all()] == ["dti_rule"]
+    assert version.terminal_rules.count() == 1
+
+    app = Application.objects.create(
+        applicant_name="O",
+        amount=1000,
+        monthly_income=3000,
+        declared_debts=100,
+        country="ES",
+    )
+    PipelineRun.objects.create(application=app, pipeline=orm, pipeline_version=version)
+    PipelineStep.objects.create(pipeline=orm, step_type="amount_policy", order=2)
+
+    # The run keeps the version it used; the new row starts another one.
+    assert orm.version == 2
+    assert version.steps.count() == 1
+    assert orm.current_version().steps.count() == 2
+
+
+def test_reading_the_current_version_does_not_write(
+    pipeline, django_assert_num_queries
+):
+    instance = Pipeline.objects.get(pk=pipeline["id"])
+
+    with django_assert_num_queries(1):
+        instance.current_version()
+        instance.current_version()
+
+
+@pytest.mark.parametrize("model", [PipelineStep, TerminalRule, PipelineVersion])
+def test_snapshot_rows_are_read_only_in_the_admin(model, rf):
+    model_admin = site._registry[model]
+    request = rf.get("/")
+
+    assert not model_admin.has_add_permission(request)
+    assert not model_admin.has_change_permission(request)
+    assert not model_admin.has_delete_permission(request)
@@ -0,0 +1,70 @@
+import random
+import string
+
+import pytest
+
+from orchestrator.keywords import KeywordMatcher, compile_keywords
+from orchestrator.steps import SentimentCheckStep
+
+
+def _scan(text, keywords):
+    # The substring scan the matcher replaces.
+    low = text.lower()
+    return [kw for kw in keywords if kw and kw.strip() and kw.lower() in low]
+
+
+def test_matches_like_a_substring_scan_on_random_text():
+    rng = random.Random(7)
+    alphabet = "abc d"
+    keywords = sorted(
+        {"".join(rng.choices(alphabet, k=rng.randint(1, 5))) for _ in range(600)}
+    )
+    # Large lists use the automaton, short ones the plain scan.
+    for matcher in (KeywordMatcher(keywords), KeywordMatcher(keywords[:20])):
+        for _ in range(300):
+            text = "".join(rng.choices(alphabet + "ABC", k=rng.randint(0, 30)))
+            expected = _scan(text, matcher.keywords)
+            assert matcher.find(text) == expected, text
+            assert matcher.matches(text) == bool(expected)
+
+
+def test_overlapping_and_nested_keywords():
+    keywords = ["he", "she", "his", "hers"] + [f"filler{i}" for i in range(200)]
+
+    assert KeywordMatcher(keywords).find("USHERS") == ["he", "she", "hers"]
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("crypto", ["crypto"]),
+        ("Crypto-mining rig", ["crypto"]),
+        ("cryptography course", []),
+        ("my_crypto wallet", []),
+        ("bet on casino, crypto.", ["crypto", "casino"]),
+    ],
+)
+def test_word_boundary_matching(text, expected):
+    assert (
+        KeywordMatcher(["crypto", "casino"], word_boundary=True).find(text) == expected
+    )
+
+
+def test_compiled_matchers_are_shared():
+    keywords = tuple(string.ascii_lowercase)
+
+    assert compile_keywords(keywords) is compile_keywords(keywords)
+    assert compile_keywords(keywords) is not compile_keywords(keywords, True)
+
+
+def test_sentiment_detail_reports_matched_keywords():
+    class App:
+        loan_purpose = "Casino weekend, then some gambling"
+
+    params = SentimentCheckStep.prepare_params(
+        {"risky_keywords": ["gambling", "crypto", "casino"]}
+    )
+    outcome, detail = SentimentCheckStep(App()).execute(params)
+
+    assert outcome == "RISKY"
+    assert detail["matched_keywords"] == ["gambling", "casino"]
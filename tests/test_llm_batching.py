@@ -0,0 +1,150 @@
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from stub_openrouter import StubOpenRouter
+
+from orchestrator import agents
+from orchestrator.agents import OpenRouterClient, parse_batch_answer
+from orchestrator.batching import BatchingClassifier, MissingVerdict
+
+
+def _classify_concurrently(classifier, texts):
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(classifier.classify, text) for text in texts]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def test_concurrent_callers_share_one_batch_and_get_their_own_verdict():
+    calls = []
+
+    def classify_many(texts):
+        calls.append(list(texts))
+        return ["casino" in text for text in texts]
+
+    classifier = BatchingClassifier(classify_many, window=0.2, max_batch=10)
+    results = _classify_concurrently(
+        classifier, ["casino trip", "new roof", "casino trip", "school fees"]
+    )
+
+    assert results == [True, False, True, False]
+    assert len(calls) == 1
+    # Duplicate texts are classified once.
+    assert sorted(calls[0]) == ["casino trip", "new roof", "school fees"]
+
+
+def test_batches_are_capped_at_max_batch():
+    calls = []
+    lock = threading.Lock()
+
+    def classify_many(texts):
+        with lock:
+            calls.append(len(texts))
+        return [False] * len(texts)
+
+    classifier = BatchingClassifier(classify_many, window=0.2, max_batch=3)
+    _classify_concurrently(classifier, [f"purpose {i}" for i in range(7)])
+
+    assert sum(calls) == 7
+    assert max(calls) <= 3
+
+
+def test_missing_verdict_fails_only_that_caller():
+    classifier = BatchingClassifier(
+        lambda texts: [None if "odd" in t else False for t in texts],
+        window=0.2,
+        max_batch=10,
+    )
+    results = _classify_concurrently(classifier, ["fine", "odd one"])
+
+    assert results[0] is False
+    assert isinstance(results[1], MissingVerdict)
+
+
+def test_batch_failure_reaches_every_caller():
+    def classify_many(texts):
+        raise RuntimeError("upstream down")
+
+    classifier = BatchingClassifier(classify_many, window=0.05, max_batch=10)
+    results = _classify_concurrently(classifier, ["a", "b"])
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_parse_batch_answer_tolerates_prose_and_gaps():
+    content = 'Here you go:\n{"1": "RISKY", "3": "safe", "4": "maybe"}\nDone.'
+
+    assert parse_batch_answer(content, 4) == [True, None, False, None]
+    assert parse_batch_answer("no json at all", 2) == [None, None]
+
+
+def test_many_purposes_are_sent_as_one_numbered_request(settings):
+    settings.OPENROUTER_API_KEY = "test"
+
+    def answer(payload):
+        items = re.findall(r"^(\d+)\. (.*)$", payload["messages"][1]["content"], re.M)
+        return json.dumps(
+            {n: "RISKY" if "crypto" in text else "SAFE" for n, text in items}
+        )
+
+    with StubOpenRouter(answer=answer) as stub:
+        client = OpenRouterClient(url=stub.url, api_key="test")
+        with mock.patch.object(agents, "get_openrouter_client", return_value=client):
+            verdicts = agents.risky_by_deepseek_many(
+                ["buy crypto\ncoins", "kitchen", "crypto mining rig"]
+            )
+
+    assert verdicts == [True, False, True]
+    assert len(stub.requests) == 1
+    assert stub.requests[0]["messages"][0]["content"] == agents.BATCH_SYSTEM_PROMPT
+
+
+@pytest.mark.django_db
+def test_batch_run_prefetches_verdicts_in_one_request(settings):
+    from loans.models import Application, Pipeline, PipelineStep
+    from loans.tasks import run_pipeline_batch_task
+
+    settings.OPENROUTER_API_KEY = "test"
+    settings.LLM_BATCH_MAX_ITEMS = 20
+    pipeline = Pipeline.objects.create(name="LLM")
+    PipelineStep.objects.create(
+        pipeline=pipeline, step_type="sentiment_check", order=1, params={"mode": "llm"}
+    )
+    purposes = ["gambling debts", "home repair", "car", "crypto", "wedding"]
+    for i, purpose in enumerate(purposes):
+        Application.objects.create(
+            applicant_name=f"A{i}",
+            amount=1000,
+            monthly_income=3000,
+            declared_debts=100,
+            country="ES",
+            loan_purpose=purpose,
+        )
+
+    many = mock.Mock(side_effect=lambda texts: [False] * len(texts))
+    single = mock.Mock(return_value=False)
+    with (
+        mock.patch.object(agents, "risky_by_deepseek_many", many),
+        mock.patch.object(agents, "risky_by_deepseek", single),
+    ):
+        summary = run_pipeline_batch_task.apply(args=[pipeline.id]).get()
+
+    assert summary["processed"] == len(purposes)
+    assert many.call_count == 1
+    assert sorted(many.call_args.args[0]) == sorted(purposes)
+    single.assert_not_called()
+
+
+def test_single_classification_asks_for_a_one_word_budget(settings):
+    payload = agents._single_payload("kitchen")
+
+    assert payload["max_tokens"] == settings.OPENROUTER_MAX_TOKENS_PER_ITEM
@@ -0,0 +1,98 @@
+from unittest import mock
+
+import pytest
+from fake_redis import FakeRedis
+
+from orchestrator.cache import LRUCache, VerdictCache
+
+
+@pytest.fixture
+def fake_redis():
+    client = FakeRedis()
+    with mock.patch("orchestrator.cache.get_redis", return_value=client):
+        yield client
+
+
+def _cache(**kwargs):
+    options = dict(local_size=2, local_ttl=60, redis_ttl=600)
+    options.update(kwargs)
+    return VerdictCache("test-verdict", **options)
+
+
+def _lookup(cache, text, compute, **kwargs):
+    return cache.get_or_compute(text, compute, model="m", prompt_version="v1", **kwargs)
+
+
+def test_normalized_text_hits_local_tier(fake_redis):
+    cache = _cache()
+    compute = mock.Mock(return_value=True)
+
+    assert _lookup(cache, "Home  Renovation", compute) is True
+    assert _lookup(cache, "home renovation ", compute) is True
+
+    assert compute.call_count == 1
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_redis_tier_is_shared_between_processes(fake_redis):
+    compute = mock.Mock(return_value=False)
+    _lookup(_cache(), "crypto", compute)
+
+    other_worker = _cache()
+    assert _lookup(other_worker, "crypto", compute) is False
+
+    assert compute.call_count == 1
+    assert other_worker.stats()["redis_hits"] == 1
+
+
+def test_model_and_prompt_version_are_part_of_the_key():
+    cache = _cache()
+    assert cache.key("x", "m", "v1") != cache.key("x", "m", "v2")
+    assert cache.key("x", "m", "v1") != cache.key("x", "other", "v1")
+
+
+def test_bypass_skips_lookup_and_failures_are_not_cached(fake_redis):
+    cache = _cache()
+    _lookup(cache, "casino", lambda: False)
+
+    assert _lookup(cache, "casino", lambda: True, bypass=True) is True
+    with pytest.raises(RuntimeError):
+        _lookup(cache, "boom", mock.Mock(side_effect=RuntimeError))
+    assert _lookup(cache, "boom", lambda: True) is True
+
+
+def test_flush_empties_both_tiers(fake_redis):
+    cache = _cache()
+    _lookup(cache, "a", lambda: True)
+    _lookup(cache, "b", lambda: True)
+
+    assert cache.flush() == 2
+    assert len(cache.local) == 0
+    assert list(fake_redis.data) == [cache.generation_key]
+
+
+def test_flush_retires_other_workers_local_verdicts(fake_redis):
+    compute = mock.Mock(return_value=True)
+    other_worker = _cache(generation_ttl=0)
+    _lookup(other_worker, "crypto", compute)
+
+    _cache().flush()
+
+    assert _lookup(other_worker, "crypto", compute) is True
+    assert compute.call_count == 2
+
+
+def test_lru_evicts_oldest_and_expires_entries():
+    lru = LRUCache(maxsize=2, ttl=10)
+    with mock.patch("orchestrator.cache.time.monotonic", return_value=0):
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        assert lru.get("b") is None
+        assert lru.get("a") == 1
+
+    with mock.patch("orchestrator.cache.time.monotonic", return_value=11):
+        assert lru.get("a") is None
+        assert len(lru) == 1
@@ -0,0 +1,120 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from loans.models import Application, PipelineRun
+from loans.tasks import run_pipeline_task
+from orchestrator.executor import execute_plan
+
+pipe_payload = {
+    "name": "lock-pipeline",
+    "steps": [
+        {"step_type": "dti_rule", "order": 1},
+        {"step_type": "sentiment_check", "order": 2},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "dti_rule.outcome == 'FAIL'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 2,
+            "condition": "sentiment_check.outcome == 'SAFE'",
+            "final_status": "APPROVED",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def pipeline_id(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+@pytest.fixture
+def application(db):
+    return Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+        loan_purpose="home renovation",
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_optimistic_mode_runs_steps_outside_a_transaction(pipeline_id, application):
+    in_transaction = []
+
+    def spy(*args, **kwargs):
+        in_transaction.append(connection.in_atomic_block)
+        return execute_plan(*args, **kwargs)
+
+    with mock.patch("loans.tasks.execute_plan", side_effect=spy):
+        status = run_pipeline_task(application.id, pipeline_id, lock_mode="optimistic")
+
+    assert status == "APPROVED"
+    assert in_transaction == [False]
+    run = PipelineRun.objects.get(application=application)
+    assert run.final_status == "APPROVED" and run.end_time is not None
+    assert [s.step_type for s in run.step_logs.all()] == ["dti_rule", "sentiment_check"]
+
+
+def test_optimistic_mode_recomputes_when_inputs_change_mid_run(
+    pipeline_id, application
+):
+    calls = []
+
+    def change_debts_once(app, plan, context):
+        calls.append(app.declared_debts)
+        if len(calls) == 1:
+            # Another writer raises the debts after our snapshot was taken.
+            Application.objects.filter(pk=app.pk).update(declared_debts=3000)
+        return execute_plan(app, plan, context)
+
+    with mock.patch("loans.tasks.execute_plan", side_effect=change_debts_once):
+        status = run_pipeline_task(application.id, pipeline_id, lock_mode="optimistic")
+
+    assert status == "REJECTED"
+    assert [str(d) for d in calls] == ["500.00", "3000.00"]
+    application.refresh_from_db()
+    assert application.status == "REJECTED"
+    # The stale computation left nothing behind.
+    assert PipelineRun.objects.filter(application=application).count() == 1
+
+
+def test_optimistic_mode_falls_back_to_row_lock_after_retries(
+    pipeline_id, application, settings
+):
+    settings.PIPELINE_OPTIMISTIC_RETRIES = 2
+
+    def always_change(app, plan, context):
+        Application.objects.filter(pk=app.pk).update(
+            loan_purpose=f"{app.loan_purpose}!"
+        )
+        return execute_plan(app, plan, context)
+
+    with mock.patch("loans.tasks.execute_plan", side_effect=always_change) as spy:
+        status = run_pipeline_task(application.id, pipeline_id, lock_mode="optimistic")
+
+    assert status == "APPROVED"
+    assert spy.call_count == 3
+    assert PipelineRun.objects.filter(application=application).count() == 1
+
+
+def test_lock_mode_defaults_to_setting(pipeline_id, application, settings):
+    settings.PIPELINE_LOCK_MODE = "optimistic"
+
+    with mock.patch("loans.tasks._run_optimistic", return_value="APPROVED") as run:
+        assert run_pipeline_task(application.id, pipeline_id) == "APPROVED"
+    run.assert_called_once()
+
+
+def test_missing_application_is_an_error_in_optimistic_mode(pipeline_id):
+    assert run_pipeline_task(999_999, pipeline_id, lock_mode="optimistic") == "ERROR"
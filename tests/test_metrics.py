@@ -0,0 +1,137 @@
+from unittest import mock
+
+import pytest
+from fake_redis import FakeRedis
+from rest_framework.test import APIClient
+
+from loans.models import Application, StepLog
+from loans.tasks import run_pipeline_task
+from orchestrator import metrics
+from orchestrator.metrics import MetricsRecorder, render
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with mock.patch.object(metrics, "get_redis", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def recorder():
+    recorder = MetricsRecorder(buckets=(0.01, 0.1, 1.0))
+    with mock.patch.object(metrics, "_recorder", recorder):
+        yield recorder
+
+
+def test_histograms_render_cumulative_buckets(redis_client, recorder):
+    recorder.observe("loan_step_duration_seconds", 0.005, step_type="dti_rule")
+    recorder.observe("loan_step_duration_seconds", 0.05, step_type="dti_rule")
+    recorder.observe("loan_step_duration_seconds", 5, count=2, step_type="dti_rule")
+    recorder.inc("loan_llm_requests_total", kind="batch")
+    assert recorder.flush()
+
+    text = render(metrics.read_metrics())
+
+    assert "# TYPE loan_step_duration_seconds histogram" in text
+    series = [
+        line
+        for line in text.splitlines()
+        if line.startswith("loan_step_duration_seconds")
+    ]
+    assert series == [
+        'loan_step_duration_seconds_bucket{step_type="dti_rule",le="0.01"} 1',
+        'loan_step_duration_seconds_bucket{step_type="dti_rule",le="0.1"} 2',
+        'loan_step_duration_seconds_bucket{step_type="dti_rule",le="1"} 2',
+        'loan_step_duration_seconds_bucket{step_type="dti_rule",le="+Inf"} 4',
+        'loan_step_duration_seconds_sum{step_type="dti_rule"} 10.055',
+        'loan_step_duration_seconds_count{step_type="dti_rule"} 4',
+    ]
+    assert 'loan_llm_requests_total{kind="batch"} 1' in text
+
+
+def test_flushes_from_several_processes_add_up(redis_client, recorder):
+    other = MetricsRecorder(buckets=recorder.buckets)
+    for process in (recorder, other):
+        process.inc("loan_llm_errors_total", kind="single")
+        process.flush()
+    recorder.flush()  # nothing new since the last flush
+
+    assert 'loan_llm_errors_total{kind="single"} 2' in render(metrics.read_metrics())
+
+
+def test_observations_survive_a_redis_outage(redis_client, recorder):
+    recorder.inc("loan_llm_requests_total", kind="single")
+    with mock.patch.object(metrics, "get_redis", return_value=None):
+        assert not recorder.flush()
+    assert recorder.flush()
+
+    assert metrics.read_metrics()
+
+
+@pytest.mark.django_db
+def test_runs_record_step_durations_and_metrics(redis_client, recorder):
+    resp = APIClient().post(
+        "/api/pipelines/",
+        data={
+            "name": "metrics",
+            "steps": [
+                {"step_type": "dti_rule", "order": 1},
+                {"step_type": "amount_policy", "order": 2},
+            ],
+            "terminal_rules": [],
+        },
+        format="json",
+    )
+    application = Application.objects.create(
+        applicant_name="M",
+        amount=1000,
+        monthly_income=3000,
+        declared_debts=100,
+        country="ES",
+        loan_purpose="car",
+    )
+    run_pipeline_task(application.id, resp.json()["id"])
+
+    logs = StepLog.objects.filter(pipeline_run__application=application)
+    assert [log.step_type for log in logs] == ["dti_rule", "amount_policy"]
+    assert all(log.wall_duration >= 0 and log.cpu_duration >= 0 for log in logs)
+
+    recorder.flush()
+    body = APIClient().get("/api/metrics/")
+    assert body.status_code == 200
+    assert body["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = body.content.decode()
+    for sample in (
+        'loan_step_duration_seconds_count{step_type="dti_rule"} 1',
+        'loan_step_cpu_seconds_count{step_type="amount_policy"} 1',
+        "loan_rule_evaluation_seconds_count{pipeline=",
+        "loan_pipeline_run_duration_seconds_count{pipeline=",
+        "loan_run_db_write_seconds_count 1",
+    ):
+        assert sample in text
+
+
+def test_metrics_endpoint_reports_an_unavailable_store(db):
+    with mock.patch.object(metrics, "get_redis", return_value=None):
+        assert APIClient().get("/api/metrics/").status_code == 503
+
+
+def test_llm_requests_and_errors_are_counted(recorder, settings):
+    from orchestrator import agents
+
+    settings.OPENROUTER_API_KEY = "test"
+    client = mock.Mock()
+    client.chat_completion.side_effect = [
+        {"choices": [{"message": {"content": "SAFE"}}]},
+        agents.LLMException("upstream down"),
+    ]
+    with mock.patch.object(agents, "get_openrouter_client", return_value=client):
+        assert agents.risky_by_deepseek("new roof") is False
+        with pytest.raises(agents.LLMException):
+            agents.risky_by_deepseek("new roof")
+
+    samples = recorder.samples()
+    assert samples["loan_llm_requests_total\tkind=single\t"] == 2
+    assert samples["loan_llm_errors_total\tkind=single\t"] == 1
+    assert samples["loan_llm_request_duration_seconds_count\tkind=single\t"] == 2
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from stub_openrouter import StubOpenRouter
+
+from orchestrator.agents import LLMException, OpenRouterClient
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+
+def _client(url, **kwargs):
+    options = dict(url=url, api_key="test", backoff_factor=0.01, backoff_max=0.05)
+    options.update(kwargs)
+    return OpenRouterClient(**options)
+
+
+def test_requests_reuse_one_keep_alive_connection():
+    with StubOpenRouter() as stub:
+        client = _client(stub.url)
+        for _ in range(5):
+            client.chat_completion(PAYLOAD)
+
+    assert len(stub.requests) == 5
+    assert len(stub.connections) == 1
+
+
+def test_retries_429_and_5xx_then_succeeds():
+    with StubOpenRouter(statuses=[429, 503, 502], answer=lambda p: "RISKY") as stub:
+        data = _client(stub.url, max_retries=3).chat_completion(PAYLOAD)
+
+    assert data["choices"][0]["message"]["content"] == "RISKY"
+    assert len(stub.requests) == 4
+
+
+def test_retries_are_bounded():
+    with StubOpenRouter(statuses=[503] * 10) as stub:
+        with pytest.raises(LLMException):
+            _client(stub.url, max_retries=2).chat_completion(PAYLOAD)
+
+    assert len(stub.requests) == 3
+
+
+def test_client_errors_are_not_retried():
+    with StubOpenRouter(statuses=[400]) as stub:
+        with pytest.raises(LLMException):
+            _client(stub.url).chat_completion(PAYLOAD)
+
+    assert len(stub.requests) == 1
+
+
+def test_read_timeout_is_separate_from_connect_timeout():
+    with StubOpenRouter(latency=0.3) as stub:
+        client = _client(stub.url, max_retries=0, read_timeout=0.05)
+        started = time.perf_counter()
+        with pytest.raises(Exception):
+            client.chat_completion(PAYLOAD)
+        elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.3
@@ -0,0 +1,147 @@
+from unittest import mock
+
+import pytest
+from rest_framework.test import APIClient
+
+from loans.models import Application, PipelineRun
+from loans.tasks import run_pipeline_task
+from orchestrator.agents import LLMException
+from orchestrator.executor import execute_plan
+
+pipe_payload = {
+    "name": "reuse-pipeline",
+    "steps": [
+        {"step_type": "dti_rule", "order": 1},
+        {"step_type": "sentiment_check", "order": 2},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "dti_rule.outcome == 'FAIL'",
+            "final_status": "REJECTED",
+        },
+        {
+            "order": 2,
+            "condition": "sentiment_check.outcome == 'SAFE'",
+            "final_status": "APPROVED",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def pipeline_id(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+@pytest.fixture
+def application(db):
+    return Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+        loan_purpose="home renovation",
+    )
+
+
+def _run(application, pipeline_id, **kwargs):
+    with mock.patch("loans.tasks.execute_plan", side_effect=execute_plan) as spy:
+        status = run_pipeline_task(application.id, pipeline_id, **kwargs)
+    run = PipelineRun.objects.filter(application=application).latest("id")
+    return status, run, spy.called
+
+
+def test_unchanged_application_reuses_the_previous_result(application, pipeline_id):
+    _, original, executed = _run(application, pipeline_id)
+    assert executed and original.reused_from is None
+
+    status, reused, executed = _run(application, pipeline_id)
+
+    assert not executed
+    assert status == "APPROVED"
+    assert reused.reused_from_id == original.id
+    assert reused.fingerprint == original.fingerprint
+    assert not reused.step_logs.exists()
+    body = APIClient().get(f"/api/runs/{reused.id}/").json()
+    assert body["reused_from"] == original.id
+
+
+def test_reuse_applies_in_optimistic_lock_mode(application, pipeline_id):
+    _run(application, pipeline_id, lock_mode="optimistic")
+    _, reused, executed = _run(application, pipeline_id, lock_mode="optimistic")
+
+    assert not executed and reused.reused_from_id is not None
+
+
+def test_changed_inputs_are_recomputed(application, pipeline_id):
+    _run(application, pipeline_id)
+    Application.objects.filter(pk=application.pk).update(declared_debts=3000)
+
+    status, run, executed = _run(application, pipeline_id)
+
+    assert executed and status == "REJECTED"
+    assert run.reused_from is None
+
+
+def test_new_pipeline_version_is_recomputed(application, pipeline_id):
+    _run(application, pipeline_id)
+    resp = APIClient().put(
+        f"/api/pipelines/{pipeline_id}/",
+        data={**pipe_payload, "early_termination": True},
+        format="json",
+    )
+    assert resp.status_code == 200, resp.content
+
+    _, run, executed = _run(application, pipeline_id)
+
+    assert executed and run.reused_from is None
+
+
+def test_runs_that_fell_back_to_keywords_are_not_reused(application):
+    steps = [{"step_type": "sentiment_check", "order": 1, "params": {"mode": "llm"}}]
+    resp = APIClient().post(
+        "/api/pipelines/",
+        data={**pipe_payload, "name": "llm-reuse", "steps": steps},
+        format="json",
+    )
+    assert resp.status_code == 201, resp.content
+    pipeline_id = resp.json()["id"]
+
+    with mock.patch(
+        "orchestrator.agents.risky_by_deepseek", side_effect=LLMException("down")
+    ):
+        _, degraded, _ = _run(application, pipeline_id)
+    assert degraded.degraded
+    with mock.patch("orchestrator.agents.risky_by_deepseek", return_value=False):
+        _, run, executed = _run(application, pipeline_id)
+
+    assert executed and run.reused_from is None
+    assert not run.degraded
+    assert run.step_logs.get().detail["mode"] == "llm"
+
+
+def test_force_recomputes(application, pipeline_id):
+    _run(application, pipeline_id)
+
+    _, run, executed = _run(application, pipeline_id, force=True)
+
+    assert executed and run.reused_from is None
+
+
+def test_run_api_passes_force(application, pipeline_id):
+    with mock.patch("loans.views.run_pipeline_task.apply_async") as apply_async:
+        APIClient().post(
+            "/api/run/",
+            {
+                "application_id": application.id,
+                "pipeline_id": pipeline_id,
+                "force": True,
+            },
+            format="json",
+        )
+
+    assert apply_async.call_args.kwargs["kwargs"]["force"] is True
@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+from loans.models import Application
+from orchestrator.core import RunContext
+from orchestrator.steps import AmountPolicyRule, DebtToIncomeRule, RiskScoringStep
+
+
+def _application(**overrides):
+    fields = dict(amount=12000, monthly_income=4000, declared_debts=500, country="ES")
+    fields.update(overrides)
+    return Application(
+        **{k: Decimal(v) if k != "country" else v for k, v in fields.items()}
+    )
+
+
+def test_steps_publish_values_that_risk_scoring_reuses():
+    application = _application()
+    context = RunContext()
+
+    DebtToIncomeRule(application, context).execute({})
+    AmountPolicyRule(application, context).execute({})
+    assert context.get("dti") == Decimal("0.125")
+
+    # A value already in the context is read, not recomputed.
+    context.publish("dti", Decimal("0.3"))
+    _, detail = RiskScoringStep(application, context).execute({})
+
+    assert detail["risk_score"] == Decimal("30.0000") + Decimal(12000) / 30000 * 20
+
+
+def test_country_max_is_not_shared_between_different_cap_tables():
+    application = _application()
+    context = RunContext()
+
+    _, policy_detail = AmountPolicyRule(application, context).execute(
+        {"cap_for_country": {"ES": 10000}}
+    )
+    _, risk_detail = RiskScoringStep(application, context).execute({})
+
+    assert policy_detail["country_max"] == Decimal(10000)
+    assert risk_detail["risk_score"] == Decimal("12.5000") + Decimal(12000) / 30000 * 20
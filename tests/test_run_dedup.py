@@ -0,0 +1,115 @@
+from unittest import mock
+
+import pytest
+from fake_redis import FakeRedis
+from rest_framework.test import APIClient
+
+from loans import dedup
+from loans.models import Application, Pipeline, PipelineRun
+from loans.tasks import run_pipeline_task
+
+
+@pytest.fixture
+def fake_redis():
+    client = FakeRedis()
+    with mock.patch.object(dedup, "get_redis", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def application(db):
+    return Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+    )
+
+
+@pytest.fixture
+def pipeline(db):
+    return Pipeline.objects.create(name="dedup")
+
+
+@pytest.fixture
+def enqueue():
+    with mock.patch("loans.views.run_pipeline_task.apply_async") as apply_async:
+        yield apply_async
+
+
+def _post(application, pipeline, key=None, **payload):
+    headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+    body = {"application_id": application.id, "pipeline_id": pipeline.id, **payload}
+    return APIClient().post("/api/run/", body, format="json", **headers)
+
+
+def test_identical_requests_in_flight_share_one_task(
+    fake_redis, application, pipeline, enqueue
+):
+    first = _post(application, pipeline).json()
+    second = _post(application, pipeline).json()
+
+    assert second["task_id"] == first["task_id"]
+    assert (first["deduplicated"], second["deduplicated"]) == (False, True)
+    enqueue.assert_called_once()
+    assert enqueue.call_args.kwargs["task_id"] == first["task_id"]
+
+
+def test_finished_task_releases_its_request(fake_redis, application, pipeline, enqueue):
+    first = _post(application, pipeline).json()
+    run_pipeline_task.apply(
+        args=[application.id, pipeline.id, pipeline.version], task_id=first["task_id"]
+    )
+    second = _post(application, pipeline).json()
+
+    assert second["task_id"] != first["task_id"]
+    assert enqueue.call_count == 2
+
+
+def test_idempotency_key_returns_the_original_task(
+    fake_redis, application, pipeline, enqueue
+):
+    first = _post(application, pipeline, key="click-1").json()
+    # Completed in the meantime: the key still maps to the same task.
+    run_pipeline_task.apply(
+        args=[application.id, pipeline.id, pipeline.version], task_id=first["task_id"]
+    )
+    retry = _post(application, pipeline, key="click-1").json()
+
+    assert retry["task_id"] == first["task_id"]
+    assert retry["deduplicated"] is True
+    enqueue.assert_called_once()
+    assert PipelineRun.objects.filter(application=application).count() == 1
+
+
+def test_reused_idempotency_key_for_another_request_is_rejected(
+    fake_redis, application, pipeline, enqueue
+):
+    _post(application, pipeline, key="k")
+    other = Pipeline.objects.create(name="other")
+
+    resp = _post(application, other, key="k")
+
+    assert resp.status_code == 422
+    enqueue.assert_called_once()
+
+
+def test_without_redis_every_request_is_enqueued(application, pipeline, enqueue):
+    with mock.patch.object(dedup, "get_redis", return_value=None):
+        first = _post(application, pipeline).json()
+        second = _post(application, pipeline).json()
+
+    assert first["task_id"] != second["task_id"]
+    assert enqueue.call_count == 2
+
+
+def test_failed_enqueue_releases_the_claim(fake_redis, application, pipeline, enqueue):
+    enqueue.side_effect = [ConnectionError("broker down"), None]
+    with pytest.raises(ConnectionError):
+        _post(application, pipeline, key="retry-me")
+
+    retry = _post(application, pipeline, key="retry-me").json()
+    assert retry["deduplicated"] is False
+    assert enqueue.call_count == 2
+    assert enqueue.call_args.kwargs["task_id"] == retry["task_id"]
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from loans import events
+from loans.models import Application, Pipeline, PipelineRun
+from loans.tasks import run_pipeline_task
+
+
+@pytest.fixture
+def application(db):
+    return Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+    )
+
+
+@pytest.fixture
+def pipeline(db):
+    return Pipeline.objects.create(name="events")
+
+
+@pytest.fixture
+def no_redis(settings):
+    settings.RUN_EVENTS_POLL_INTERVAL = 0.01
+    with mock.patch.object(events, "_subscribe", return_value=(None, None)):
+        yield
+
+
+def _collect(stream):
+    async def consume():
+        return [frame async for frame in stream]
+
+    return asyncio.run(consume())
+
+
+def test_task_id_is_recorded_and_looked_up(application, pipeline):
+    run_pipeline_task.apply(args=[application.id, pipeline.id], task_id="task-42")
+
+    run = PipelineRun.objects.get(application=application)
+    assert run.task_id == "task-42"
+
+    resp = APIClient().get("/api/runs/by_task_id/task-42/")
+    assert resp.status_code == 200
+    assert resp.json()["id"] == run.id
+    assert APIClient().get("/api/runs/by_task_id/unknown/").status_code == 404
+
+
+def test_run_trigger_links_to_working_status_urls(application, pipeline):
+    with (
+        mock.patch("loans.views.run_pipeline_task.apply_async"),
+        mock.patch("loans.dedup.uuid.uuid4", return_value="task-7"),
+    ):
+        body = (
+            APIClient()
+            .post(
+                "/api/run/",
+                {"application_id": application.id, "pipeline_id": pipeline.id},
+                format="json",
+            )
+            .json()
+        )
+
+    assert body["poll_status_url"] == "/api/runs/by_task_id/task-7/"
+    assert body["events_url"] == "/api/runs/by_task_id/task-7/events/"
+
+
+def test_completion_is_published_after_commit(
+    application, pipeline, django_capture_on_commit_callbacks
+):
+    client = mock.Mock()
+    with mock.patch.object(events, "get_redis", return_value=client):
+        with django_capture_on_commit_callbacks(execute=True):
+            run_pipeline_task.apply(args=[application.id, pipeline.id], task_id="t-1")
+
+    channel, message = client.publish.call_args.args
+    assert channel == "run-completed:t-1"
+    assert json.loads(message)["final_status"] == "NEEDS_REVIEW"
+
+
+def test_stream_pushes_the_published_event():
+    pubsub = mock.AsyncMock()
+    pubsub.get_message.side_effect = [
+        None,
+        {"data": json.dumps({"run_id": 1, "final_status": "APPROVED"})},
+    ]
+    client = mock.AsyncMock()
+    find_run = mock.AsyncMock(return_value=None)
+
+    with mock.patch.object(events, "_subscribe", return_value=(client, pubsub)):
+        frames = _collect(events.run_completion_events("t-1", find_run))
+
+    assert frames[0] == ": keepalive\n\n"
+    assert frames[1].startswith("event: completed\n")
+    assert json.loads(frames[1].split("data: ")[1])["final_status"] == "APPROVED"
+    pubsub.aclose.assert_awaited()
+    client.aclose.assert_awaited()
+
+
+def test_stream_times_out(no_redis, settings):
+    settings.RUN_EVENTS_TIMEOUT = 0
+    frames = _collect(
+        events.run_completion_events("t-1", mock.AsyncMock(return_value=None))
+    )
+
+    assert frames == ['event: timeout\ndata: {"task_id": "t-1"}\n\n']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_endpoint_reports_a_finished_run(application, pipeline, no_redis):
+    run_pipeline_task.apply(args=[application.id, pipeline.id], task_id="task-9")
+
+    async def fetch():
+        response = await AsyncClient().get("/api/runs/by_task_id/task-9/events/")
+        frames = [chunk async for chunk in response.streaming_content]
+        return response, b"".join(frames).decode()
+
+    response, body = asyncio.run(fetch())
+
+    assert response["Content-Type"] == "text/event-stream"
+    assert body.startswith("event: completed\n")
+    assert json.loads(body.split("data: ")[1])["task_id"] == "task-9"
@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from loans.filters import PipelineRunFilter
+from loans.models import Application, Pipeline, PipelineRun
+
+
+@pytest.fixture
+def runs(db):
+    applications = [
+        Application.objects.create(
+            applicant_name=name,
+            amount=1000,
+            monthly_income=3000,
+            declared_debts=100,
+            country="ES",
+        )
+        for name in ("Ana", "Luis")
+    ]
+    pipelines = [Pipeline.objects.create(name=name) for name in ("a", "b")]
+    now = timezone.now()
+    return PipelineRun.objects.bulk_create(
+        PipelineRun(
+            application=applications[i % 2],
+            pipeline=pipelines[i // 4],
+            start_time=now - timezone.timedelta(hours=i),
+            final_status="APPROVED" if i % 3 else "REJECTED",
+        )
+        for i in range(8)
+    )
+
+
+def _ids(query):
+    resp = APIClient().get(f"/api/runs/?step_logs=false&{query}")
+    assert resp.status_code == 200, resp.content
+    return [r["id"] for r in resp.json()["results"]]
+
+
+def test_filters_by_application_pipeline_and_status(runs):
+    assert _ids(f"application={runs[1].application_id}") == [
+        r.id for r in runs if r.application_id == runs[1].application_id
+    ]
+    assert _ids(f"pipeline={runs[5].pipeline_id}") == [r.id for r in runs[4:]]
+    assert _ids("final_status=REJECTED") == [r.id for r in runs[::3]]
+    assert _ids(
+        f"final_status=APPROVED&pipeline={runs[0].pipeline_id}"
+        f"&application={runs[1].application_id}"
+    ) == [runs[1].id]
+
+
+def test_filters_by_start_time_range(runs):
+    after = runs[5].start_time.isoformat().replace("+00:00", "Z")
+    before = runs[2].start_time.isoformat().replace("+00:00", "Z")
+
+    assert _ids(f"start_time_after={after}&start_time_before={before}") == [
+        r.id for r in runs[2:6]
+    ]
+
+
+def test_invalid_filter_values_are_rejected(runs):
+    resp = APIClient().get("/api/runs/?final_status=MAYBE")
+
+    assert resp.status_code == 400
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="EXPLAIN plans are checked on Postgres"
+)
+@pytest.mark.parametrize(
+    "params,index",
+    [
+        ({}, "run_start_time_idx"),
+        ({"application": 1}, "run_application_time_idx"),
+        ({"pipeline": 1}, "run_pipeline_time_idx"),
+        ({"final_status": "APPROVED"}, "run_status_time_idx"),
+    ],
+)
+def test_history_queries_use_composite_indexes(runs, params, index):
+    queryset = PipelineRunFilter(
+        params, queryset=PipelineRun.objects.order_by("-start_time", "-id")
+    ).qs[:50]
+    with connection.cursor() as cursor:
+        # A handful of rows would always be scanned sequentially.
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+
+    assert index in plan
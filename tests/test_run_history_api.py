@@ -0,0 +1,60 @@
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from loans.models import Application, Pipeline, PipelineRun, StepLog
+
+
+@pytest.fixture
+def runs(db):
+    application = Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+    )
+    pipeline = Pipeline.objects.create(name="history")
+    now = timezone.now()
+    runs = PipelineRun.objects.bulk_create(
+        PipelineRun(
+            application=application,
+            pipeline=pipeline,
+            start_time=now - timezone.timedelta(minutes=i),
+            final_status="APPROVED",
+        )
+        for i in range(12)
+    )
+    StepLog.objects.bulk_create(
+        StepLog(pipeline_run=run, step_type=step_type, outcome="PASS")
+        for run in runs
+        for step_type in ("dti_rule", "amount_policy")
+    )
+    return runs
+
+
+def test_list_is_cursor_paginated_newest_first(runs):
+    client = APIClient()
+    first = client.get("/api/runs/?page_size=5").json()
+    second = client.get(first["next"]).json()
+
+    assert [r["id"] for r in first["results"]] == [r.id for r in runs[:5]]
+    assert [r["id"] for r in second["results"]] == [r.id for r in runs[5:10]]
+    assert len(first["results"][0]["step_logs"]) == 2
+
+
+def test_list_query_count_does_not_grow_with_runs(runs, django_assert_num_queries):
+    client = APIClient()
+    # One query for the page of runs, one for all of their step logs.
+    with django_assert_num_queries(2):
+        resp = client.get("/api/runs/?page_size=12")
+
+    assert len(resp.json()["results"]) == 12
+
+
+def test_lean_list_skips_step_logs(runs, django_assert_num_queries):
+    client = APIClient()
+    with django_assert_num_queries(1):
+        resp = client.get("/api/runs/?step_logs=false")
+
+    assert "step_logs" not in resp.json()["results"][0]
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from loans import dedup
+from loans.models import Application, Pipeline, PipelineRun
+from loans.tasks import run_pipeline_batch_task, run_pipeline_task
+
+
+@pytest.fixture
+def pipeline(db):
+    pipeline = Pipeline.objects.create(name="timed")
+    pipeline.steps.create(step_type="dti_rule", order=1)
+    return pipeline
+
+
+@pytest.fixture
+def application(db):
+    return Application.objects.create(
+        applicant_name="Tim",
+        amount=1000,
+        monthly_income=3000,
+        declared_debts=100,
+        country="ES",
+        loan_purpose="car",
+    )
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+def test_run_request_records_where_the_time_went(application, pipeline):
+    before = timezone.now()
+    with mock.patch.object(dedup, "get_redis", return_value=None):
+        resp = APIClient().post(
+            "/api/run/",
+            data={"application_id": application.id, "pipeline_id": pipeline.id},
+            format="json",
+        )
+    assert resp.status_code == 202, resp.content
+
+    run = PipelineRun.objects.get(application=application)
+    assert before <= run.enqueued_at <= run.start_time
+    assert run.queue_wait >= 0
+    assert run.lock_wait >= 0
+    assert run.execution_duration >= 0
+
+    body = APIClient().get(f"/api/runs/{run.id}/").json()
+    assert body["queue_wait"] == run.queue_wait
+
+
+def test_queue_wait_is_measured_from_the_enqueue_time(application, pipeline):
+    enqueued_at = timezone.now() - timedelta(seconds=5)
+    run_pipeline_task.apply(
+        args=[application.id, pipeline.id],
+        kwargs={"enqueued_at": enqueued_at.isoformat()},
+    )
+
+    run = PipelineRun.objects.get(application=application)
+    assert run.enqueued_at == enqueued_at
+    assert 5 <= run.queue_wait < 60
+
+
+def test_batch_runs_share_the_queue_and_lock_wait(application, pipeline):
+    enqueued_at = timezone.now() - timedelta(seconds=2)
+    run_pipeline_batch_task.apply(
+        args=[pipeline.id, [application.id]],
+        kwargs={"enqueued_at": enqueued_at.isoformat()},
+    )
+
+    run = PipelineRun.objects.get(application=application)
+    assert run.queue_wait >= 2
+    assert run.lock_wait is not None and run.execution_duration is not None
+
+
+def _run(application, pipeline, seconds, started_ago=timedelta(minutes=5)):
+    return PipelineRun.objects.create(
+        application=application,
+        pipeline=pipeline,
+        start_time=timezone.now() - started_ago,
+        queue_wait=seconds,
+        lock_wait=seconds / 10,
+        execution_duration=seconds / 100,
+    )
+
+
+def test_timings_endpoint_reports_percentiles_per_pipeline(application, pipeline):
+    other = Pipeline.objects.create(name="other")
+    for seconds in range(1, 101):
+        _run(application, pipeline, float(seconds))
+    _run(application, other, 7.0)
+    _run(application, pipeline, 10_000.0, started_ago=timedelta(days=3))
+    PipelineRun.objects.create(application=application, pipeline=other)
+
+    resp = APIClient().get("/api/runs/timings/?percentiles=50,99")
+    assert resp.status_code == 200, resp.content
+    body = resp.json()
+
+    assert body["percentiles"] == [50, 99]
+    by_pipeline = {entry["pipeline"]: entry for entry in body["pipelines"]}
+    timed = by_pipeline[pipeline.id]
+    assert timed["runs"] == 100
+    assert timed["queue_wait"] == pytest.approx({"p50": 50.5, "p99": 99.01})
+    assert timed["lock_wait"]["p50"] == pytest.approx(5.05)
+    assert timed["execution"]["p99"] == pytest.approx(0.9901)
+    # Runs without timings count but do not move the percentiles.
+    assert by_pipeline[other.id]["runs"] == 2
+    assert by_pipeline[other.id]["queue_wait"] == {"p50": 7.0, "p99": 7.0}
+
+
+def test_timings_endpoint_honours_filters_and_window(application, pipeline):
+    _run(application, pipeline, 1.0, started_ago=timedelta(hours=2))
+    _run(application, pipeline, 3.0)
+
+    client = APIClient()
+    recent = client.get("/api/runs/timings/", {"window": 3600}).json()
+    assert recent["pipelines"][0]["queue_wait"]["p50"] == 3.0
+
+    since = (timezone.now() - timedelta(hours=3)).isoformat()
+    wide = client.get(
+        "/api/runs/timings/", {"start_time_after": since, "pipeline": pipeline.id}
+    ).json()
+    assert wide["pipelines"][0]["runs"] == 2
+
+    assert client.get("/api/runs/timings/?percentiles=120").status_code == 400
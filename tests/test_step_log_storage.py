@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from loans.models import Application, PipelineRun, StepLog
+from loans.tasks import run_pipeline_task
+
+pipe_payload = {
+    "name": "storage-pipeline",
+    "steps": [
+        {"step_type": "dti_rule", "order": 1},
+        {"step_type": "amount_policy", "order": 2},
+        {"step_type": "sentiment_check", "order": 3},
+        {"step_type": "risk_scoring", "order": 4},
+    ],
+    "terminal_rules": [
+        {
+            "order": 1,
+            "condition": "risk_scoring.outcome == 'PASS'",
+            "final_status": "APPROVED",
+        },
+    ],
+}
+
+
+@pytest.fixture
+def pipeline_id(db):
+    resp = APIClient().post("/api/pipelines/", data=pipe_payload, format="json")
+    assert resp.status_code == 201, resp.content
+    return resp.json()["id"]
+
+
+def _run(pipeline_id, lock_mode="row"):
+    application = Application.objects.create(
+        applicant_name="Ana",
+        amount=12000,
+        monthly_income=4000,
+        declared_debts=500,
+        country="ES",
+        loan_purpose="home renovation",
+    )
+    with CaptureQueriesContext(connection) as queries:
+        assert run_pipeline_task(application.id, pipeline_id, lock_mode=lock_mode)
+    run = PipelineRun.objects.get(application=application)
+    return run, [q["sql"] for q in queries.captured_queries]
+
+
+@pytest.mark.parametrize("lock_mode", ["row", "optimistic"])
+def test_step_logs_are_written_with_one_insert(pipeline_id, lock_mode):
+    run, queries = _run(pipeline_id, lock_mode)
+
+    step_log_inserts = [
+        q for q in queries if q.startswith('INSERT INTO "loans_steplog"')
+    ]
+    assert len(step_log_inserts) == 1
+    assert run.step_logs.count() == 4
+
+
+def test_compact_storage_keeps_the_api_shape(pipeline_id, settings):
+    row_run, _ = _run(pipeline_id)
+    settings.PIPELINE_STEP_LOG_STORAGE = "compact"
+    compact_run, queries = _run(pipeline_id)
+
+    assert not any('INSERT INTO "loans_steplog"' in q for q in queries)
+    assert not StepLog.objects.filter(pipeline_run=compact_run).exists()
+    assert len(compact_run.step_results) == 4
+
+    client = APIClient()
+    row_body = client.get(f"/api/runs/{row_run.id}/").json()
+    compact_body = client.get(f"/api/runs/{compact_run.id}/").json()
+
+    assert compact_body.keys() == row_body.keys()
+    assert compact_body["final_status"] == row_body["final_status"] == "APPROVED"
+    for row_log, compact_log in zip(row_body["step_logs"], compact_body["step_logs"]):
+        assert compact_log.keys() == row_log.keys()
+        assert compact_log["execution_time"]
+        del compact_log["execution_time"], row_log["execution_time"]
+        for log in (row_log, compact_log):
+            assert log.pop("wall_duration") >= 0
+            assert log.pop("cpu_duration") >= 0
+        assert compact_log == row_log
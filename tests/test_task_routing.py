@@ -0,0 +1,119 @@
+from unittest import mock
+
+import pytest
+from fake_redis import FakeRedis
+from rest_framework.test import APIClient
+
+from loans import dedup
+from loans.models import Application, Pipeline, PipelineStep
+from loans.routing import PRIORITY_LANES, route_pipeline_task
+from orchestrator import agents, ratelimit
+from orchestrator.agents import LLMException
+from orchestrator.metrics import MetricsRecorder
+from orchestrator.ratelimit import RateLimiter
+
+
+def _pipeline(name, **sentiment_params):
+    pipeline = Pipeline.objects.create(name=name)
+    PipelineStep.objects.create(pipeline=pipeline, step_type="dti_rule", order=1)
+    PipelineStep.objects.create(
+        pipeline=pipeline, step_type="sentiment_check", order=2, params=sentiment_params
+    )
+    return pipeline
+
+
+@pytest.mark.django_db
+def test_llm_pipelines_are_routed_to_their_own_queue(settings):
+    llm = _pipeline("llm", mode="llm")
+    keyword = _pipeline("keyword", mode="keyword")
+
+    route = route_pipeline_task(
+        "loans.tasks.run_pipeline_task", [1, llm.id, llm.version], {}, {}
+    )
+    assert route == {"queue": settings.PIPELINE_LLM_QUEUE}
+    route = route_pipeline_task(
+        "loans.tasks.run_pipeline_task", [1, keyword.id], {}, {}
+    )
+    assert route == {"queue": settings.PIPELINE_QUEUE}
+    route = route_pipeline_task("loans.tasks.run_pipeline_batch_task", [llm.id], {}, {})
+    assert route == {"queue": settings.PIPELINE_LLM_QUEUE}
+
+
+@pytest.mark.django_db
+def test_unknown_pipelines_and_other_tasks(settings):
+    route = route_pipeline_task("loans.tasks.run_pipeline_task", [1, 999999], {}, {})
+    assert route == {"queue": settings.PIPELINE_QUEUE}
+    assert route_pipeline_task("loans.tasks.cleanup", [], {}, {}) is None
+
+
+@pytest.mark.django_db
+def test_run_requests_set_the_message_priority():
+    pipeline = Pipeline.objects.create(name="p")
+    requests = [{}, {"priority": "high"}]
+
+    with (
+        mock.patch.object(dedup, "get_redis", return_value=FakeRedis()),
+        mock.patch("loans.views.run_pipeline_task.apply_async") as apply_async,
+    ):
+        for i, extra in enumerate(requests):
+            application = Application.objects.create(
+                applicant_name=f"Ana {i}",
+                amount=12000,
+                monthly_income=4000,
+                declared_debts=500,
+                country="ES",
+            )
+            body = {"application_id": application.id, "pipeline_id": pipeline.id}
+            APIClient().post("/api/run/", {**body, **extra}, format="json")
+
+    priorities = [c.kwargs["priority"] for c in apply_async.call_args_list]
+    assert priorities == [PRIORITY_LANES["normal"], PRIORITY_LANES["high"]]
+
+
+def _limiter(*waits):
+    client = mock.Mock()
+    client.eval.side_effect = [str(w) for w in waits]
+    return client, RateLimiter("test", rate=1, burst=1)
+
+
+def test_rate_limiter_waits_for_a_slot():
+    client, limiter = _limiter(0.05, 0)
+    with (
+        mock.patch.object(ratelimit, "get_redis", return_value=client),
+        mock.patch.object(ratelimit.time, "sleep") as sleep,
+    ):
+        assert limiter.acquire(max_wait=1) is True
+    sleep.assert_called_once_with(0.05)
+
+
+def test_rate_limiter_refuses_when_no_slot_is_free_in_time():
+    client, limiter = _limiter(5)
+    with (
+        mock.patch.object(ratelimit, "get_redis", return_value=client),
+        mock.patch.object(ratelimit.time, "sleep") as sleep,
+    ):
+        assert limiter.acquire(max_wait=1) is False
+    sleep.assert_not_called()
+
+
+def test_rate_limiter_lets_requests_through_without_redis():
+    with mock.patch.object(ratelimit, "get_redis", return_value=None):
+        assert RateLimiter("test", rate=1).acquire(max_wait=0) is True
+
+
+def test_rate_limited_llm_requests_are_not_sent(settings):
+    settings.LLM_RATE_LIMIT = 60
+    recorder = MetricsRecorder()
+    client, _ = _limiter(30)
+    with (
+        mock.patch.object(ratelimit, "get_redis", return_value=client),
+        mock.patch.object(agents, "get_metrics", return_value=recorder),
+        mock.patch.object(agents, "get_openrouter_client") as openrouter,
+        pytest.raises(LLMException),
+    ):
+        agents._chat_completion({}, "single")
+
+    openrouter.assert_not_called()
+    samples = recorder.samples()
+    assert samples["loan_llm_rate_limited_total\tkind=single\t"] == 1
+    assert "loan_llm_requests_total\tkind=single\t" not in samples
@@ -0,0 +1,69 @@
+import pytest
+from rest_framework.test import APIClient
+from simpleeval import simple_eval
+
+from orchestrator.core import StepResult
+from orchestrator.rules import CompiledCondition, InvalidCondition, build_rule_context
+from orchestrator.steps import STEP_PROCESSORS
+
+step_results = [
+    ("dti_rule", "PASS", {"dti": 0.125, "threshold": "0.4"}),
+    ("amount_policy", "FAIL", {"country_max": 30000}),
+    ("sentiment_check", "SAFE", {"mode": "keyword"}),
+]
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "dti_rule.outcome == 'FAIL' or amount_policy.outcome == 'FAIL'",
+        "dti_rule.outcome == 'PASS' and sentiment_check.outcome != 'RISKY'",
+        "dti_rule.detail['dti'] < 0.2",
+        "not amount_policy.outcome == 'PASS'",
+        "amount_policy.outcome in 'PASS FAIL'",
+        "risk_scoring.outcome == 'PASS'",
+    ],
+)
+def test_compiled_condition_matches_simple_eval(condition):
+    names = {s: StepResult(o, d) for s, o, d in step_results}
+    try:
+        expected = simple_eval(condition, names=names)
+    except Exception:
+        expected = False
+
+    compiled = CompiledCondition(condition, allowed_names=STEP_PROCESSORS)
+    assert compiled.evaluate(build_rule_context(step_results)) == expected
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        "dti_rule.outcome ==",
+        "dti_rule.outcome == 'FAIL'; amount_policy.outcome == 'FAIL'",
+        "unknown_step.outcome == 'FAIL'",
+        "dti_rule.__class__",
+        "lambda: 1",
+    ],
+)
+def test_malformed_conditions_are_rejected(condition):
+    with pytest.raises(InvalidCondition):
+        CompiledCondition(condition, allowed_names=STEP_PROCESSORS)
+
+
+def test_pipeline_with_malformed_condition_is_rejected_on_save(db):
+    payload = {
+        "name": "bad-rules",
+        "is_active": True,
+        "steps": [{"step_type": "dti_rule", "order": 1}],
+        "terminal_rules": [
+            {
+                "order": 1,
+                "condition": "dti_rule.outcome = 'FAIL'",
+                "final_status": "REJECTED",
+            }
+        ],
+    }
+    resp = APIClient().post("/api/pipelines/", data=payload, format="json")
+
+    assert resp.status_code == 400
+    assert "Invalid condition" in str(resp.json()["terminal_rules"])
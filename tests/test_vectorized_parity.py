@@ -0,0 +1,92 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from loans.models import Application
+from orchestrator.steps import STEP_PROCESSORS
+from orchestrator.vectorized import VECTORIZED_STEPS, ApplicationColumns
+
+COUNTRIES = ["ES", "es", "FR", "DE", "OTHER", "IT", "Fr"]
+
+PARAMS = [
+    {},
+    {"max_dti_threshold": 0.25, "approve_threshold": 30},
+    {"max_dti_threshold": "0.5", "approve_threshold": 60.5},
+    {"cap_for_country": {"ES": 12000, "OTHER": 15000.5}, "approve_threshold": 20},
+    {"cap_for_country": {"FR": 10000}},
+]
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal("0.01"))
+
+
+def _applications():
+    rnd = random.Random(1234)
+    applications = [
+        Application(
+            amount=_money(rnd.randint(100, 4_000_000) / 100),
+            monthly_income=_money(rnd.randint(0, 1_500_000) / 100),
+            declared_debts=_money(rnd.randint(0, 600_000) / 100),
+            country=rnd.choice(COUNTRIES),
+        )
+        for _ in range(2_000)
+    ]
+    # Exact boundaries: DTI == 0.4, amount == cap, risk score == threshold.
+    applications += [
+        Application(
+            amount=_money(v[0]),
+            monthly_income=_money(v[1]),
+            declared_debts=_money(v[2]),
+            country=v[3],
+        )
+        for v in [
+            (1000, 1000, 400, "ES"),
+            (30000, 5000, 0, "ES"),
+            (25000, 5000, 1250, "FR"),
+            (20000, 4000, 1000, "OTHER"),
+            (15000, 2000, 500, "DE"),
+            (12000, 3, 1, "ES"),
+            (12000, "0.03", "0.01", "ES"),
+            (5000, 0, 300, "ES"),
+            (5000, 0, 0, "ES"),
+        ]
+    ]
+    return applications
+
+
+@pytest.mark.parametrize("params", PARAMS)
+@pytest.mark.parametrize("step_type", sorted(VECTORIZED_STEPS))
+def test_columnar_results_match_scalar_steps(step_type, params):
+    applications = _applications()
+    columnar = VECTORIZED_STEPS[step_type](
+        ApplicationColumns.from_applications(applications), params
+    )
+
+    checked = 0
+    for i, application in enumerate(applications):
+        if columnar.fallback[i]:
+            continue
+        outcome, detail = STEP_PROCESSORS[step_type](application).execute(params)
+        col_outcome, col_detail = columnar.result(i)
+
+        assert col_outcome == outcome, (application.__dict__, params)
+        assert col_detail == detail
+        assert {k: str(v) for k, v in col_detail.items()} == {
+            k: str(v) for k, v in detail.items()
+        }
+        checked += 1
+
+    assert checked > len(applications) * 0.9
+
+
+def test_invalid_income_falls_back_to_scalar_path():
+    applications = [
+        Application(amount=1000, monthly_income=0, declared_debts=10, country="ES")
+    ]
+    columnar = VECTORIZED_STEPS["dti_rule"](
+        ApplicationColumns.from_applications(applications), {}
+    )
+
+    assert columnar.fallback.tolist() == [True]